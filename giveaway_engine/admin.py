@@ -1,26 +1,162 @@
 from django.contrib import admin
 from django.contrib import messages
+from django import forms
 from django import db
-from .models import TelegramBot, TelegramUser, Giveaway, GiveawayItem, GiveawayAttempt, NewsUpdate, MessageTemplate, Questionnaire, MessageLog, UserAnswer
+from .models import TelegramBot, TelegramUser, Giveaway, GiveawayItem, GiveawayAttempt, NewsUpdate, MessageTemplate, Questionnaire, MessageLog, UserAnswer, UpdateProfile, FunnelRollup, QuestionAnswerStat, QuestionnaireProgress, OverloadEvent
 from .utils import send_telegram_message
+from .approvals import approval_message
+from .rendering import TemplateError, compile_template, render_many
+from . import metrics
+from .paginators import EstimatedCountPaginator
+from .routers import ReplicaReadsAdminMixin
+
+class FullTextSearchMixin:
+    """
+    Routes the admin search box through the full-text index (see search.py),
+    ranking the best matches first. The related search_fields (such as
+    user__username) still match alongside the text. Falls back to the
+    regular search_fields lookups when no index is available; "@username"
+    searches only the usernames.
+    """
+    def get_search_results(self, request, queryset, search_term):
+        from .search import full_text_search
+        if search_term.startswith('@'):
+            return super().get_search_results(request, queryset, search_term[1:])
+        related_fields = [field for field in self.get_search_fields(request) if '__' in field]
+        results = full_text_search(queryset, search_term, related_fields) if search_term else None
+        if results is None:
+            return super().get_search_results(request, queryset, search_term)
+        return results, False
+
+    def get_changelist(self, request, **kwargs):
+        from django.contrib.admin.views.main import ChangeList
+
+        class RankedChangeList(ChangeList):
+            def get_ordering(self, request, queryset):
+                if 'search_rank' in queryset.query.annotations:
+                    return ['-search_rank', '-pk']
+                return super().get_ordering(request, queryset)
+
+        return RankedChangeList
+
+class LargeTableAdminMixin:
+    """
+    Changelist settings for tables with tens of millions of rows:
+    estimated counts instead of COUNT(*) and a keyset "next page" link
+    (?id__lt=<last id>) that stays fast no matter how deep you page.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    ordering = ('-id',)
+    change_list_template = 'giveaway_engine/admin/keyset_change_list.html'
+
+    def changelist_view(self, request, extra_context=None):
+        response = super().changelist_view(request, extra_context)
+        context = getattr(response, 'context_data', None)
+        cl = context.get('cl') if context else None
+        # Keyset paging only makes sense in the default (newest first) order
+        if cl is not None and 'o' not in request.GET and not request.GET.get('q') and len(cl.result_list) >= cl.list_per_page:
+            last_id = cl.result_list[len(cl.result_list) - 1].pk
+            context['keyset_next_url'] = cl.get_query_string({'id__lt': last_id}, remove=['p'])
+        return response
 
 @admin.register(GiveawayAttempt)
-class GiveawayAttemptAdmin(admin.ModelAdmin):
-    list_display = ('user', 'giveaway', 'status', 'user_proof', 'created_at')
-    list_filter = ('status', 'giveaway', 'created_at')
-    readonly_fields = ('user', 'giveaway', 'user_proof', 'created_at')
+class GiveawayAttemptAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    list_display = ('user', 'giveaway', 'status', 'proof_thumbnail', 'created_at')
+    list_filter = ('status', 'proof_type', 'giveaway', 'created_at')
+    list_select_related = ('user', 'giveaway')
+    readonly_fields = ('user', 'giveaway', 'user_proof', 'proof_type', 'proof_preview', 'created_at')
+    actions = ['bulk_approve_action', 'export_csv_action', 'export_jsonl_action']
+
+    def proof_image(self, obj, max_height, thumbnail):
+        """
+        Photo proofs come from the local cache (proof_media.py) only, so
+        review pages never wait on Telegram; one that isn't downloaded yet
+        (or was evicted) is queued for download and shows a placeholder.
+        An older proof that may be a file_id is queued the same way, which
+        classifies it, and shows as text meanwhile.
+        """
+        from django.urls import reverse
+        from django.utils.html import format_html
+        from .proof_media import cached_path, could_be_photo, schedule_proof_fetch
+        if obj.proof_type != 'photo' and not could_be_photo(obj):
+            return obj.user_proof or "-"
+        if not cached_path(obj.user_proof):
+            schedule_proof_fetch(obj.id, obj.user_proof)
+            return "Photo (downloading, reload shortly)" if obj.proof_type == 'photo' else obj.user_proof
+        full = reverse('admin:attempt-proof', args=[obj.id])
+        src = reverse('admin:attempt-proof-thumbnail', args=[obj.id]) if thumbnail and cached_path(obj.user_proof, thumbnail=True) else full
+        return format_html('<a href="{}" target="_blank"><img src="{}" style="max-height: {}px; max-width: 100%;" loading="lazy"></a>', full, src, max_height)
+
+    def proof_thumbnail(self, obj):
+        return self.proof_image(obj, 60, thumbnail=True)
+
+    proof_thumbnail.short_description = "Proof"
+
+    def proof_preview(self, obj):
+        return self.proof_image(obj, 480, thumbnail=False)
+
+    proof_preview.short_description = "Proof Preview"
+
+    def get_urls(self):
+        from django.urls import path
+        urls = super().get_urls()
+        custom_urls = [
+            path('<int:attempt_id>/proof/', self.admin_site.admin_view(self.proof_view), name='attempt-proof'),
+            path('<int:attempt_id>/proof/thumbnail/', self.admin_site.admin_view(self.proof_view), {'thumbnail': True}, name='attempt-proof-thumbnail'),
+        ]
+        return custom_urls + urls
+
+    def proof_view(self, request, attempt_id, thumbnail=False):
+        from django.core.exceptions import PermissionDenied
+        from django.http import FileResponse, Http404
+        from django.shortcuts import get_object_or_404
+        from .proof_media import cached_path
+        obj = get_object_or_404(GiveawayAttempt.objects.only('id', 'user_proof', 'proof_type'), id=attempt_id)
+        if not self.has_view_permission(request, obj):
+            raise PermissionDenied
+        path = cached_path(obj.user_proof, thumbnail=thumbnail) if obj.proof_type != 'text' and obj.user_proof else None
+        if path is None:
+            raise Http404("Proof is not in the local cache")
+        response = FileResponse(open(path, 'rb'), content_type='image/jpeg')
+        response['Cache-Control'] = 'private, max-age=3600'
+        return response
+
+    @admin.action(description="Export selected attempts (CSV)")
+    def export_csv_action(self, request, queryset):
+        from .exports import attempt_rows, streaming_response
+        return streaming_response(attempt_rows(queryset), 'attempts', 'csv')
+
+    @admin.action(description="Export selected attempts (JSONL)")
+    def export_jsonl_action(self, request, queryset):
+        from .exports import attempt_rows, streaming_response
+        return streaming_response(attempt_rows(queryset), 'attempts', 'jsonl')
+
+    @admin.action(description="Approve selected pending attempts")
+    def bulk_approve_action(self, request, queryset):
+        from .approvals import approve_attempts
+        ids = list(queryset.filter(status='pending').values_list('id', flat=True))
+        if not ids:
+            messages.warning(request, "None of the selected attempts are pending.")
+            return
+        results = approve_attempts(ids)
+        approved = [r for r in results if r['status'] == 'approved']
+        out_of_stock = [str(r['id']) for r in results if r['status'] == 'out_of_stock']
+        if approved:
+            messages.success(request, f"Approved {len(approved)} attempt(s). Messages are being sent in the background.")
+        if out_of_stock:
+            messages.error(request, f"NO ITEMS LEFT for {len(out_of_stock)} attempt(s), left pending: {', '.join(out_of_stock)}")
 
     @db.transaction.atomic
     def save_model(self, request, obj, form, change):
         # Check if status changed to approved
-        if change and 'status' in form.changed_data and obj.status == 'approved':
-            
+        approved = change and 'status' in form.changed_data and obj.status == 'approved'
+        out_of_stock = False
+        if approved:
             # Prepare Message Content
             msg = ""
             if obj.giveaway.approval_template:
                 # Use Template
-                template = obj.giveaway.approval_template.content
-                # Safe Format
                 base_content = ""
                 
                 # UNIQUE GIVEAWAY
@@ -34,20 +170,15 @@ class GiveawayAttemptAdmin(admin.ModelAdmin):
                         base_content = item.content
                         messages.success(request, f"Approved and sent code: {item.content}")
                     else:
+                        out_of_stock = True
                         messages.error(request, "NO ITEMS LEFT! User was NOT sent a code. Status saved as Approved regardless.")
-                        return # Or handle error appropriately
                 else:
                     # STANDARD
                     base_content = obj.giveaway.static_content
                     messages.success(request, "Approved and sent content.")
     
-                try:
-                    msg = template.format(
-                        content=base_content,
-                        name=obj.user.first_name or "Friend"
-                    )
-                except Exception as e:
-                    msg = f"Error formatting template: {e}\nContent: {base_content}"
+                if not out_of_stock:
+                    msg = approval_message(obj.giveaway, obj.user, base_content)
             
             else:
                 # DEFAULT LOGIC (No Template)
@@ -64,10 +195,9 @@ class GiveawayAttemptAdmin(admin.ModelAdmin):
                         msg = f"✅ Congratulations! Your claim has been approved.\nHere is your code:\n{item.content}"
                         messages.success(request, f"Approved and sent code: {item.content}")
                     else:
+                        out_of_stock = True
                         messages.error(request, "NO ITEMS LEFT! User was NOT sent a code. Status saved as Approved regardless.")
                         # Proceeding to save anyway as per previous logic, but skipping send
-                        super().save_model(request, obj, form, change)
-                        return
                 
                 # STANDARD GIVEAWAY
                 elif obj.giveaway.giveaway_type == 'standard':
@@ -85,36 +215,81 @@ class GiveawayAttemptAdmin(admin.ModelAdmin):
                 )
 
         super().save_model(request, obj, form, change)
+        if approved:
+            # Counted once the approval is committed, not when the save fails or rolls back;
+            # an approval without a code is out of stock, as in approve_attempts()
+            counter = 'out_of_stock' if out_of_stock else 'approvals'
+            bot_id, giveaway_id = obj.giveaway.bot_id, obj.giveaway_id
+            db.transaction.on_commit(lambda: metrics.incr(counter, bot_id, giveaway_id))
 
 admin.site.register(TelegramBot)
 
+class BulkMessageForm(forms.Form):
+    """The text of a bulk message; may use {name}, other braces must be doubled"""
+    message_text = forms.CharField(strip=False)
+
+    def clean_message_text(self):
+        # Parsed once here for every recipient
+        try:
+            return compile_template(self.cleaned_data['message_text'])
+        except TemplateError as e:
+            raise forms.ValidationError(str(e))
+
 @admin.register(TelegramUser)
-class TelegramUserAdmin(admin.ModelAdmin):
+class TelegramUserAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ('username', 'first_name', 'chat_id', 'bot', 'send_message_link')
     list_filter = ('bot',)
+    list_select_related = ('bot',)
     search_fields = ('username', 'first_name', 'chat_id')
-    readonly_fields = ('recent_history',)
-    actions = ['send_bulk_message_action']
+    readonly_fields = ('recent_history', 'archived_history_link')
+    actions = ['send_bulk_message_action', 'export_csv_action', 'export_jsonl_action']
+
+    @admin.action(description="Export selected users (CSV)")
+    def export_csv_action(self, request, queryset):
+        from .exports import user_rows, streaming_response
+        return streaming_response(user_rows(queryset), 'users', 'csv')
+
+    @admin.action(description="Export selected users (JSONL)")
+    def export_jsonl_action(self, request, queryset):
+        from .exports import user_rows, streaming_response
+        return streaming_response(user_rows(queryset), 'users', 'jsonl')
 
     def recent_history(self, obj):
-        from django.utils.html import format_html
         logs = obj.logs.all().order_by('-timestamp')[:20]
         if not logs:
             return "No messages yet."
-        
-        html = '<div style="max-height: 300px; overflow-y: auto;"><table style="width: 100%; text-align: left; border-collapse: collapse;">'
-        html += '<thead><tr><th>Time</th><th>Dir</th><th>Message</th></tr></thead><tbody>'
-        for log in logs:
-            color = "#e1f5fe" if log.direction == 'inbound' else "#fff9c4"
-            html += f'<tr style="background: {color}; border-bottom: 1px solid #eee;">'
-            html += f'<td style="padding: 5px; white-space: nowrap;">{log.timestamp.strftime("%H:%M:%S")}</td>'
-            html += f'<td style="padding: 5px;">{"⬅️" if log.direction == "inbound" else "➡️"}</td>'
-            html += f'<td style="padding: 5px;">{log.content}</td></tr>'
-        html += '</tbody></table></div>'
-        return format_html(html)
+        rows = [(log.timestamp.strftime("%H:%M:%S"), log.direction, log.content) for log in logs]
+        return self.history_table(rows)
+
+    def history_table(self, rows):
+        from django.utils.html import format_html, format_html_join
+        body = format_html_join(
+            '',
+            '<tr style="background: {}; border-bottom: 1px solid #eee;">'
+            '<td style="padding: 5px; white-space: nowrap;">{}</td>'
+            '<td style="padding: 5px;">{}</td>'
+            '<td style="padding: 5px;">{}</td></tr>',
+            (
+                ("#e1f5fe" if direction == 'inbound' else "#fff9c4", when, "⬅️" if direction == "inbound" else "➡️", content)
+                for when, direction, content in rows
+            )
+        )
+        return format_html(
+            '<div style="max-height: 300px; overflow-y: auto;"><table style="width: 100%; text-align: left; border-collapse: collapse;">'
+            '<thead><tr><th>Time</th><th>Dir</th><th>Message</th></tr></thead><tbody>{}</tbody></table></div>',
+            body
+        )
 
     recent_history.short_description = "Last 20 Messages"
 
+    def archived_history_link(self, obj):
+        from django.urls import reverse
+        from django.utils.html import format_html
+        url = reverse('admin:archived-history', args=[obj.id])
+        return format_html('<a href="{}">Load archived messages</a>', url)
+
+    archived_history_link.short_description = "Archived Messages"
+
     def send_message_link(self, obj):
         from django.urls import reverse
         from django.utils.html import format_html
@@ -128,6 +303,7 @@ class TelegramUserAdmin(admin.ModelAdmin):
         urls = super().get_urls()
         custom_urls = [
             path('<int:user_id>/send-message/', self.admin_site.admin_view(self.single_message_view), name='send-message'),
+            path('<int:user_id>/archived-history/', self.admin_site.admin_view(self.archived_history_view), name='archived-history'),
         ]
         return custom_urls + urls
 
@@ -136,6 +312,54 @@ class TelegramUserAdmin(admin.ModelAdmin):
         queryset = TelegramUser.objects.filter(id=user_id)
         return self.send_bulk_message_action(request, queryset)
 
+    def archived_history_view(self, request, user_id):
+        """
+        One date range of a user's archive at a time (default: the week up to
+        the newest archived day, at most GIVEAWAY_ARCHIVE_MAX_DAYS = 31),
+        since every archived day of the bot is a file that has to be read.
+        """
+        from datetime import date, timedelta
+        from django.conf import settings
+        from django.core.exceptions import PermissionDenied
+        from django.shortcuts import get_object_or_404
+        from django.template.response import TemplateResponse
+        from django.utils import timezone
+        from .archive import latest_archive_day, load_archived_history
+        user = get_object_or_404(TelegramUser.objects.select_related('bot'), id=user_id)
+        if not self.has_view_permission(request, user):
+            raise PermissionDenied
+        max_days = getattr(settings, 'GIVEAWAY_ARCHIVE_MAX_DAYS', 31)
+        error = None
+        try:
+            until = date.fromisoformat(request.GET['until']) if request.GET.get('until') else None
+            since = date.fromisoformat(request.GET['since']) if request.GET.get('since') else None
+        except ValueError:
+            error = "Dates must look like YYYY-MM-DD."
+            since = until = None
+        until = until or latest_archive_day(user.bot_id) or timezone.localdate()
+        since = since or until - timedelta(days=6)
+        if since > until:
+            since, until = until, since
+        if (until - since).days >= max_days:
+            error = f"Showing the last {max_days} days of that range; pick a shorter one for earlier days."
+            since = until - timedelta(days=max_days - 1)
+
+        records = load_archived_history(user, since, until)
+        span = until - since + timedelta(days=1)
+        context = dict(
+            self.admin_site.each_context(request),
+            title=f"Archived messages for {user}",
+            opts=self.model._meta,
+            original=user,
+            error=error,
+            since=since,
+            until=until,
+            records=[dict(record, timestamp=record['timestamp'][:19].replace('T', ' ')) for record in records],
+            older={'since': (since - span).isoformat(), 'until': (since - timedelta(days=1)).isoformat()},
+            newer={'since': (until + timedelta(days=1)).isoformat(), 'until': (until + span).isoformat()},
+        )
+        return TemplateResponse(request, 'giveaway_engine/admin/archived_history.html', context)
+
     @admin.action(description="Send bulk message to selected users")
     def send_bulk_message_action(self, request, queryset):
         # We'll use a session-based approach to store IDs and redirect to a form
@@ -143,18 +367,16 @@ class TelegramUserAdmin(admin.ModelAdmin):
         from django.http import HttpResponseRedirect
         from django.urls import reverse
         
-        if 'apply' in request.POST:
-            msg_text = request.POST.get('message_text')
-            if not msg_text:
-                 messages.error(request, "Please enter a message.")
-                 return
-            
+        form = BulkMessageForm(request.POST if 'apply' in request.POST else None)
+        if form.is_valid():
+            users = list(queryset.select_related('bot'))
+            texts = render_many(form.cleaned_data['message_text'], [{'name': user.first_name or "Friend"} for user in users])
             count = 0
-            for user in queryset:
+            for user, text in zip(users, texts):
                 success = send_telegram_message(
                     user.bot.token, 
                     user.chat_id, 
-                    msg_text,
+                    text,
                     bot=user.bot,
                     user=user
                 )
@@ -166,13 +388,25 @@ class TelegramUserAdmin(admin.ModelAdmin):
                 return HttpResponseRedirect(reverse('admin:giveaway_engine_telegramuser_change', args=[queryset.first().id]))
             return HttpResponseRedirect(reverse('admin:giveaway_engine_telegramuser_changelist'))
 
-        return render(request, 'giveaway_engine/admin/send_message_form.html', context={'users': queryset})
+        return render(request, 'giveaway_engine/admin/send_message_form.html', context={'users': queryset, 'form': form})
 
 @admin.register(UserAnswer)
-class UserAnswerAdmin(admin.ModelAdmin):
-    list_display = ('user', 'question', 'answer', 'answered_at')
-    list_filter = ('question__giveaway', 'answered_at')
+class UserAnswerAdmin(ReplicaReadsAdminMixin, FullTextSearchMixin, LargeTableAdminMixin, admin.ModelAdmin):
+    list_display = ('user', 'question', 'answer', 'answered_at', 'superseded')
+    list_filter = ('question__giveaway', 'answered_at', 'superseded')
+    list_select_related = ('user', 'question__giveaway')
     search_fields = ('user__username', 'answer')
+    actions = ['export_pivot_csv_action']
+
+    @admin.action(description="Export selected answers, one row per user (CSV)")
+    def export_pivot_csv_action(self, request, queryset):
+        from .exports import answer_rows, streaming_response
+        giveaway_ids = list(queryset.order_by().values_list('question__giveaway', flat=True).distinct()[:2])
+        if len(giveaway_ids) != 1:
+            messages.error(request, "Please filter the answers to a single giveaway before exporting.")
+            return
+        giveaway = Giveaway.objects.get(id=giveaway_ids[0])
+        return streaming_response(answer_rows(giveaway, queryset), f'answers-giveaway-{giveaway.id}', 'csv')
 
 class QuestionnaireInline(admin.TabularInline):
     model = Questionnaire
@@ -185,17 +419,188 @@ class GiveawayAdmin(admin.ModelAdmin):
     list_display_links = ('title',)
     list_editable = ('sequence', 'is_active')
     list_filter = ('bot', 'giveaway_type', 'requirement_type')
+    list_select_related = ('bot', 'failure_template__bot', 'prompt_template__bot', 'success_template__bot')
 
 @admin.register(MessageLog)
-class MessageLogAdmin(admin.ModelAdmin):
+class MessageLogAdmin(ReplicaReadsAdminMixin, FullTextSearchMixin, LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ('timestamp', 'user', 'bot', 'direction', 'content_snippet')
     list_filter = ('direction', 'bot', 'timestamp')
+    list_select_related = ('user', 'bot')
     search_fields = ('user__username', 'content')
     readonly_fields = ('user', 'bot', 'direction', 'content', 'timestamp')
 
     def content_snippet(self, obj):
         return obj.content[:50] + "..." if len(obj.content) > 50 else obj.content
 
-admin.site.register(GiveawayItem)
+@admin.register(UpdateProfile)
+class UpdateProfileAdmin(admin.ModelAdmin):
+    list_display = ('created_at', 'bot', 'chat_id', 'reason', 'duration_ms', 'query_count', 'telegram_call_count', 'download_links')
+    list_filter = ('reason', 'bot')
+    list_select_related = ('bot',)
+    readonly_fields = ('bot', 'chat_id', 'reason', 'duration_ms', 'query_count', 'telegram_call_count', 'created_at', 'telegram_calls_table', 'queries_table', 'stats_text', 'download_links')
+    exclude = ('queries', 'telegram_calls', 'stats_data')
+
+    def has_add_permission(self, request):
+        return False
+
+    def download_links(self, obj):
+        from django.urls import reverse
+        from django.utils.html import format_html
+        json_url = reverse('admin:update-profile-download', args=[obj.id, 'json'])
+        if not obj.stats_data:
+            return format_html('<a href="{}">JSON</a>', json_url)
+        prof_url = reverse('admin:update-profile-download', args=[obj.id, 'prof'])
+        return format_html('<a href="{}">JSON</a> | <a href="{}">.prof</a>', json_url, prof_url)
+
+    download_links.short_description = "Download"
+
+    def _timings_table(self, rows, label_key):
+        from django.utils.html import format_html, format_html_join
+        if not rows:
+            return "None recorded."
+        body = format_html_join(
+            '', '<tr><td style="padding: 3px; white-space: nowrap;">{} ms</td><td style="padding: 3px;">{}</td></tr>',
+            ((row['duration_ms'], row[label_key]) for row in rows)
+        )
+        return format_html('<table style="width: 100%;"><tbody>{}</tbody></table>', body)
+
+    def queries_table(self, obj):
+        import json
+        rows = json.loads(obj.queries or '[]')
+        for row in rows:
+            if row.get('db', 'default') != 'default':
+                row['sql'] = f"[{row['db']}] {row['sql']}"
+        return self._timings_table(rows, 'sql')
+
+    queries_table.short_description = "SQL Queries"
+
+    def telegram_calls_table(self, obj):
+        import json
+        return self._timings_table(json.loads(obj.telegram_calls or '[]'), 'method')
+
+    telegram_calls_table.short_description = "Telegram Calls"
+
+    def get_urls(self):
+        from django.urls import path
+        urls = super().get_urls()
+        custom_urls = [
+            path('<int:profile_id>/download/<str:fmt>/', self.admin_site.admin_view(self.download_view), name='update-profile-download'),
+        ]
+        return custom_urls + urls
+
+    def download_view(self, request, profile_id, fmt):
+        import json
+        from django.http import HttpResponse, Http404
+        from django.shortcuts import get_object_or_404
+        obj = get_object_or_404(UpdateProfile, id=profile_id)
+        if fmt == 'prof' and obj.stats_data:
+            response = HttpResponse(bytes(obj.stats_data), content_type='application/octet-stream')
+        elif fmt == 'json':
+            payload = {
+                'bot': obj.bot_id,
+                'chat_id': obj.chat_id,
+                'reason': obj.reason,
+                'duration_ms': obj.duration_ms,
+                'created_at': obj.created_at.isoformat(),
+                'queries': json.loads(obj.queries or '[]'),
+                'telegram_calls': json.loads(obj.telegram_calls or '[]'),
+                'stats_text': obj.stats_text,
+            }
+            response = HttpResponse(json.dumps(payload, indent=2), content_type='application/json')
+        else:
+            raise Http404("Unknown download format")
+        response['Content-Disposition'] = f'attachment; filename="update-profile-{obj.id}.{fmt}"'
+        return response
+
+@admin.register(FunnelRollup)
+class FunnelRollupAdmin(ReplicaReadsAdminMixin, admin.ModelAdmin):
+    """Campaign dashboard: reads only the hourly rollup rows, never the raw tables"""
+    list_display = ('hour', 'bot', 'giveaway') + metrics.FUNNEL_COUNTERS
+    list_filter = ('hour', 'bot', 'giveaway')
+    list_select_related = ('bot', 'giveaway')
+    change_list_template = 'giveaway_engine/admin/funnel_change_list.html'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def changelist_view(self, request, extra_context=None):
+        metrics.flush()
+        return super().changelist_view(request, extra_context)
+
+    def add_report_context(self, context, cl):
+        from django.db.models import Sum
+        totals = cl.queryset.aggregate(**{counter: Sum(counter) for counter in metrics.FUNNEL_COUNTERS})
+        context['funnel_totals'] = [
+            (counter.replace('_', ' ').capitalize(), totals[counter] or 0) for counter in metrics.FUNNEL_COUNTERS
+        ]
+
+@admin.register(QuestionAnswerStat)
+class QuestionAnswerStatAdmin(ReplicaReadsAdminMixin, admin.ModelAdmin):
+    """Answer distribution per question, maintained on insert (see questionnaire.py)"""
+    list_display = ('question', 'normalized_answer', 'count', 'sample_answer', 'updated_at')
+    list_filter = ('question__giveaway', 'question')
+    list_select_related = ('question__giveaway',)
+    search_fields = ('normalized_answer',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+@admin.register(QuestionnaireProgress)
+class QuestionnaireProgressAdmin(ReplicaReadsAdminMixin, admin.ModelAdmin):
+    """Completion funnel and time to complete, from one row per user and giveaway"""
+    list_display = ('user', 'giveaway', 'answered_count', 'question_count', 'started_at', 'completed_at', 'time_to_complete', 'retakes')
+    list_filter = ('giveaway', 'completed_at')
+    list_select_related = ('user', 'giveaway')
+    change_list_template = 'giveaway_engine/admin/questionnaire_change_list.html'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def add_report_context(self, context, cl):
+        from django.db.models import Avg, Count, DurationField, ExpressionWrapper, F
+        queryset = cl.queryset.order_by()
+        by_count = dict(queryset.values_list('answered_count').annotate(n=Count('id')))
+        started = sum(by_count.values())
+        funnel = [("Started", started)]
+        reached = started
+        for answered in range(1, max(by_count, default=0) + 1):
+            reached -= by_count.get(answered - 1, 0)
+            funnel.append((f"Answered {answered}", reached))
+        completed = queryset.filter(completed_at__isnull=False, started_at__isnull=False)
+        funnel.append(("Completed", completed.count()))
+        average = completed.aggregate(avg=Avg(ExpressionWrapper(F('completed_at') - F('started_at'), output_field=DurationField())))['avg']
+        context['questionnaire_funnel'] = funnel
+        context['average_time_to_complete'] = average
+
+@admin.register(OverloadEvent)
+class OverloadEventAdmin(ReplicaReadsAdminMixin, admin.ModelAdmin):
+    list_display = ('created_at', 'worker', 'from_level', 'to_level', 'reason', 'latency_ms', 'lag_seconds')
+    list_filter = ('to_level', 'created_at')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+@admin.register(GiveawayItem)
+class GiveawayItemAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'giveaway', 'is_used', 'claimed_by')
+    list_filter = ('is_used', 'giveaway')
+    list_select_related = ('giveaway', 'claimed_by')
+
+@admin.register(MessageTemplate)
+class MessageTemplateAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'bot', 'version')
+    list_select_related = ('bot',)
+
 admin.site.register(NewsUpdate)
-admin.site.register(MessageTemplate)
@@ -0,0 +1,109 @@
+import logging
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import F
+
+from . import metrics
+from .models import GiveawayAttempt, GiveawayItem
+from .rendering import render
+from .utils import send_messages_in_background
+
+logger = logging.getLogger(__name__)
+
+
+def approval_message(giveaway, user, content):
+    """
+    Builds the message sent when a claim is approved, using the giveaway's
+    approval template when it has one.
+    """
+    if giveaway.giveaway_type == 'unique':
+        default = f"✅ Congratulations! Your claim has been approved.\nHere is your code:\n{content}"
+    else:
+        default = f"✅ Congratulations! Your claim has been approved.\n{content}"
+    return render(giveaway.approval_template, default=default, content=content, name=user.first_name or "Friend")
+
+
+def approve_attempts(attempt_ids):
+    """
+    Approves pending attempts in bulk.
+    Per giveaway: locks one batch of free items for all its attempts, assigns
+    them with one bulk update and flips the statuses with one update. The
+    approval messages are sent by the background pool after commit.
+
+    Returns one result dict per requested id:
+    {'id': ..., 'status': 'approved' | 'out_of_stock' | 'not_pending' | 'not_found', 'content': ...}
+    """
+    attempt_ids = [int(pk) for pk in attempt_ids]
+    results = {pk: {'id': pk, 'status': 'not_found', 'content': None} for pk in attempt_ids}
+    jobs = []
+    scheduled = []
+    counted = []  # funnel counters, only incremented once the approvals are committed
+
+    with transaction.atomic():
+        locked = GiveawayAttempt.objects.filter(id__in=attempt_ids)
+        if connection.features.has_select_for_update:
+            locked = locked.select_for_update(**({'of': ('self',)} if connection.features.has_select_for_update_of else {}))
+        attempts = list(locked.select_related('giveaway__bot', 'giveaway__approval_template', 'user').order_by('id'))
+
+        by_giveaway = {}
+        for attempt in attempts:
+            if attempt.status != 'pending':
+                results[attempt.id]['status'] = 'not_pending'
+                continue
+            by_giveaway.setdefault(attempt.giveaway_id, []).append(attempt)
+
+        for group in by_giveaway.values():
+            giveaway = group[0].giveaway
+            approved = []
+            if giveaway.giveaway_type == 'unique':
+                items = GiveawayItem.objects.filter(giveaway=giveaway, is_used=False).order_by('id')
+                if connection.features.has_select_for_update_skip_locked:
+                    items = items.select_for_update(skip_locked=True)
+                items = list(items[:len(group)])
+                for attempt, item in zip(group, items):
+                    item.is_used = True
+                    item.claimed_by = attempt.user
+                    approved.append((attempt, item.content))
+                GiveawayItem.objects.bulk_update(items, ['is_used', 'claimed_by'])
+                for attempt in group[len(items):]:
+                    results[attempt.id]['status'] = 'out_of_stock'
+                    counted.append(('out_of_stock', giveaway, 1))
+            else:
+                approved = [(attempt, giveaway.static_content) for attempt in group]
+
+            if not approved:
+                continue
+
+            update = {'status': 'approved'}
+            if giveaway.follow_up_text:
+                update['follow_up_due_at'] = F('created_at') + timedelta(seconds=giveaway.follow_up_delay_seconds)
+            GiveawayAttempt.objects.filter(id__in=[attempt.id for attempt, _ in approved]).update(**update)
+            counted.append(('approvals', giveaway, len(approved)))
+
+            for attempt, content in approved:
+                results[attempt.id].update(status='approved', content=content)
+                jobs.append((giveaway.bot, attempt.user, approval_message(giveaway, attempt.user, content), None))
+                if giveaway.follow_up_text:
+                    scheduled.append((attempt.id, attempt.created_at + timedelta(seconds=giveaway.follow_up_delay_seconds)))
+
+        approved_user_ids = [attempt.user_id for attempt in attempts if results[attempt.id]['status'] == 'approved']
+        transaction.on_commit(lambda: _after_commit(jobs, scheduled, approved_user_ids, counted))
+
+    counts = {}
+    for result in results.values():
+        counts[result['status']] = counts.get(result['status'], 0) + 1
+    logger.info(f"Bulk approval of {len(attempt_ids)} attempt(s): {counts}")
+    return [results[pk] for pk in attempt_ids]
+
+
+def _after_commit(jobs, scheduled, user_ids, counted):
+    # .update() skips post_save, so tell the follow-up scheduler and the progress cache directly
+    from .progress import refresh_progress
+    from .scheduler import announce_follow_up
+    for name, giveaway, amount in counted:
+        metrics.incr(name, giveaway.bot_id, giveaway.id, amount=amount)
+    refresh_progress(user_ids)
+    for attempt_id, due_at in scheduled:
+        announce_follow_up(attempt_id, due_at)
+    send_messages_in_background(jobs)
@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class GiveawayEngineConfig(AppConfig):
+    name = 'giveaway_engine'
+    default_auto_field = 'django.db.models.BigAutoField'
+
+    def ready(self):
+        # Connect model signal handlers
+        from . import signals  # noqa: F401
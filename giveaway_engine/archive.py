@@ -0,0 +1,111 @@
+import gzip
+import json
+import logging
+import os
+from datetime import date, timedelta
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_FIELDS = ('id', 'user_id', 'bot_id', 'content', 'direction', 'timestamp')
+
+
+def get_archive_dir():
+    return getattr(settings, 'GIVEAWAY_ARCHIVE_DIR', 'message_archive')
+
+
+def partition_path(bot_id, day, archive_dir=None):
+    """
+    Archives are partitioned by bot and day:
+    <archive_dir>/bot_<bot_id>/<YYYY-MM-DD>.jsonl.gz
+    """
+    return os.path.join(archive_dir or get_archive_dir(), f"bot_{bot_id}", f"{day.isoformat()}.jsonl.gz")
+
+
+def _write_partitions(rows, archive_dir):
+    by_path = {}
+    for row in rows:
+        path = partition_path(row['bot_id'], row['timestamp'].date(), archive_dir)
+        record = dict(row, timestamp=row['timestamp'].isoformat())
+        by_path.setdefault(path, []).append(json.dumps(record, ensure_ascii=False))
+
+    for path, lines in by_path.items():
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Appending adds a new gzip member; gzip readers treat them as one stream
+        with gzip.open(path, 'at', encoding='utf-8') as fh:
+            fh.write("\n".join(lines) + "\n")
+            fh.flush()
+            os.fsync(fh.fileno())
+
+
+def archive_message_logs(bot, cutoff, batch_size=1000, archive_dir=None, dry_run=False):
+    """
+    Moves MessageLog rows of a bot older than cutoff into the archive.
+    Walks the table by primary key (keyset iteration) and deletes each batch
+    right after it is written, so no statement touches more than batch_size
+    rows. Returns the number of archived rows.
+    """
+    from .models import MessageLog
+
+    archive_dir = archive_dir or get_archive_dir()
+    last_id = 0
+    total = 0
+    while True:
+        rows = list(
+            MessageLog.objects.filter(bot=bot, timestamp__lt=cutoff, id__gt=last_id)
+            .order_by('id')
+            .values(*ARCHIVE_FIELDS)[:batch_size]
+        )
+        if not rows:
+            break
+        last_id = rows[-1]['id']
+        total += len(rows)
+        if dry_run:
+            continue
+        _write_partitions(rows, archive_dir)
+        MessageLog.objects.filter(id__in=[row['id'] for row in rows]).delete()
+    if total:
+        logger.info(f"Archived {total} message log(s) for bot {bot.username}")
+    return total
+
+
+def latest_archive_day(bot_id, archive_dir=None):
+    """Newest day with an archive partition for the bot, or None; only lists file names"""
+    bot_dir = os.path.join(archive_dir or get_archive_dir(), f"bot_{bot_id}")
+    if not os.path.isdir(bot_dir):
+        return None
+    days = []
+    for filename in os.listdir(bot_dir):
+        if filename.endswith('.jsonl.gz'):
+            try:
+                days.append(date.fromisoformat(filename[:-len('.jsonl.gz')]))
+            except ValueError:
+                continue
+    return max(days, default=None)
+
+
+def load_archived_history(user, since, until, archive_dir=None):
+    """
+    Reads archived messages of one user between two dates (inclusive),
+    newest first. Partitions are per bot and day, so every day in the range
+    is a file read in full: keep the range short.
+    """
+    seen = set()
+    history = []
+    day = until
+    while day >= since:
+        path = partition_path(user.bot_id, day, archive_dir)
+        day -= timedelta(days=1)
+        if not os.path.exists(path):
+            continue
+        with gzip.open(path, 'rt', encoding='utf-8') as fh:
+            for line in fh:
+                record = json.loads(line)
+                # A batch may be written twice if a run died before deleting it
+                if record['user_id'] != user.id or record['id'] in seen:
+                    continue
+                seen.add(record['id'])
+                history.append(record)
+    history.sort(key=lambda record: record['timestamp'], reverse=True)
+    return history
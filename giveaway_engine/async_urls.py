@@ -0,0 +1,9 @@
+from django.urls import path
+from .async_views import telegram_webhook_async
+from .views import BulkApproveAttemptsView
+
+# Same routes as urls.py with the async webhook; include this one instead under ASGI
+urlpatterns = [
+    path('webhook/<str:token>/', telegram_webhook_async, name='telegram_webhook'),
+    path('attempts/bulk-approve/', BulkApproveAttemptsView.as_view(), name='bulk_approve_attempts'),
+]
@@ -0,0 +1,166 @@
+import asyncio
+import json
+import logging
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.http import Http404, HttpResponse, HttpResponseBadRequest, HttpResponseNotAllowed
+
+from .bot_table import get_bot, peek_bot
+from .models import MessageLog
+from .profiling import record_telegram_call
+from .utils import deferred_sends, telegram_api_url, telegram_request
+
+logger = logging.getLogger(__name__)
+
+_handler_pool = None
+_clients = weakref.WeakKeyDictionary()  # event loop -> httpx.AsyncClient
+
+
+def _async_orm(obj, name):
+    """obj.a<name> (Django 4.1+ async ORM), else the sync method through sync_to_async"""
+    method = getattr(obj, f"a{name}", None)
+    return method if method is not None else sync_to_async(getattr(obj, name))
+
+
+def get_handler_pool():
+    """
+    Threads running the conversation logic of async webhooks
+    (GIVEAWAY_ASYNC_HANDLER_THREADS, default 32). A thread is held for the
+    database part of an update only, not while its replies are sent.
+    """
+    global _handler_pool
+    if _handler_pool is None:
+        workers = getattr(settings, 'GIVEAWAY_ASYNC_HANDLER_THREADS', 32)
+        _handler_pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='giveaway-async-handler')
+    return _handler_pool
+
+
+def get_async_client():
+    """The running loop's shared httpx.AsyncClient, or None when httpx isn't installed"""
+    try:
+        import httpx
+    except ImportError:
+        return None
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        limits = httpx.Limits(max_connections=getattr(settings, 'GIVEAWAY_ASYNC_MAX_CONNECTIONS', 100))
+        client = _clients[loop] = httpx.AsyncClient(limits=limits)
+    return client
+
+
+def _decode(response):
+    try:
+        return response.json()
+    except ValueError:
+        return {"ok": False, "description": response.text}
+
+
+async def telegram_request_async(bot_token, method, payload=None, timeout=10, recorder=None):
+    """
+    Async counterpart of utils.telegram_request; returns (status code, decoded body).
+    Uses httpx (pip install giveaway_engine[async]); without it requests runs
+    on the loop's default executor. The event loop isn't the thread of the
+    update, so a profiling recorder has to be passed in.
+    """
+    client = get_async_client()
+    started = time.perf_counter()
+    ok = False
+    try:
+        if client is None:
+            loop = asyncio.get_running_loop()
+            response = await loop.run_in_executor(None, lambda: telegram_request(bot_token, method, payload, timeout=timeout))
+            ok = response.ok
+            return response.status_code, _decode(response)
+        response = await client.post(f"{telegram_api_url()}/bot{bot_token}/{method}", json=payload or {}, timeout=timeout)
+        ok = response.is_success
+        return response.status_code, _decode(response)
+    finally:
+        record_telegram_call(method, (time.perf_counter() - started) * 1000, ok, recorder=recorder)
+
+
+async def send_message_async(bot_token, payload, bot=None, user=None, recorder=None):
+    """Sends a message held back by deferred_sends, with the same logging and block detection as send_telegram_message"""
+    if user and user.is_blocked:
+        logger.info(f"Skipping message to blocked user {user.chat_id}")
+        return None
+    try:
+        status, result = await telegram_request_async(bot_token, "sendMessage", payload, recorder=recorder)
+    except Exception as e:
+        logger.error(f"Failed to send Telegram message: {e}")
+        return None
+    if status == 403:
+        if user:
+            from . import metrics
+            user.is_blocked = True
+            await _async_orm(user, 'save')(update_fields=['is_blocked'])
+            await sync_to_async(metrics.incr)('blocked', user.bot_id)
+            logger.warning(f"User {user.chat_id} blocked the bot. marked as blocked.")
+        return None
+    if status >= 400:
+        logger.error(f"Failed to send Telegram message: HTTP {status} | Body: {result}")
+        return None
+    if bot and user:
+        await _async_orm(MessageLog.objects, 'create')(user=user, bot=bot, content=payload['text'], direction='outbound')
+    return result
+
+
+def _run_update(bot, data):
+    """Handles the update on a pool thread and returns the replies it wanted to send"""
+    from .views import handle_update
+    try:
+        with deferred_sends() as sends:
+            handle_update(bot, data)
+        return sends
+    finally:
+        close_old_connections()
+
+
+def _after_sends(sends):
+    try:
+        for callback in sends.after_sends:
+            callback()
+    finally:
+        close_old_connections()
+
+
+async def telegram_webhook_async(request, token):
+    """
+    Async variant of TelegramWebhookView for ASGI deployments. The
+    conversation logic runs on the handler pool with its replies held back,
+    and the replies are then sent in order with the async client, so
+    waiting on the Bot API costs no thread.
+    """
+    if request.method != 'POST':
+        return HttpResponseNotAllowed(['POST'])
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError:
+        return HttpResponseBadRequest()
+    # The routing table answers without a query almost always
+    bot = peek_bot(token) or await sync_to_async(get_bot)(token)
+    if bot is None:
+        raise Http404
+
+    loop = asyncio.get_running_loop()
+    sends = await loop.run_in_executor(get_handler_pool(), _run_update, bot, data)
+    blocked = set()
+    for bot_token, payload, message_bot, user in sends:
+        # A 403 marks the user blocked on one instance; the rest of the replies to that chat are dropped too
+        if payload['chat_id'] in blocked:
+            continue
+        await send_message_async(bot_token, payload, bot=message_bot, user=user, recorder=sends.recorder)
+        if user is not None and user.is_blocked:
+            blocked.add(payload['chat_id'])
+    if sends.after_sends:
+        await loop.run_in_executor(get_handler_pool(), _after_sends, sends)
+    return HttpResponse(status=200)
+
+
+# csrf_exempt() wraps views in a sync function before Django 5.0
+telegram_webhook_async.csrf_exempt = True
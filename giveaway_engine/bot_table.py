@@ -0,0 +1,79 @@
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import SynchronousOnlyOperation
+
+from .models import TelegramBot
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = "bot_table_version"
+
+_table = {}  # token -> active TelegramBot
+_loaded_at = None
+_version = None  # VERSION_KEY when the table was loaded
+
+
+def load_bot_table():
+    """Reloads every active bot into the routing table; returns how many there are"""
+    global _table, _loaded_at, _version
+    # Read before the bots: a change committed meanwhile makes the next check reload again
+    version = cache.get(VERSION_KEY)
+    _table = {bot.token: bot for bot in TelegramBot.objects.filter(is_active=True)}
+    _loaded_at = time.monotonic()
+    _version = version
+    return len(_table)
+
+
+def invalidate_bot_table():
+    """Makes this process reload its table on the next lookup"""
+    global _loaded_at
+    _loaded_at = None
+
+
+def bot_table_changed():
+    """A bot was saved or deleted: every process reloads its table on its next lookup"""
+    invalidate_bot_table()
+    cache.set(VERSION_KEY, time.time_ns(), timeout=None)
+
+
+def is_fresh():
+    if _loaded_at is None or time.monotonic() - _loaded_at >= getattr(settings, 'GIVEAWAY_BOT_TABLE_SECONDS', 60):
+        return False
+    return cache.get(VERSION_KEY) == _version
+
+
+def peek_bot(token):
+    """The bot for a token if the table is loaded and fresh, without touching the database"""
+    try:
+        return _table.get(token) if is_fresh() else None
+    except SynchronousOnlyOperation:
+        # A database cache backend can't be read from the event loop
+        return None
+
+
+def active_bots():
+    if not is_fresh():
+        load_bot_table()
+    return list(_table.values())
+
+
+def get_bot(token):
+    """
+    Active bot for a webhook token, from an in-process table instead of a
+    query per update. The table is reloaded every GIVEAWAY_BOT_TABLE_SECONDS
+    (default 60), and in every process once a bot save or delete is
+    committed (one cache read per lookup checks for that). A token it
+    doesn't know yet is looked up directly.
+    Returns None for unknown or inactive bots.
+    """
+    if not is_fresh():
+        load_bot_table()
+    bot = _table.get(token)
+    if bot is None:
+        bot = TelegramBot.objects.filter(token=token, is_active=True).first()
+        if bot is not None:
+            _table[token] = bot
+    return bot
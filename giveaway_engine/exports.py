@@ -0,0 +1,88 @@
+import csv
+import json
+from itertools import groupby
+
+from .models import GiveawayAttempt, Questionnaire, TelegramUser, UserAnswer
+
+CHUNK_SIZE = 2000
+
+
+class Echo:
+    """File-like object whose write() just returns the value, for streaming csv.writer output"""
+    def write(self, value):
+        return value
+
+
+def _value(value):
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+def user_rows(queryset=None):
+    queryset = TelegramUser.objects.all() if queryset is None else queryset
+    columns = ['id', 'bot__username', 'chat_id', 'username', 'first_name', 'phone_number', 'is_blocked', 'joined_at']
+    yield columns
+    for row in queryset.order_by('id').values_list(*columns).iterator(chunk_size=CHUNK_SIZE):
+        yield [_value(value) for value in row]
+
+
+def attempt_rows(queryset=None):
+    queryset = GiveawayAttempt.objects.all() if queryset is None else queryset
+    columns = ['id', 'giveaway__bot__username', 'giveaway__sequence', 'giveaway__title', 'user__chat_id',
+               'user__username', 'user__phone_number', 'status', 'user_proof', 'created_at', 'follow_up_sent']
+    yield columns
+    for row in queryset.order_by('id').values_list(*columns).iterator(chunk_size=CHUNK_SIZE):
+        yield [_value(value) for value in row]
+
+
+def answer_rows(giveaway, queryset=None):
+    """
+    Questionnaire answers of one giveaway pivoted to one row per user with a
+    column per question. Streams answers ordered by user, so only one user's
+    answers are in memory at a time.
+    """
+    queryset = UserAnswer.objects.all() if queryset is None else queryset
+    questions = list(Questionnaire.objects.filter(giveaway=giveaway).order_by('order', 'id').values_list('id', 'text'))
+    question_ids = [question_id for question_id, _ in questions]
+    yield ['user_id', 'chat_id', 'username', 'first_name', 'phone_number'] + [text for _, text in questions] + ['last_answered_at']
+
+    answers = queryset.filter(question__giveaway=giveaway, superseded=False).order_by('user_id', 'answered_at').values_list(
+        'user_id', 'user__chat_id', 'user__username', 'user__first_name', 'user__phone_number',
+        'question_id', 'answer', 'answered_at',
+    ).iterator(chunk_size=CHUNK_SIZE)
+    for user_id, rows in groupby(answers, key=lambda row: row[0]):
+        by_question = {}
+        last_answered = None
+        for row in rows:
+            user_fields = row[:5]
+            by_question[row[5]] = row[6]  # the newest answer wins if a question was answered twice
+            last_answered = row[7]
+        yield list(user_fields) + [by_question.get(question_id, '') for question_id in question_ids] + [_value(last_answered)]
+
+
+def as_csv(rows):
+    writer = csv.writer(Echo())
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def as_jsonl(rows):
+    rows = iter(rows)
+    header = next(rows)
+    for row in rows:
+        yield json.dumps(dict(zip(header, row)), ensure_ascii=False) + "\n"
+
+
+FORMATS = {
+    'csv': (as_csv, 'text/csv'),
+    'jsonl': (as_jsonl, 'application/x-ndjson'),
+}
+
+
+def streaming_response(rows, filename, fmt='csv'):
+    from django.http import StreamingHttpResponse
+    encoder, content_type = FORMATS[fmt]
+    response = StreamingHttpResponse(encoder(rows), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{fmt}"'
+    return response
@@ -0,0 +1,45 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+from giveaway_engine.models import TelegramBot
+from giveaway_engine.archive import archive_message_logs, get_archive_dir
+
+class Command(BaseCommand):
+    help = 'Moves old MessageLog rows into compressed, date-partitioned JSONL archives'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help="Archive rows older than this many days (overrides each bot's retention)")
+        parser.add_argument('--bot', help='Only archive this bot (id or username)')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows written and deleted per batch')
+        parser.add_argument('--archive-dir', help='Target directory (default: GIVEAWAY_ARCHIVE_DIR setting)')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the rows that would be archived')
+
+    def handle(self, *args, **options):
+        bots = TelegramBot.objects.all()
+        if options['bot']:
+            lookup = Q(username=options['bot'])
+            if options['bot'].isdigit():
+                lookup |= Q(id=int(options['bot']))
+            bots = bots.filter(lookup)
+
+        archive_dir = options['archive_dir'] or get_archive_dir()
+        now = timezone.now()
+        total = 0
+        for bot in bots:
+            days = options['days'] if options['days'] is not None else bot.message_log_retention_days
+            if days is None:
+                continue
+            cutoff = now - timedelta(days=days)
+            count = archive_message_logs(
+                bot,
+                cutoff,
+                batch_size=options['batch_size'],
+                archive_dir=archive_dir,
+                dry_run=options['dry_run'],
+            )
+            verb = "Would archive" if options['dry_run'] else "Archived"
+            self.stdout.write(f"{bot.username}: {verb} {count} message(s) older than {days} day(s)")
+            total += count
+
+        self.stdout.write(self.style.SUCCESS(f"Done. {total} message(s) total ({archive_dir})."))
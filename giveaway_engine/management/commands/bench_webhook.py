@@ -0,0 +1,150 @@
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from django.test import AsyncRequestFactory, RequestFactory, override_settings
+
+from giveaway_engine.async_views import get_async_client, telegram_webhook_async
+from giveaway_engine.models import TelegramBot, TelegramUser
+from giveaway_engine.tests.stub_api import StubBotAPI
+from giveaway_engine.views import TelegramWebhookView
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0
+
+
+class InFlight:
+    """Counts requests in progress and remembers the most at once"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.current = self.peak = 0
+
+    def __enter__(self):
+        with self.lock:
+            self.current += 1
+            self.peak = max(self.peak, self.current)
+
+    def __exit__(self, *exc):
+        with self.lock:
+            self.current -= 1
+
+
+class Command(BaseCommand):
+    help = 'Compares the sync and async webhook views against the stub Bot API'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bot', help='Bot to run updates for (id or username); defaults to the first active bot')
+        parser.add_argument('--chats', type=int, default=200, help='Simulated chats; each sends the script once')
+        parser.add_argument('--script', default='/start', help='Comma separated messages every chat sends in order (claims use up stock)')
+        parser.add_argument('--concurrency', type=int, default=50, help='Chats in flight (sync: server threads)')
+        parser.add_argument('--latency', type=float, default=0.05, help='Stub Bot API round trip in seconds')
+        parser.add_argument('--mode', choices=['sync', 'async', 'both'], default='both')
+        parser.add_argument('--keep', action='store_true', help='Keep the simulated users instead of deleting them afterwards')
+
+    def handle(self, *args, **options):
+        bots = TelegramBot.objects.filter(is_active=True)
+        if options['bot']:
+            value = options['bot']
+            bots = bots.filter(id=int(value)) if value.isdigit() else bots.filter(username=value)
+        bot = bots.order_by('id').first()
+        if bot is None:
+            raise CommandError('No matching active bot')
+
+        script = [text.strip() for text in options['script'].split(',') if text.strip()]
+        modes = ['sync', 'async'] if options['mode'] == 'both' else [options['mode']]
+        chat_ids = []
+        self.stdout.write(f"{options['chats']} chats x {len(script)} update(s), concurrency {options['concurrency']}, Bot API latency {options['latency'] * 1000:.0f}ms")
+
+        try:
+            # Overload protection off: its level would carry over from one mode into the next
+            with StubBotAPI(latency=options['latency']) as stub, \
+                    override_settings(GIVEAWAY_TELEGRAM_API_URL=stub.url, GIVEAWAY_OVERLOAD={'enabled': False}):
+                for index, mode in enumerate(modes):
+                    # Fresh chats per mode so both do the same work
+                    chats = [9_000_000_000 + index * 1_000_000 + n for n in range(options['chats'])]
+                    chat_ids.extend(str(chat) for chat in chats)
+                    sent_before = len(stub.sent_messages(bot.token))
+                    runner = self.run_sync if mode == 'sync' else self.run_async
+                    elapsed, latencies, peak, threads = runner(bot, chats, script, options['concurrency'])
+                    self.report(mode, elapsed, latencies, peak, threads, len(stub.sent_messages(bot.token)) - sent_before)
+        finally:
+            if not options['keep'] and chat_ids:
+                deleted, _ = TelegramUser.objects.filter(bot=bot, chat_id__in=chat_ids).delete()
+                self.stdout.write(f"Deleted {deleted} simulated row(s)")
+
+    def report(self, mode, elapsed, latencies, peak, threads, sent):
+        label = mode
+        if mode == 'async':
+            label += ' (httpx)' if self.has_httpx else ' (requests on executor, install httpx)'
+        self.stdout.write(
+            f"{label}: {len(latencies)} updates in {elapsed:.2f}s = {len(latencies) / elapsed:.0f}/s, "
+            f"p50 {percentile(latencies, 0.5) * 1000:.0f}ms, p95 {percentile(latencies, 0.95) * 1000:.0f}ms, "
+            f"{sent} messages sent, peak {peak} in flight on {threads} handler threads"
+        )
+
+    def update(self, chat, text, update_id):
+        return {
+            "update_id": update_id,
+            "message": {
+                "message_id": update_id, "date": int(time.time()), "text": text,
+                "chat": {"id": chat, "type": "private"}, "from": {"id": chat, "first_name": "Bench"},
+            },
+        }
+
+    def run_sync(self, bot, chats, script, concurrency):
+        view = TelegramWebhookView.as_view()
+        factory = RequestFactory()
+        latencies = []
+        tracker = InFlight()
+
+        def run_chat(chat):
+            try:
+                for step, text in enumerate(script):
+                    request = factory.post('/webhook/', json.dumps(self.update(chat, text, step)), content_type='application/json')
+                    started = time.perf_counter()
+                    with tracker:
+                        view(request, token=bot.token)
+                    latencies.append(time.perf_counter() - started)
+            finally:
+                close_old_connections()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(run_chat, chats))
+        return time.perf_counter() - started, latencies, tracker.peak, concurrency
+
+    def run_async(self, bot, chats, script, concurrency):
+        factory = AsyncRequestFactory()
+        latencies = []
+        tracker = InFlight()
+
+        async def run_chat(chat, slots):
+            async with slots:
+                for step, text in enumerate(script):
+                    request = factory.post('/webhook/', json.dumps(self.update(chat, text, step)), content_type='application/json')
+                    started = time.perf_counter()
+                    with tracker:
+                        await telegram_webhook_async(request, token=bot.token)
+                    latencies.append(time.perf_counter() - started)
+
+        async def main():
+            self.has_httpx = get_async_client() is not None
+            slots = asyncio.Semaphore(concurrency)
+            started = time.perf_counter()
+            await asyncio.gather(*(run_chat(chat, slots) for chat in chats))
+            elapsed = time.perf_counter() - started
+            client = get_async_client()
+            if client is not None:
+                await client.aclose()
+            return elapsed
+
+        elapsed = asyncio.run(main())
+        return elapsed, latencies, tracker.peak, getattr(settings, 'GIVEAWAY_ASYNC_HANDLER_THREADS', 32)
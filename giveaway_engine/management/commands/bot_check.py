@@ -1,52 +1,124 @@
-from django.core.management.base import BaseCommand
+import json
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, Q
 from giveaway_engine.models import TelegramBot, Giveaway
-import requests
+from giveaway_engine.utils import telegram_request, webhook_url_for
 
 class Command(BaseCommand):
     help = 'Diagnoses bot configuration, active giveaways, and webhook status'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--json', action='store_true', help='Print one machine-readable JSON report')
+        parser.add_argument('--only-problems', action='store_true', help='Only report bots with problems')
+        parser.add_argument('--workers', type=int, default=16, help='Concurrent Telegram requests')
+        parser.add_argument('--pending-threshold', type=int, default=100, help='pending_update_count above which a bot is flagged')
+        parser.add_argument('--fail-on-problems', action='store_true', help='Exit with an error if any bot has problems')
+
     def handle(self, *args, **options):
-        bots = TelegramBot.objects.all()
-        self.stdout.write(self.style.SUCCESS(f"Found {bots.count()} bots in database."))
-        
-        for bot in bots:
-            self.stdout.write(f"\nBot: {bot.username} (Active: {bot.is_active})")
-            self.stdout.write(f"Token: {bot.token[:5]}...{bot.token[-5:]} (Length: {len(bot.token)})")
-            
-            # Webhook Check
-            self.check_webhook(bot)
-            
-            giveaways = Giveaway.objects.filter(bot=bot)
-            active_giveaways = giveaways.filter(is_active=True)
-            
-            self.stdout.write(f"Total Giveaways: {giveaways.count()}")
-            self.stdout.write(f"Active Giveaways: {active_giveaways.count()}")
-            
-            if giveaways.count() > 0 and active_giveaways.count() == 0:
-                self.stdout.write(self.style.WARNING("!!! WARNING: You have giveaways for this bot, but NONE are active."))
-            
-            for g in active_giveaways:
-                pre_info = f" (Prereq: Seq <= {g.pre_giveaway})" if g.pre_giveaway else ""
-                self.stdout.write(f"  - [{g.sequence}] {g.title} ({g.giveaway_type}){pre_info}")
-
-        if bots.count() == 0:
-            self.stdout.write(self.style.ERROR("No bots found. Please create a bot in Django Admin first."))
+        bots = list(TelegramBot.objects.all().order_by('id'))
+
+        # All giveaway stats in one aggregated query plus one listing query
+        stats = {
+            row['bot_id']: row
+            for row in Giveaway.objects.values('bot_id').annotate(
+                total=Count('id'),
+                active=Count('id', filter=Q(is_active=True)),
+            )
+        }
+        active_by_bot = {}
+        for g in Giveaway.objects.filter(is_active=True).order_by('bot_id', 'sequence').values('bot_id', 'sequence', 'title', 'giveaway_type', 'pre_giveaway'):
+            active_by_bot.setdefault(g['bot_id'], []).append(g)
+
+        with ThreadPoolExecutor(max_workers=max(1, options['workers'])) as pool:
+            webhooks = list(pool.map(self.fetch_webhook_info, bots))
+
+        reports = []
+        for bot, webhook in zip(bots, webhooks):
+            bot_stats = stats.get(bot.id, {'total': 0, 'active': 0})
+            report = {
+                'id': bot.id,
+                'username': bot.username,
+                'is_active': bot.is_active,
+                'token': f"{bot.token[:5]}...{bot.token[-5:]}",
+                'token_length': len(bot.token),
+                'total_giveaways': bot_stats['total'],
+                'active_giveaways': bot_stats['active'],
+                'giveaways': active_by_bot.get(bot.id, []),
+                'webhook': webhook,
+                'problems': [],
+            }
+            self.find_problems(bot, report, options['pending_threshold'])
+            reports.append(report)
 
-    def check_webhook(self, bot):
-        url = f"https://api.telegram.org/bot{bot.token}/getWebhookInfo"
+        problem_count = sum(1 for report in reports if report['problems'])
+        if options['only_problems']:
+            reports = [report for report in reports if report['problems']]
+
+        if options['json']:
+            self.stdout.write(json.dumps({'bot_count': len(bots), 'problem_count': problem_count, 'bots': reports}, indent=2))
+        else:
+            self.write_text(bots, reports)
+
+        if options['fail_on_problems'] and problem_count:
+            raise CommandError(f"{problem_count} bot(s) have problems")
+
+    def fetch_webhook_info(self, bot):
         try:
-            resp = requests.get(url, timeout=10)
-            data = resp.json()
-            if data.get("ok"):
-                info = data.get("result", {})
-                webhook_url = info.get("url", "")
-                if webhook_url:
-                    self.stdout.write(self.style.SUCCESS(f"Registered Webhook: {webhook_url}"))
-                    if info.get("last_error_message"):
-                        self.stdout.write(self.style.ERROR(f"Last Error: {info.get('last_error_message')}"))
-                else:
-                    self.stdout.write(self.style.WARNING("No webhook registered on Telegram!"))
-            else:
-                self.stdout.write(self.style.ERROR(f"Could not fetch webhook info: {data.get('description')}"))
+            data = telegram_request(bot.token, "getWebhookInfo").json()
         except Exception as e:
-            self.stdout.write(self.style.ERROR(f"Error checking webhook: {e}"))
+            return {'ok': False, 'error': str(e)}
+        if not data.get("ok"):
+            return {'ok': False, 'error': data.get('description')}
+        info = data.get("result", {})
+        last_error_date = info.get("last_error_date")
+        return {
+            'ok': True,
+            'url': info.get("url", ""),
+            'pending_update_count': info.get("pending_update_count", 0),
+            'last_error_date': datetime.fromtimestamp(last_error_date, tz=timezone.utc).isoformat() if last_error_date else None,
+            'last_error_message': info.get("last_error_message"),
+        }
+
+    def find_problems(self, bot, report, pending_threshold):
+        webhook = report['webhook']
+        problems = report['problems']
+        if not webhook['ok']:
+            problems.append(f"Could not fetch webhook info: {webhook['error']}")
+        else:
+            if not webhook['url']:
+                problems.append("No webhook registered on Telegram!")
+            elif bot.webhook_domain and webhook['url'] != webhook_url_for(bot):
+                problems.append(f"Webhook points to {webhook['url']}, expected {webhook_url_for(bot)}")
+            if webhook['last_error_message']:
+                problems.append(f"Last Error: {webhook['last_error_message']} (at {webhook['last_error_date']})")
+            if webhook['pending_update_count'] > pending_threshold:
+                problems.append(f"{webhook['pending_update_count']} updates pending delivery")
+        if report['total_giveaways'] > 0 and report['active_giveaways'] == 0:
+            problems.append("You have giveaways for this bot, but NONE are active.")
+
+    def write_text(self, bots, reports):
+        self.stdout.write(self.style.SUCCESS(f"Found {len(bots)} bots in database."))
+
+        for report in reports:
+            self.stdout.write(f"\nBot: {report['username']} (Active: {report['is_active']})")
+            self.stdout.write(f"Token: {report['token']} (Length: {report['token_length']})")
+
+            webhook = report['webhook']
+            if webhook['ok'] and webhook['url']:
+                self.stdout.write(self.style.SUCCESS(f"Registered Webhook: {webhook['url']}"))
+                self.stdout.write(f"Pending Updates: {webhook['pending_update_count']}")
+
+            self.stdout.write(f"Total Giveaways: {report['total_giveaways']}")
+            self.stdout.write(f"Active Giveaways: {report['active_giveaways']}")
+
+            for g in report['giveaways']:
+                pre_info = f" (Prereq: Seq <= {g['pre_giveaway']})" if g['pre_giveaway'] else ""
+                self.stdout.write(f"  - [{g['sequence']}] {g['title']} ({g['giveaway_type']}){pre_info}")
+
+            for problem in report['problems']:
+                self.stdout.write(self.style.ERROR(f"!!! {problem}"))
+
+        if not bots:
+            self.stdout.write(self.style.ERROR("No bots found. Please create a bot in Django Admin first."))
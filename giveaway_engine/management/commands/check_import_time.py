@@ -0,0 +1,85 @@
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+PACKAGE = 'giveaway_engine'
+LINE_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$")
+
+# What a worker imports before it can serve an update
+SNIPPET = (
+    "import django; django.setup(); "
+    "from django.urls import get_resolver; get_resolver().url_patterns; "
+    "import giveaway_engine.views, giveaway_engine.async_views, giveaway_engine.polling"
+)
+
+
+def measure():
+    """
+    Imports Django and the handler path in a fresh interpreter under
+    -X importtime. Returns (total ms spent importing giveaway_engine and
+    what only it pulls in, {module: self ms}, {dependency: cumulative ms}).
+    """
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(path for path in sys.path if path))
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', SNIPPET],
+        env=env, capture_output=True, text=True,
+    )
+    if result.returncode:
+        raise CommandError(f"Import failed:\n{result.stderr[-2000:]}")
+
+    entries = []
+    for line in result.stderr.splitlines():
+        match = LINE_RE.match(line)
+        if match:
+            entries.append((int(match.group(1)), int(match.group(2)), len(match.group(3)) // 2, match.group(4)))
+
+    total = 0
+    own = {}
+    dependencies = {}
+    stack = []  # ancestors of the current entry, outermost first
+    # importtime prints children before their parent; reversed, parents come first
+    for self_us, cumulative_us, depth, name in reversed(entries):
+        while stack and stack[-1][0] >= depth:
+            stack.pop()
+        in_package = [ancestor for _, ancestor in stack if ancestor.split('.')[0] == PACKAGE]
+        if name.split('.')[0] == PACKAGE:
+            own[name] = self_us / 1000
+            if not in_package:
+                total += cumulative_us / 1000
+        elif in_package and stack[-1][1].split('.')[0] == PACKAGE:
+            dependencies[name] = cumulative_us / 1000
+        stack.append((depth, name))
+    return total, own, dependencies
+
+
+class Command(BaseCommand):
+    help = 'Measures how long a fresh worker spends importing giveaway_engine and checks it against a budget'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--budget-ms', type=float, default=getattr(settings, 'GIVEAWAY_IMPORT_BUDGET_MS', 300),
+                            help='Fail above this many milliseconds (default GIVEAWAY_IMPORT_BUDGET_MS or 300)')
+        parser.add_argument('--runs', type=int, default=5, help='Fresh interpreters to measure; the median counts')
+        parser.add_argument('--top', type=int, default=8, help='Slowest modules and dependencies to list')
+
+    def handle(self, *args, **options):
+        runs = [measure() for _ in range(max(1, options['runs']))]
+        totals = [total for total, _, _ in runs]
+        median = statistics.median(totals)
+        _, own, dependencies = sorted(runs, key=lambda run: run[0])[len(runs) // 2]
+
+        self.stdout.write(f"{PACKAGE} import time: {median:.1f}ms (median of {len(runs)}, min {min(totals):.1f}ms), budget {options['budget_ms']:.0f}ms")
+        self.stdout.write("Slowest own modules (self time):")
+        for name, ms in sorted(own.items(), key=lambda item: -item[1])[:options['top']]:
+            self.stdout.write(f"  {name:<50} {ms:8.1f}ms")
+        self.stdout.write("Heaviest dependencies first imported by it (cumulative):")
+        for name, ms in sorted(dependencies.items(), key=lambda item: -item[1])[:options['top']]:
+            self.stdout.write(f"  {name:<50} {ms:8.1f}ms")
+
+        if median > options['budget_ms']:
+            raise CommandError(f"Import time {median:.1f}ms is over the {options['budget_ms']:.0f}ms budget")
+        self.stdout.write(self.style.SUCCESS("Within budget"))
@@ -0,0 +1,60 @@
+import sys
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+from giveaway_engine.models import Giveaway, GiveawayAttempt, TelegramUser
+from giveaway_engine.exports import FORMATS, answer_rows, attempt_rows, user_rows
+from giveaway_engine.routers import replica_scope
+
+class Command(BaseCommand):
+    help = 'Streams users, attempts or pivoted questionnaire answers to CSV/JSONL with constant memory'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=['users', 'attempts', 'answers'])
+        parser.add_argument('--format', choices=sorted(FORMATS), default='csv')
+        parser.add_argument('--bot', help='Only export this bot (id or username)')
+        parser.add_argument('--giveaway', type=int, help='Giveaway id (required for answers)')
+        parser.add_argument('--output', help='File to write (default: stdout)')
+
+    def handle(self, *args, **options):
+        kind = options['kind']
+        bot_lookup = None
+        if options['bot']:
+            bot_lookup = Q(bot__username=options['bot'])
+            if options['bot'].isdigit():
+                bot_lookup |= Q(bot_id=int(options['bot']))
+
+        if kind == 'users':
+            queryset = TelegramUser.objects.all()
+            if bot_lookup is not None:
+                queryset = queryset.filter(bot_lookup)
+            rows = user_rows(queryset)
+        elif kind == 'attempts':
+            queryset = GiveawayAttempt.objects.all()
+            if bot_lookup is not None:
+                queryset = queryset.filter(giveaway__in=Giveaway.objects.filter(bot_lookup))
+            if options['giveaway']:
+                queryset = queryset.filter(giveaway_id=options['giveaway'])
+            rows = attempt_rows(queryset)
+        else:
+            if not options['giveaway']:
+                raise CommandError("--giveaway is required for answers")
+            try:
+                giveaway = Giveaway.objects.get(id=options['giveaway'])
+            except Giveaway.DoesNotExist:
+                raise CommandError(f"Giveaway {options['giveaway']} not found")
+            rows = answer_rows(giveaway)
+
+        encoder, _ = FORMATS[options['format']]
+        out = open(options['output'], 'w', encoding='utf-8', newline='') if options['output'] else sys.stdout
+        try:
+            count = 0
+            # Exports only read, so they can run on a replica when one is configured
+            with replica_scope():
+                for chunk in encoder(rows):
+                    out.write(chunk)
+                    count += 1
+        finally:
+            if options['output']:
+                out.close()
+        if options['output']:
+            self.stderr.write(self.style.SUCCESS(f"Wrote {count} line(s) to {options['output']}"))
@@ -0,0 +1,41 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.core.management.base import BaseCommand
+from giveaway_engine.models import GiveawayAttempt
+from giveaway_engine.proof_media import cached_path, could_be_photo, evict, fetch_attempt_proof, max_bytes, media_dir
+
+
+class Command(BaseCommand):
+    help = 'Downloads photo proofs missing from the local proof cache and trims it to its size limit'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Every photo proof, not only the pending ones')
+        parser.add_argument('--limit', type=int, default=500, help='Newest attempts to look at')
+        parser.add_argument('--workers', type=int, default=4, help='Downloads in parallel')
+        parser.add_argument('--evict-only', action='store_true', help='Only trim the cache')
+
+    def handle(self, *args, **options):
+        if not options['evict_only']:
+            # 'unknown': proofs from before proof_type, classified as they are fetched
+            attempts = GiveawayAttempt.objects.filter(proof_type__in=('photo', 'unknown')).select_related('giveaway__bot').order_by('-id')
+            if not options['all']:
+                attempts = attempts.filter(status='pending')
+            missing = [
+                attempt for attempt in attempts[:options['limit']]
+                if (attempt.proof_type == 'photo' and attempt.user_proof or could_be_photo(attempt)) and not cached_path(attempt.user_proof)
+            ]
+            started = time.monotonic()
+            with ThreadPoolExecutor(max_workers=max(1, options['workers'])) as pool:
+                paths = list(pool.map(fetch_attempt_proof, missing))
+            text = [attempt for attempt in missing if attempt.proof_type == 'text']
+            failed = [str(attempt.id) for attempt, path in zip(missing, paths) if path is None and attempt.proof_type != 'text']
+            self.stdout.write(f"Downloaded {len(missing) - len(text) - len(failed)} of {len(missing)} missing proof(s) in {time.monotonic() - started:.1f}s")
+            if text:
+                self.stdout.write(f"{len(text)} older proof(s) turned out to be text")
+            if failed:
+                self.stdout.write(self.style.WARNING(f"Telegram did not serve the proofs of attempt(s) {', '.join(failed)}"))
+
+        removed, freed = evict()
+        self.stdout.write(self.style.SUCCESS(
+            f"Proof cache {media_dir()} within {max_bytes() // (1024 * 1024)}MB: evicted {removed} proof(s), {freed // 1024}KB"
+        ))
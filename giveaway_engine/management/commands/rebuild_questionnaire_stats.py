@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from giveaway_engine.questionnaire import rebuild
+
+class Command(BaseCommand):
+    help = 'Recomputes questionnaire answer statistics and progress from the stored answers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--giveaway', type=int, action='append', help='Only rebuild this giveaway id; repeatable')
+
+    def handle(self, *args, **options):
+        stats, progress = rebuild(giveaway_ids=options['giveaway'])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {stats} answer statistic(s) and {progress} progress row(s)."))
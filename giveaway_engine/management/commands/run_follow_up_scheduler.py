@@ -0,0 +1,40 @@
+import signal
+from django.core.management.base import BaseCommand
+from giveaway_engine.scheduler import FollowUpScheduler
+from giveaway_engine.sharding import ShardCoordinator
+from giveaway_engine.utils import follow_up_worker_id
+
+class Command(BaseCommand):
+    help = 'Runs a long-lived scheduler that sends follow-ups within about a second of their due time'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tick', type=float, default=1.0, help='Maximum seconds between scheduler wake-ups')
+        parser.add_argument('--horizon', type=int, default=300, help='Seconds of upcoming follow-ups loaded from the database')
+        parser.add_argument('--refresh', type=int, default=60, help='Seconds between database refreshes of the heap')
+        parser.add_argument('--lease-seconds', type=int, default=30, help='Leader (or shard) lease length shared between scheduler instances')
+        parser.add_argument('--shard-group', help='Split bots between all schedulers of this group instead of electing one leader')
+
+    def handle(self, *args, **options):
+        stop = {'requested': False}
+
+        def request_stop(signum, frame):
+            stop['requested'] = True
+
+        signal.signal(signal.SIGTERM, request_stop)
+        signal.signal(signal.SIGINT, request_stop)
+
+        worker_id = follow_up_worker_id()
+        coordinator = None
+        if options['shard_group']:
+            coordinator = ShardCoordinator(options['shard_group'], worker_id, lease_seconds=options['lease_seconds'])
+
+        scheduler = FollowUpScheduler(
+            worker_id,
+            horizon_seconds=options['horizon'],
+            refresh_seconds=options['refresh'],
+            lease_seconds=options['lease_seconds'],
+            coordinator=coordinator,
+        )
+        self.stdout.write(self.style.SUCCESS(f"Follow-up scheduler {scheduler.worker_id} started."))
+        scheduler.run(tick=options['tick'], should_stop=lambda: stop['requested'])
+        self.stdout.write("Follow-up scheduler stopped.")
@@ -0,0 +1,60 @@
+import asyncio
+import signal
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from giveaway_engine.models import TelegramBot
+from giveaway_engine.polling import PollingRunner
+from giveaway_engine.sharding import ShardCoordinator
+from giveaway_engine.utils import follow_up_worker_id
+
+class Command(BaseCommand):
+    help = 'Receives updates by long-polling getUpdates for many bots (instead of webhooks)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bot', action='append', help='Only poll this bot (id or username); repeatable')
+        parser.add_argument('--concurrency', type=int, default=8, help='Updates handled in parallel across all bots')
+        parser.add_argument('--poll-timeout', type=int, default=25, help='getUpdates long-poll timeout in seconds')
+        parser.add_argument('--batch-limit', type=int, default=100, help='Maximum updates fetched per getUpdates call')
+        parser.add_argument('--delete-webhook', action='store_true', help='Remove registered webhooks first (getUpdates fails while one is set)')
+        parser.add_argument('--shard-group', help='Share the bots with every other process started with the same group')
+        parser.add_argument('--lease-seconds', type=int, default=30, help='Shard lease length; a dead process\'s bots move after this long')
+
+    def handle(self, *args, **options):
+        bot_ids = None
+        if options['bot']:
+            lookup = Q(username__in=options['bot'])
+            ids = [int(value) for value in options['bot'] if value.isdigit()]
+            if ids:
+                lookup |= Q(id__in=ids)
+            bot_ids = list(TelegramBot.objects.filter(lookup).values_list('id', flat=True))
+
+        coordinator = None
+        refresh_seconds = 60
+        if options['shard_group']:
+            coordinator = ShardCoordinator(options['shard_group'], follow_up_worker_id(), lease_seconds=options['lease_seconds'])
+            only = set(bot_ids) if bot_ids is not None else None
+            bot_ids = lambda busy_bot_ids: [bot_id for bot_id in coordinator.bot_ids(busy_bot_ids) if only is None or bot_id in only]
+            refresh_seconds = max(1, options['lease_seconds'] // 3)
+
+        runner = PollingRunner(
+            bot_ids=bot_ids,
+            concurrency=options['concurrency'],
+            poll_timeout=options['poll_timeout'],
+            batch_limit=options['batch_limit'],
+            refresh_seconds=refresh_seconds,
+            delete_webhook=options['delete_webhook'],
+        )
+
+        async def main():
+            loop = asyncio.get_running_loop()
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                loop.add_signal_handler(sig, runner.stop)
+            await runner.run()
+
+        self.stdout.write(self.style.SUCCESS("Polling started. Press Ctrl+C to stop."))
+        try:
+            asyncio.run(main())
+        finally:
+            if coordinator:
+                coordinator.release()
+        self.stdout.write("Polling stopped.")
@@ -1,15 +1,19 @@
 from django.core.management.base import BaseCommand
-from giveaway_engine.models import GiveawayAttempt
-from giveaway_engine.utils import process_follow_up
-from django.utils import timezone
-from datetime import timedelta
+from giveaway_engine.utils import process_all_pending_follow_ups
 
 class Command(BaseCommand):
     help = 'Sends pending follow-up messages for approved giveaway attempts'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100, help='Follow-ups claimed per batch')
+        parser.add_argument('--lease-seconds', type=int, default=300, help='How long a claimed batch stays reserved for this worker')
+
     def handle(self, *args, **options):
         self.stdout.write("Checking for pending follow-ups...")
-        count = process_all_pending_follow_ups()
+        count = process_all_pending_follow_ups(
+            batch_size=options['batch_size'],
+            lease_seconds=options['lease_seconds'],
+        )
         if count > 0:
             self.stdout.write(self.style.SUCCESS(f"Successfully processed {count} follow-up(s)."))
         else:
@@ -0,0 +1,114 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+from giveaway_engine.models import TelegramBot
+from giveaway_engine.utils import (
+    RateLimiter, bot_profile_fingerprint, desired_bot_state, diff_bot_state, fetch_bot_state, telegram_request,
+)
+
+class Command(BaseCommand):
+    help = "Reconciles every bot's webhook and profile with Telegram, applying only the differences"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Show the differences without changing anything')
+        parser.add_argument('--domain', help='Set this webhook_domain on the selected bots first (e.g. after a domain rotation)')
+        parser.add_argument('--bot', action='append', help='Only sync this bot (id or username); repeatable')
+        parser.add_argument('--include-inactive', action='store_true', help='Also sync bots marked inactive')
+        parser.add_argument('--workers', type=int, default=16, help='Bots processed concurrently')
+        parser.add_argument('--rate', type=float, default=20, help='Maximum Bot API calls per second across all workers')
+
+    def handle(self, *args, **options):
+        bots = TelegramBot.objects.all().order_by('id')
+        if not options['include_inactive']:
+            bots = bots.filter(is_active=True)
+        if options['bot']:
+            lookup = Q(username__in=options['bot'])
+            ids = [int(value) for value in options['bot'] if value.isdigit()]
+            if ids:
+                lookup |= Q(id__in=ids)
+            bots = bots.filter(lookup)
+
+        if options['domain']:
+            if options['dry_run']:
+                self.stdout.write(f"Would set webhook_domain={options['domain']} on {bots.count()} bot(s)")
+            else:
+                # Bulk update skips TelegramBot.save(), we sync below instead
+                bots.update(webhook_domain=options['domain'])
+
+        bots = list(bots)
+        if options['domain'] and options['dry_run']:
+            for bot in bots:
+                bot.webhook_domain = options['domain']
+
+        self.limiter = RateLimiter(options['rate'])
+        self.dry_run = options['dry_run']
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=max(1, options['workers'])) as pool:
+            results = list(pool.map(self.sync_bot, bots))
+
+        summary = {'in_sync': 0, 'changed': 0, 'failed': 0}
+        for bot, (outcome, lines) in zip(bots, results):
+            summary[outcome] += 1
+            if outcome == 'in_sync':
+                continue
+            style = self.style.ERROR if outcome == 'failed' else self.style.WARNING
+            self.stdout.write(style(f"{bot.username}:"))
+            for line in lines:
+                self.stdout.write(f"  {line}")
+
+        verb = "would change" if self.dry_run else "changed"
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(bots)} bot(s) checked in {time.monotonic() - started:.1f}s: "
+            f"{summary['in_sync']} in sync, {summary['changed']} {verb}, {summary['failed']} failed."
+        ))
+        if summary['failed']:
+            raise CommandError(f"{summary['failed']} bot(s) failed to sync")
+
+    def call(self, bot, method, payload):
+        for _ in range(3):
+            self.limiter.wait()
+            data = telegram_request(bot.token, method, payload).json()
+            retry_after = data.get('parameters', {}).get('retry_after') if not data.get('ok') else None
+            if not retry_after:
+                return data
+            time.sleep(retry_after)
+        return data
+
+    def sync_bot(self, bot):
+        try:
+            for _ in range(4):
+                self.limiter.wait()
+            remote = fetch_bot_state(bot)
+        except Exception as e:
+            return 'failed', [f"Could not read state from Telegram: {e}"]
+
+        calls = diff_bot_state(desired_bot_state(bot), remote)
+        if not calls:
+            if not self.dry_run:
+                cache.set(f"bot_profile_synced_{bot.id}", bot_profile_fingerprint(bot), timeout=None)
+            return 'in_sync', []
+
+        lines = []
+        failed = False
+        for method, payload, keys in calls:
+            changes = ", ".join(f"{key}: {remote.get(key)!r} -> {payload[key]!r}" for key in keys)
+            if self.dry_run:
+                lines.append(f"{method} ({changes})")
+                continue
+            try:
+                result = self.call(bot, method, payload)
+            except Exception as e:
+                result = {'ok': False, 'description': str(e)}
+            if result.get('ok'):
+                lines.append(f"{method} OK ({changes})")
+            else:
+                failed = True
+                lines.append(f"{method} FAILED: {result.get('description')} ({changes})")
+
+        if failed:
+            return 'failed', lines
+        if not self.dry_run:
+            cache.set(f"bot_profile_synced_{bot.id}", bot_profile_fingerprint(bot), timeout=None)
+        return 'changed', lines
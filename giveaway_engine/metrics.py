@@ -0,0 +1,81 @@
+import atexit
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+FUNNEL_COUNTERS = (
+    'new_users', 'starts', 'claims_started', 'questions_answered',
+    'proofs_submitted', 'approvals', 'out_of_stock', 'blocked', 'throttled',
+)
+
+_lock = threading.Lock()
+_pending = defaultdict(int)  # (bot_id, giveaway_id, hour, counter) -> increment
+_last_flush = time.monotonic()
+
+
+def incr(counter, bot_id, giveaway_id=None, amount=1):
+    """
+    Counts a funnel event in memory. Counters are written to FunnelRollup
+    every GIVEAWAY_METRICS_FLUSH_SECONDS (default 10) by whichever request
+    comes next, and once more when the process exits.
+    """
+    if counter not in FUNNEL_COUNTERS:
+        raise ValueError(f"Unknown funnel counter: {counter}")
+    hour = timezone.now().replace(minute=0, second=0, microsecond=0)
+    with _lock:
+        _pending[(bot_id, giveaway_id, hour, counter)] += amount
+    maybe_flush()
+
+
+def maybe_flush():
+    interval = getattr(settings, 'GIVEAWAY_METRICS_FLUSH_SECONDS', 10)
+    if time.monotonic() - _last_flush >= interval:
+        flush()
+
+
+def flush():
+    """Adds the in-memory counters to their FunnelRollup rows"""
+    global _pending, _last_flush
+    with _lock:
+        pending, _pending = _pending, defaultdict(int)
+        _last_flush = time.monotonic()
+    if not pending:
+        return
+
+    rows = defaultdict(dict)
+    for (bot_id, giveaway_id, hour, counter), amount in pending.items():
+        rows[(bot_id, giveaway_id, hour)][counter] = amount
+
+    for (bot_id, giveaway_id, hour), counters in rows.items():
+        try:
+            _add_to_row(bot_id, giveaway_id, hour, counters)
+        except Exception as e:
+            logger.error(f"Failed to flush funnel metrics for bot {bot_id}: {e}")
+            with _lock:
+                for counter, amount in counters.items():
+                    _pending[(bot_id, giveaway_id, hour, counter)] += amount
+
+
+def _add_to_row(bot_id, giveaway_id, hour, counters):
+    from .models import FunnelRollup
+    row = FunnelRollup.objects.filter(bot_id=bot_id, giveaway_id=giveaway_id, hour=hour)
+    increments = {counter: F(counter) + amount for counter, amount in counters.items()}
+    if row.update(**increments):
+        return
+    try:
+        with transaction.atomic():
+            FunnelRollup.objects.create(bot_id=bot_id, giveaway_id=giveaway_id, hour=hour, **counters)
+    except IntegrityError:
+        # Another process created the row first
+        row.update(**increments)
+
+
+atexit.register(flush)
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.30 on 2026-10-18 23:31
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('giveaway_engine', '0015_telegramuser_is_blocked'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UpdateProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('chat_id', models.CharField(blank=True, max_length=50)),
+                ('reason', models.CharField(choices=[('sampled', 'Random Sample'), ('slow', 'Slower Than Threshold'), ('bot', 'Targeted Bot'), ('chat', 'Targeted Chat')], max_length=10)),
+                ('duration_ms', models.FloatField()),
+                ('query_count', models.PositiveIntegerField(default=0)),
+                ('telegram_call_count', models.PositiveIntegerField(default=0)),
+                ('queries', models.TextField(blank=True, help_text='JSON list of SQL queries with timings')),
+                ('telegram_calls', models.TextField(blank=True, help_text='JSON list of Telegram API calls with timings')),
+                ('stats_text', models.TextField(blank=True, help_text='cProfile summary sorted by cumulative time')),
+                ('stats_data', models.BinaryField(blank=True, help_text='Raw cProfile stats (pstats/snakeviz compatible)', null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('bot', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='giveaway_engine.telegrambot')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
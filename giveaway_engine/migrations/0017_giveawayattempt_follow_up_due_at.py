@@ -0,0 +1,43 @@
+# Generated by Django 4.2.30 on 2026-10-18 23:32
+
+from datetime import timedelta
+
+from django.db import migrations, models
+
+
+def backfill_follow_up_due_at(apps, schema_editor):
+    Giveaway = apps.get_model('giveaway_engine', 'Giveaway')
+    GiveawayAttempt = apps.get_model('giveaway_engine', 'GiveawayAttempt')
+    giveaways = Giveaway.objects.exclude(follow_up_text__isnull=True).exclude(follow_up_text='')
+    for giveaway in giveaways:
+        GiveawayAttempt.objects.filter(
+            giveaway=giveaway,
+            status='approved',
+            follow_up_sent=False,
+        ).update(follow_up_due_at=models.F('created_at') + timedelta(seconds=giveaway.follow_up_delay_seconds))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('giveaway_engine', '0016_updateprofile'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='giveawayattempt',
+            name='follow_up_claimed_by',
+            field=models.CharField(blank=True, help_text='Worker currently holding the follow-up lease', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='giveawayattempt',
+            name='follow_up_claimed_until',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='giveawayattempt',
+            name='follow_up_due_at',
+            field=models.DateTimeField(blank=True, db_index=True, help_text='When the follow-up becomes due (empty if none is scheduled)', null=True),
+        ),
+        migrations.RunPython(backfill_follow_up_due_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 23:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('giveaway_engine', '0017_giveawayattempt_follow_up_due_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='telegrambot',
+            name='message_log_retention_days',
+            field=models.PositiveIntegerField(blank=True, help_text='Archive message logs older than this many days (empty = keep forever)', null=True),
+        ),
+    ]
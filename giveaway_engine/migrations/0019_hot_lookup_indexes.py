@@ -0,0 +1,42 @@
+# Generated by Django 4.2.30 on 2026-10-18 23:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('giveaway_engine', '0018_telegrambot_message_log_retention_days'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='giveawayattempt',
+            name='follow_up_due_at',
+            field=models.DateTimeField(blank=True, help_text='When the follow-up becomes due (empty if none is scheduled)', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='giveawayattempt',
+            index=models.Index(fields=['user', 'giveaway', 'status'], name='attempt_user_giveaway_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='giveawayattempt',
+            index=models.Index(condition=models.Q(('follow_up_due_at__isnull', False), ('follow_up_sent', False)), fields=['follow_up_due_at'], name='attempt_follow_up_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='giveawayitem',
+            index=models.Index(condition=models.Q(('is_used', False)), fields=['giveaway', 'id'], name='item_available_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='messagelog',
+            index=models.Index(fields=['user', '-timestamp'], name='log_user_timestamp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='messagelog',
+            index=models.Index(fields=['bot', 'timestamp'], name='log_bot_timestamp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='useranswer',
+            index=models.Index(fields=['user', 'question'], name='answer_user_question_idx'),
+        ),
+    ]
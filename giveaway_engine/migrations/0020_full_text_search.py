@@ -0,0 +1,68 @@
+# Generated by Django 4.2.30 on 2026-10-18 23:50
+
+import logging
+
+from django.db import migrations
+from django.db.utils import OperationalError
+
+logger = logging.getLogger(__name__)
+
+# (base table, text column, FTS5 shadow table, PostgreSQL index name)
+SEARCH_TABLES = [
+    ('giveaway_engine_messagelog', 'content', 'giveaway_engine_messagelog_fts', 'log_content_fts_idx'),
+    ('giveaway_engine_useranswer', 'answer', 'giveaway_engine_useranswer_fts', 'answer_fts_idx'),
+]
+
+
+def create_search_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for table, column, fts_table, pg_index in SEARCH_TABLES:
+        if vendor == 'postgresql':
+            schema_editor.execute(
+                f"CREATE INDEX IF NOT EXISTS {pg_index} ON {table} USING GIN (to_tsvector('simple', {column}))"
+            )
+        elif vendor == 'sqlite':
+            try:
+                schema_editor.execute(
+                    f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table} USING fts5({column}, content='{table}', content_rowid='id')"
+                )
+            except OperationalError as e:
+                logger.warning(f"SQLite FTS5 unavailable, admin search falls back to LIKE: {e}")
+                return
+            # External-content FTS table kept in sync by triggers
+            schema_editor.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ai AFTER INSERT ON {table} BEGIN "
+                f"INSERT INTO {fts_table}(rowid, {column}) VALUES (new.id, new.{column}); END"
+            )
+            schema_editor.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ad AFTER DELETE ON {table} BEGIN "
+                f"INSERT INTO {fts_table}({fts_table}, rowid, {column}) VALUES ('delete', old.id, old.{column}); END"
+            )
+            schema_editor.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {fts_table}_au AFTER UPDATE OF {column} ON {table} BEGIN "
+                f"INSERT INTO {fts_table}({fts_table}, rowid, {column}) VALUES ('delete', old.id, old.{column}); "
+                f"INSERT INTO {fts_table}(rowid, {column}) VALUES (new.id, new.{column}); END"
+            )
+            schema_editor.execute(f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild')")
+
+
+def drop_search_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for table, column, fts_table, pg_index in SEARCH_TABLES:
+        if vendor == 'postgresql':
+            schema_editor.execute(f"DROP INDEX IF EXISTS {pg_index}")
+        elif vendor == 'sqlite':
+            for suffix in ('ai', 'ad', 'au'):
+                schema_editor.execute(f"DROP TRIGGER IF EXISTS {fts_table}_{suffix}")
+            schema_editor.execute(f"DROP TABLE IF EXISTS {fts_table}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('giveaway_engine', '0019_hot_lookup_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
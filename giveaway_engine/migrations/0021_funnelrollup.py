@@ -0,0 +1,42 @@
+# Generated by Django 4.2.30 on 2026-10-18 23:39
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('giveaway_engine', '0020_full_text_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FunnelRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.DateTimeField()),
+                ('new_users', models.PositiveIntegerField(default=0)),
+                ('starts', models.PositiveIntegerField(default=0)),
+                ('claims_started', models.PositiveIntegerField(default=0)),
+                ('questions_answered', models.PositiveIntegerField(default=0)),
+                ('proofs_submitted', models.PositiveIntegerField(default=0)),
+                ('approvals', models.PositiveIntegerField(default=0)),
+                ('out_of_stock', models.PositiveIntegerField(default=0)),
+                ('blocked', models.PositiveIntegerField(default=0)),
+                ('bot', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='giveaway_engine.telegrambot')),
+                ('giveaway', models.ForeignKey(blank=True, help_text='Empty for bot-wide counters (new users, /start, blocked)', null=True, on_delete=django.db.models.deletion.CASCADE, to='giveaway_engine.giveaway')),
+            ],
+            options={
+                'ordering': ['-hour'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='funnelrollup',
+            constraint=models.UniqueConstraint(condition=models.Q(('giveaway__isnull', False)), fields=('bot', 'giveaway', 'hour'), name='rollup_giveaway_hour_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='funnelrollup',
+            constraint=models.UniqueConstraint(condition=models.Q(('giveaway__isnull', True)), fields=('bot', 'hour'), name='rollup_bot_hour_uniq'),
+        ),
+    ]
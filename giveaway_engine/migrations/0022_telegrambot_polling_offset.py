@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 23:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('giveaway_engine', '0021_funnelrollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='telegrambot',
+            name='polling_offset',
+            field=models.BigIntegerField(default=0, help_text='Next getUpdates offset when running in polling mode'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.30 on 2026-10-18 23:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('giveaway_engine', '0022_telegrambot_polling_offset'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShardLease',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('group', models.CharField(max_length=50)),
+                ('shard', models.PositiveIntegerField()),
+                ('owner', models.CharField(max_length=100)),
+                ('expires_at', models.DateTimeField()),
+            ],
+            options={
+                'ordering': ['group', 'shard'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ShardWorker',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('group', models.CharField(max_length=50)),
+                ('worker_id', models.CharField(max_length=100)),
+                ('heartbeat_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='shardworker',
+            constraint=models.UniqueConstraint(fields=('group', 'worker_id'), name='shard_worker_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='shardlease',
+            constraint=models.UniqueConstraint(fields=('group', 'shard'), name='shard_lease_uniq'),
+        ),
+    ]
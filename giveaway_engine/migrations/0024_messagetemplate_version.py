@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 23:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('giveaway_engine', '0023_sharding'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='messagetemplate',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False, help_text='Bumped on every save; keys the compiled template cache'),
+        ),
+    ]
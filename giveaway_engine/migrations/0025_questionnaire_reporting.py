@@ -0,0 +1,65 @@
+# Generated by Django 4.2.30 on 2026-10-18 23:52
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def restore_answer_search(apps, schema_editor):
+    # Adding the column rebuilds the table on SQLite, which drops the FTS5 sync triggers of 0020
+    from giveaway_engine.search import restore_sqlite_sync
+    restore_sqlite_sync(schema_editor, 'giveaway_engine_useranswer', 'answer', 'giveaway_engine_useranswer_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('giveaway_engine', '0024_messagetemplate_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='useranswer',
+            name='superseded',
+            field=models.BooleanField(default=False, help_text='Replaced by a retake; kept for history'),
+        ),
+        migrations.RunPython(restore_answer_search, migrations.RunPython.noop),
+        migrations.CreateModel(
+            name='QuestionAnswerStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('normalized_answer', models.CharField(max_length=255)),
+                ('sample_answer', models.TextField(help_text='One original answer with this normalized form')),
+                ('count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='answer_stats', to='giveaway_engine.questionnaire')),
+            ],
+            options={
+                'ordering': ['question', '-count'],
+            },
+        ),
+        migrations.CreateModel(
+            name='QuestionnaireProgress',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('answered_count', models.PositiveIntegerField(default=0)),
+                ('question_count', models.PositiveIntegerField(default=0)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('retakes', models.PositiveIntegerField(default=0)),
+                ('giveaway', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='giveaway_engine.giveaway')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='giveaway_engine.telegramuser')),
+            ],
+            options={
+                'verbose_name_plural': 'Questionnaire progress',
+                'indexes': [models.Index(fields=['giveaway', 'answered_count'], name='progress_giveaway_count_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='questionnaireprogress',
+            constraint=models.UniqueConstraint(fields=('user', 'giveaway'), name='questionnaire_progress_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='questionanswerstat',
+            constraint=models.UniqueConstraint(fields=('question', 'normalized_answer'), name='answer_stat_uniq'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.30 on 2026-10-18 23:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('giveaway_engine', '0025_questionnaire_reporting'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='funnelrollup',
+            name='throttled',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='telegrambot',
+            name='flood_bot_limit',
+            field=models.PositiveIntegerField(blank=True, help_text='Updates the whole bot handles per window before further ones are ignored (empty = no limit)', null=True),
+        ),
+        migrations.AddField(
+            model_name='telegrambot',
+            name='flood_user_limit',
+            field=models.PositiveIntegerField(blank=True, help_text='Updates one chat may send per window before further ones are ignored (empty = no limit)', null=True),
+        ),
+        migrations.AddField(
+            model_name='telegrambot',
+            name='flood_warning_text',
+            field=models.TextField(blank=True, default="⏳ You're sending messages too fast. Please wait a moment.", help_text='Sent once per window to a chat that hits its limit (empty = stay silent)'),
+        ),
+        migrations.AddField(
+            model_name='telegrambot',
+            name='flood_window_seconds',
+            field=models.PositiveIntegerField(default=60, help_text='Sliding window for the flood limits below'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.30 on 2026-10-18 23:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('giveaway_engine', '0026_flood_control'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OverloadEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('worker', models.CharField(max_length=100)),
+                ('from_level', models.PositiveSmallIntegerField(choices=[(0, 'Normal'), (1, 'Skip inbound logs'), (2, 'Cached /start'), (3, 'Defer sends'), (4, 'Reject claims')])),
+                ('to_level', models.PositiveSmallIntegerField(choices=[(0, 'Normal'), (1, 'Skip inbound logs'), (2, 'Cached /start'), (3, 'Defer sends'), (4, 'Reject claims')])),
+                ('reason', models.CharField(max_length=100)),
+                ('latency_ms', models.FloatField(blank=True, help_text='Smoothed handler latency at the transition', null=True)),
+                ('lag_seconds', models.FloatField(blank=True, help_text='Smoothed update lag at the transition', null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
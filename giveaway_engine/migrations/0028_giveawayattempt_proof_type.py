@@ -0,0 +1,24 @@
+# Generated by Django 4.2.30 on 2026-10-19 00:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('giveaway_engine', '0027_overloadevent'),
+    ]
+
+    operations = [
+        # Existing rows don't say whether they hold a photo file_id; proof_media classifies them when fetched
+        migrations.AddField(
+            model_name='giveawayattempt',
+            name='proof_type',
+            field=models.CharField(choices=[('text', 'Text'), ('photo', 'Photo'), ('unknown', 'Not classified yet')], default='unknown', help_text='Photo proofs hold a Telegram file_id, downloaded by proof_media.py', max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='giveawayattempt',
+            name='proof_type',
+            field=models.CharField(choices=[('text', 'Text'), ('photo', 'Photo'), ('unknown', 'Not classified yet')], default='text', help_text='Photo proofs hold a Telegram file_id, downloaded by proof_media.py', max_length=10),
+        ),
+    ]
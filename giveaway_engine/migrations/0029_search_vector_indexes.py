@@ -0,0 +1,41 @@
+# Generated by Django 4.2.30 on 2026-10-19 10:05
+
+from django.db import migrations
+
+# (model, text column, index name) - the GIN indexes of 0020, rebuilt on
+# the expression SearchVector compiles to so the planner can use them
+SEARCH_INDEXES = [
+    ('MessageLog', 'content', 'log_content_fts_idx'),
+    ('UserAnswer', 'answer', 'answer_fts_idx'),
+]
+
+
+def rebuild_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    from django.contrib.postgres.indexes import GinIndex
+    from django.contrib.postgres.search import SearchVector
+    for model_name, column, name in SEARCH_INDEXES:
+        model = apps.get_model('giveaway_engine', model_name)
+        schema_editor.execute(f"DROP INDEX IF EXISTS {name}")
+        schema_editor.add_index(model, GinIndex(SearchVector(column, config='simple'), name=name))
+
+
+def restore_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for model_name, column, name in SEARCH_INDEXES:
+        table = apps.get_model('giveaway_engine', model_name)._meta.db_table
+        schema_editor.execute(f"DROP INDEX IF EXISTS {name}")
+        schema_editor.execute(f"CREATE INDEX {name} ON {table} USING GIN (to_tsvector('simple', {column}))")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('giveaway_engine', '0028_giveawayattempt_proof_type'),
+    ]
+
+    operations = [
+        migrations.RunPython(rebuild_search_indexes, restore_search_indexes),
+    ]
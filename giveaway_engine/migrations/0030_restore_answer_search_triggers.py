@@ -0,0 +1,20 @@
+# Generated by Django 4.2.30 on 2026-10-19 14:20
+
+from django.db import migrations
+
+
+def restore_answer_search(apps, schema_editor):
+    # Databases that ran 0025 before it restored the triggers lost them; answers saved since are re-indexed
+    from giveaway_engine.search import restore_sqlite_sync
+    restore_sqlite_sync(schema_editor, 'giveaway_engine_useranswer', 'answer', 'giveaway_engine_useranswer_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('giveaway_engine', '0029_search_vector_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(restore_answer_search, migrations.RunPython.noop),
+    ]
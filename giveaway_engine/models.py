@@ -11,28 +11,49 @@ class TelegramBot(models.Model):
     short_description = models.TextField(blank=True, null=True, help_text="shown in chat info/preview")
     webhook_domain = models.URLField(blank=True, null=True, help_text="Base URL for webhook (e.g. https://domain.com)")
     start_message_header = models.TextField(default="🎁 Active Giveaways:", help_text="Text displayed above the list of giveaways in the /start message.")
+    polling_offset = models.BigIntegerField(default=0, help_text="Next getUpdates offset when running in polling mode")
+    message_log_retention_days = models.PositiveIntegerField(null=True, blank=True, help_text="Archive message logs older than this many days (empty = keep forever)")
+
+    # Inbound flood control (see throttling.py)
+    flood_window_seconds = models.PositiveIntegerField(default=60, help_text="Sliding window for the flood limits below")
+    flood_user_limit = models.PositiveIntegerField(null=True, blank=True, help_text="Updates one chat may send per window before further ones are ignored (empty = no limit)")
+    flood_bot_limit = models.PositiveIntegerField(null=True, blank=True, help_text="Updates the whole bot handles per window before further ones are ignored (empty = no limit)")
+    flood_warning_text = models.TextField(blank=True, default="⏳ You're sending messages too fast. Please wait a moment.", help_text="Sent once per window to a chat that hits its limit (empty = stay silent)")
     
     def __str__(self):
         return self.username
 
+    # Fields mirrored to Telegram (profile + webhook URL)
+    SYNCED_FIELDS = ('token', 'name', 'description', 'short_description', 'webhook_domain')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_sync_state = instance._sync_state()
+        return instance
+
+    def _sync_state(self):
+        # Deferred fields are unknown, so they never compare equal
+        return tuple(self.__dict__.get(field, object()) for field in self.SYNCED_FIELDS)
+
     def save(self, *args, **kwargs):
         # Strip trailing spaces from token
         if self.token:
             self.token = self.token.strip()
             
         # We need to import here to avoid circular dependencies with utils
-        from .utils import update_bot_info, set_webhook
+        from django.db import transaction
+        from .utils import schedule_bot_sync
         
+        state = self._sync_state()
+        changed = getattr(self, '_loaded_sync_state', None) != state
         super().save(*args, **kwargs)
+        self._loaded_sync_state = state
         
-        # Check and update Telegram
-        try:
-           update_bot_info(self)
-           if self.webhook_domain:
-               set_webhook(self)
-        except Exception as e:
-           # Log error but don't fail the save
-           print(f"Failed to update bot info on Telegram: {e}")
+        # Sync Telegram in the background, only when something it mirrors changed
+        if changed:
+            bot_id = self.id
+            transaction.on_commit(lambda: schedule_bot_sync(bot_id))
 
 class TelegramUser(models.Model):
     """Keep track of your leads"""
@@ -57,10 +78,28 @@ class MessageTemplate(models.Model):
     bot = models.ForeignKey(TelegramBot, on_delete=models.CASCADE)
     name = models.CharField(max_length=100) # e.g. "Cross-promo for CasinoBot"
     content = models.TextField(help_text="Variables: {content} (the code/link), {name} (user's name)")
+    version = models.PositiveIntegerField(default=1, editable=False, help_text="Bumped on every save; keys the compiled template cache")
 
     def __str__(self):
         return f"{self.name} ({self.bot.username})"
 
+    def clean(self):
+        from django.core.exceptions import ValidationError
+        from .rendering import TemplateError, compile_template
+        try:
+            compile_template(self.content)
+        except TemplateError as e:
+            raise ValidationError({'content': str(e)})
+
+    def save(self, *args, **kwargs):
+        # Compile once here instead of formatting on every send; validation is clean()'s job,
+        # a template saved without it is logged and rendered as the caller's default
+        from .rendering import get_renderer
+        if self.pk:
+            self.version += 1
+        super().save(*args, **kwargs)
+        get_renderer(self)
+
 class Giveaway(models.Model):
     """The Campaign Container"""
     TYPE_CHOICES = (
@@ -104,6 +143,29 @@ class Giveaway(models.Model):
     def __str__(self):
         return f"[{self.sequence}] {self.title}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_follow_up = instance._follow_up_state()
+        return instance
+
+    def _follow_up_state(self):
+        return tuple(self.__dict__.get(field, object()) for field in ('follow_up_text', 'follow_up_delay_seconds'))
+
+    def save(self, *args, **kwargs):
+        changed = self.pk is not None and getattr(self, '_loaded_follow_up', None) != self._follow_up_state()
+        super().save(*args, **kwargs)
+        self._loaded_follow_up = self._follow_up_state()
+        if changed:
+            self.reschedule_follow_ups()
+
+    def reschedule_follow_ups(self):
+        """Moves the due time of every approved attempt still waiting for its follow-up, in one update"""
+        from datetime import timedelta
+        from django.db.models import F
+        due_at = F('created_at') + timedelta(seconds=self.follow_up_delay_seconds) if self.follow_up_text else None
+        return GiveawayAttempt.objects.filter(giveaway=self, status='approved', follow_up_sent=False).update(follow_up_due_at=due_at)
+
 class Questionnaire(models.Model):
     """A question to be asked in a giveaway"""
     giveaway = models.ForeignKey(Giveaway, on_delete=models.CASCADE, related_name='questions')
@@ -122,6 +184,12 @@ class UserAnswer(models.Model):
     question = models.ForeignKey(Questionnaire, on_delete=models.CASCADE)
     answer = models.TextField()
     answered_at = models.DateTimeField(auto_now_add=True)
+    superseded = models.BooleanField(default=False, help_text="Replaced by a retake; kept for history")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'question'], name='answer_user_question_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user} - {self.question.id}"
@@ -133,6 +201,12 @@ class GiveawayItem(models.Model):
     is_used = models.BooleanField(default=False)
     claimed_by = models.ForeignKey(TelegramUser, null=True, blank=True, on_delete=models.SET_NULL)
 
+    class Meta:
+        indexes = [
+            # Next free code for a giveaway: filter(giveaway, is_used=False).first()
+            models.Index(fields=['giveaway', 'id'], condition=models.Q(is_used=False), name='item_available_idx'),
+        ]
+
     def __str__(self):
         return f"{self.giveaway.title} - {self.content[:20]}"
 
@@ -147,17 +221,56 @@ class GiveawayAttempt(models.Model):
     user = models.ForeignKey(TelegramUser, on_delete=models.CASCADE)
     giveaway = models.ForeignKey(Giveaway, on_delete=models.CASCADE)
     
+    PROOF_TYPE_CHOICES = (
+        ('text', 'Text'),
+        ('photo', 'Photo'),
+        ('unknown', 'Not classified yet'),  # saved before proof_type existed
+    )
+
     # If manual approval needed
     user_proof = models.TextField(blank=True, null=True) # Text or File ID
+    proof_type = models.CharField(max_length=10, choices=PROOF_TYPE_CHOICES, default='text', help_text="Photo proofs hold a Telegram file_id, downloaded by proof_media.py")
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='approved')
     
     created_at = models.DateTimeField(auto_now_add=True)
     admin_notes = models.TextField(blank=True)
     follow_up_sent = models.BooleanField(default=False)
+    follow_up_due_at = models.DateTimeField(null=True, blank=True, help_text="When the follow-up becomes due (empty if none is scheduled)")
+    follow_up_claimed_by = models.CharField(max_length=100, blank=True, help_text="Worker currently holding the follow-up lease")
+    follow_up_claimed_until = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Retake, prerequisite and "next giveaway" checks
+            models.Index(fields=['user', 'giveaway', 'status'], name='attempt_user_giveaway_idx'),
+            # Follow-up dispatcher only ever looks at unsent, scheduled rows
+            models.Index(fields=['follow_up_due_at'], condition=models.Q(follow_up_due_at__isnull=False, follow_up_sent=False), name='attempt_follow_up_due_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user} - {self.giveaway}"
 
+    def save(self, *args, **kwargs):
+        # Schedule the follow-up once the attempt is approved so the dispatcher can find it by index
+        if self.status != 'approved':
+            self.follow_up_due_at = None
+        elif self.follow_up_due_at is None and not self.follow_up_sent:
+            self.follow_up_due_at = self.compute_follow_up_due_at()
+        super().save(*args, **kwargs)
+
+    def compute_follow_up_due_at(self):
+        # The giveaway when it's loaded already, otherwise just the two values it takes
+        if GiveawayAttempt.giveaway.is_cached(self):
+            text, delay = self.giveaway.follow_up_text, self.giveaway.follow_up_delay_seconds
+        else:
+            text, delay = Giveaway.objects.filter(id=self.giveaway_id).values_list('follow_up_text', 'follow_up_delay_seconds').get()
+        if not text:
+            return None
+        from django.utils import timezone
+        from datetime import timedelta
+        base = self.created_at or timezone.now()
+        return base + timedelta(seconds=delay)
+
 class NewsUpdate(models.Model):
     """Broadcast News"""
     bot = models.ForeignKey(TelegramBot, on_delete=models.CASCADE)
@@ -183,6 +296,164 @@ class MessageLog(models.Model):
 
     class Meta:
         ordering = ['-timestamp']
+        indexes = [
+            # Per-user history (admin recent_history, archive reader)
+            models.Index(fields=['user', '-timestamp'], name='log_user_timestamp_idx'),
+            # Per-bot time ranges (retention/archiving, reporting)
+            models.Index(fields=['bot', 'timestamp'], name='log_bot_timestamp_idx'),
+        ]
 
     def __str__(self):
         return f"{self.direction} - {self.user} - {self.timestamp.strftime('%Y-%m-%d %H:%M')}"
+
+class UpdateProfile(models.Model):
+    """Profiling capture of a single webhook update (kept as a bounded ring buffer)"""
+    REASON_CHOICES = (
+        ('sampled', 'Random Sample'),
+        ('slow', 'Slower Than Threshold'),
+        ('bot', 'Targeted Bot'),
+        ('chat', 'Targeted Chat'),
+    )
+
+    bot = models.ForeignKey(TelegramBot, null=True, blank=True, on_delete=models.SET_NULL)
+    chat_id = models.CharField(max_length=50, blank=True)
+    reason = models.CharField(max_length=10, choices=REASON_CHOICES)
+    duration_ms = models.FloatField()
+    query_count = models.PositiveIntegerField(default=0)
+    telegram_call_count = models.PositiveIntegerField(default=0)
+    queries = models.TextField(blank=True, help_text="JSON list of SQL queries with timings")
+    telegram_calls = models.TextField(blank=True, help_text="JSON list of Telegram API calls with timings")
+    stats_text = models.TextField(blank=True, help_text="cProfile summary sorted by cumulative time")
+    stats_data = models.BinaryField(null=True, blank=True, help_text="Raw cProfile stats (pstats/snakeviz compatible)")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.reason} - {self.chat_id} - {self.duration_ms:.0f}ms"
+
+class FunnelRollup(models.Model):
+    """Hourly campaign funnel counters, maintained incrementally (see metrics.py)"""
+    bot = models.ForeignKey(TelegramBot, on_delete=models.CASCADE)
+    giveaway = models.ForeignKey(Giveaway, null=True, blank=True, on_delete=models.CASCADE, help_text="Empty for bot-wide counters (new users, /start, blocked)")
+    hour = models.DateTimeField()
+
+    new_users = models.PositiveIntegerField(default=0)
+    starts = models.PositiveIntegerField(default=0)
+    claims_started = models.PositiveIntegerField(default=0)
+    questions_answered = models.PositiveIntegerField(default=0)
+    proofs_submitted = models.PositiveIntegerField(default=0)
+    approvals = models.PositiveIntegerField(default=0)
+    out_of_stock = models.PositiveIntegerField(default=0)
+    blocked = models.PositiveIntegerField(default=0)
+    throttled = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['-hour']
+        constraints = [
+            models.UniqueConstraint(fields=['bot', 'giveaway', 'hour'], condition=models.Q(giveaway__isnull=False), name='rollup_giveaway_hour_uniq'),
+            models.UniqueConstraint(fields=['bot', 'hour'], condition=models.Q(giveaway__isnull=True), name='rollup_bot_hour_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.bot} - {self.giveaway or 'all'} - {self.hour:%Y-%m-%d %H:00}"
+
+class ShardWorker(models.Model):
+    """A live worker process in a shard group, kept alive by heartbeats (see sharding.py)"""
+    group = models.CharField(max_length=50)
+    worker_id = models.CharField(max_length=100)
+    heartbeat_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['group', 'worker_id'], name='shard_worker_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.group} - {self.worker_id}"
+
+class ShardLease(models.Model):
+    """Ownership of one shard of bots by one worker, valid until expires_at"""
+    group = models.CharField(max_length=50)
+    shard = models.PositiveIntegerField()
+    owner = models.CharField(max_length=100)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['group', 'shard']
+        constraints = [
+            models.UniqueConstraint(fields=['group', 'shard'], name='shard_lease_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.group} #{self.shard} - {self.owner}"
+
+class QuestionAnswerStat(models.Model):
+    """How often each normalized answer was given to a question (current answers only, see questionnaire.py)"""
+    question = models.ForeignKey(Questionnaire, on_delete=models.CASCADE, related_name='answer_stats')
+    normalized_answer = models.CharField(max_length=255)
+    sample_answer = models.TextField(help_text="One original answer with this normalized form")
+    count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['question', '-count']
+        constraints = [
+            models.UniqueConstraint(fields=['question', 'normalized_answer'], name='answer_stat_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.question_id} - {self.normalized_answer} ({self.count})"
+
+class QuestionnaireProgress(models.Model):
+    """One user's current run through a giveaway's questionnaire"""
+    user = models.ForeignKey(TelegramUser, on_delete=models.CASCADE)
+    giveaway = models.ForeignKey(Giveaway, on_delete=models.CASCADE)
+    answered_count = models.PositiveIntegerField(default=0)
+    question_count = models.PositiveIntegerField(default=0)
+    started_at = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    retakes = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = "Questionnaire progress"
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'giveaway'], name='questionnaire_progress_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['giveaway', 'answered_count'], name='progress_giveaway_count_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user} - {self.giveaway} ({self.answered_count}/{self.question_count})"
+
+    @property
+    def time_to_complete(self):
+        if self.started_at and self.completed_at:
+            return self.completed_at - self.started_at
+        return None
+
+class OverloadEvent(models.Model):
+    """A change of degradation level recorded by the overload controller (see overload.py)"""
+    LEVEL_CHOICES = (
+        (0, 'Normal'),
+        (1, 'Skip inbound logs'),
+        (2, 'Cached /start'),
+        (3, 'Defer sends'),
+        (4, 'Reject claims'),
+    )
+
+    worker = models.CharField(max_length=100)
+    from_level = models.PositiveSmallIntegerField(choices=LEVEL_CHOICES)
+    to_level = models.PositiveSmallIntegerField(choices=LEVEL_CHOICES)
+    reason = models.CharField(max_length=100)
+    latency_ms = models.FloatField(null=True, blank=True, help_text="Smoothed handler latency at the transition")
+    lag_seconds = models.FloatField(null=True, blank=True, help_text="Smoothed update lag at the transition")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.worker}: {self.get_from_level_display()} -> {self.get_to_level_display()}"
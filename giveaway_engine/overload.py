@@ -0,0 +1,176 @@
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import OverloadEvent
+from .utils import get_send_executor, send_telegram_message
+
+logger = logging.getLogger(__name__)
+
+# Degradation levels; each one includes the ones before it
+NORMAL = 0
+SKIP_INBOUND_LOGS = 1   # don't write inbound MessageLog rows
+CACHED_START = 2        # /start served from the cached catalog
+DEFER_SENDS = 3         # no news in /start, follow-ups wait
+REJECT_CLAIMS = 4       # new claims get a cheap "busy" reply
+
+LEVEL_NAMES = ('normal', 'skip_inbound_logs', 'cached_start', 'defer_sends', 'reject_claims')
+SHARED_LEVEL_KEY = "overload_level"
+
+DEFAULTS = {
+    'enabled': True,
+    'latency_ms': (500, 1000, 2000, 4000),   # smoothed handler latency entering levels 1..4
+    'lag_seconds': (5, 15, 30, 60),          # smoothed update age (Telegram date -> handled) entering levels 1..4
+    'smoothing': 0.2,
+    'recover_seconds': 30,                   # time below a level's threshold before stepping down
+    'busy_text': "🚦 We're very busy right now, please try again in a minute.",
+}
+
+
+def get_config():
+    config = dict(DEFAULTS)
+    config.update(getattr(settings, 'GIVEAWAY_OVERLOAD', {}))
+    return config
+
+
+def _worker_id():
+    import os
+    import socket
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _record_event(from_level, to_level, reason, latency_ms, lag_seconds):
+    from django.db import close_old_connections
+    try:
+        OverloadEvent.objects.create(
+            worker=_worker_id(), from_level=from_level, to_level=to_level, reason=reason,
+            latency_ms=latency_ms, lag_seconds=lag_seconds,
+        )
+    except Exception as e:
+        logger.error(f"Failed to record overload transition {from_level} -> {to_level}: {e}")
+    finally:
+        close_old_connections()
+
+
+class OverloadController:
+    """
+    Watches handler latency and update lag of this process (exponentially
+    smoothed) and maps them to a degradation level. Rising is immediate,
+    recovery goes down one level at a time after recover_seconds below the
+    threshold. While degraded the level is published to the cache, so every
+    process (including the follow-up workers) degrades together; it expires
+    by itself once nobody is overloaded any more.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latency_ms = None
+        self.lag_seconds = None
+        self.level = NORMAL
+        self.below_since = None
+        self.last_observed = 0
+        self.last_published = 0
+        self.shared_level = NORMAL
+        self.shared_checked = 0
+
+    def target_level(self, config):
+        level = NORMAL
+        if self.latency_ms is not None:
+            level = max(level, sum(1 for threshold in config['latency_ms'] if self.latency_ms >= threshold))
+        if self.lag_seconds is not None:
+            level = max(level, sum(1 for threshold in config['lag_seconds'] if self.lag_seconds >= threshold))
+        return level
+
+    def observe(self, duration_ms, lag_seconds=None):
+        config = get_config()
+        if not config['enabled']:
+            return
+        alpha = config['smoothing']
+        with self.lock:
+            self.last_observed = time.monotonic()
+            self.latency_ms = duration_ms if self.latency_ms is None else alpha * duration_ms + (1 - alpha) * self.latency_ms
+            if lag_seconds is not None:
+                self.lag_seconds = lag_seconds if self.lag_seconds is None else alpha * lag_seconds + (1 - alpha) * self.lag_seconds
+            self.evaluate(config)
+
+    def evaluate(self, config):
+        now = time.monotonic()
+        target = self.target_level(config)
+        if target > self.level:
+            self.transition(target, "thresholds crossed")
+            self.below_since = None
+        elif target < self.level:
+            if self.below_since is None:
+                self.below_since = now
+            elif now - self.below_since >= config['recover_seconds']:
+                self.transition(self.level - 1, "recovered")
+                self.below_since = now
+        else:
+            self.below_since = None
+
+        if self.level > NORMAL and now - self.last_published >= 1:
+            try:
+                cache.set(SHARED_LEVEL_KEY, self.level, timeout=config['recover_seconds'])
+            except Exception as e:
+                logger.error(f"Failed to publish overload level: {e}")
+            self.last_published = now
+
+    def transition(self, level, reason):
+        previous, self.level = self.level, level
+        logger.warning(f"Overload level {LEVEL_NAMES[previous]} -> {LEVEL_NAMES[level]} ({reason}; latency {self.latency_ms or 0:.0f}ms, lag {self.lag_seconds or 0:.1f}s)")
+        get_send_executor().submit(_record_event, previous, level, reason, self.latency_ms, self.lag_seconds)
+
+    def current_level(self):
+        """This process's level or the shared one, whichever is higher (the cache is read at most once a second)"""
+        now = time.monotonic()
+        if self.level > NORMAL and now - self.last_observed >= get_config()['recover_seconds']:
+            # No traffic to measure: forget the old readings so the level can step down
+            with self.lock:
+                self.latency_ms = self.lag_seconds = None
+                self.last_observed = now
+                self.evaluate(get_config())
+        if now - self.shared_checked >= 1:
+            try:
+                self.shared_level = cache.get(SHARED_LEVEL_KEY) or NORMAL
+            except Exception:
+                self.shared_level = NORMAL
+            self.shared_checked = now
+        return max(self.level, self.shared_level)
+
+
+controller = OverloadController()
+
+
+def current_level():
+    if not get_config()['enabled']:
+        return NORMAL
+    return controller.current_level()
+
+
+def update_lag(data):
+    """Seconds between Telegram accepting the update and now"""
+    message = data.get('message') or {}
+    sent = message.get('date')
+    return max(0.0, time.time() - sent) if sent else None
+
+
+def reject_if_busy(bot, data):
+    """
+    At REJECT_CLAIMS, answers claim-like messages with the busy text
+    (once per chat per minute) without touching the database.
+    Returns True when the update was rejected.
+    """
+    if current_level() < REJECT_CLAIMS:
+        return False
+    message = data.get('message') or {}
+    text = (message.get('text') or '').strip()
+    parts = text.split()
+    if not (text.startswith('/claim_') or (parts and parts[0].isdigit())):
+        return False
+    chat_id = (message.get('chat') or {}).get('id')
+    if chat_id is not None and cache.add(f"overload_busy_{bot.id}_{chat_id}", 1, timeout=60):
+        get_send_executor().submit(send_telegram_message, bot.token, chat_id, get_config()['busy_text'])
+    return True
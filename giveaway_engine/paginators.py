@@ -0,0 +1,58 @@
+import hashlib
+import json
+import logging
+
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+logger = logging.getLogger(__name__)
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator for very large tables that avoids exact COUNT(*) queries.
+    PostgreSQL: uses the planner's row estimate (exact count when small).
+    Other backends: exact count cached for a few minutes per query.
+    """
+    exact_below = 10000
+    cache_timeout = 300
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not hasattr(queryset, 'query'):
+            return super().count
+
+        try:
+            sql, params = queryset.query.sql_with_params()
+        except Exception:
+            # EmptyResultSet and friends
+            return super().count
+
+        connection = connections[queryset.db]
+        if connection.vendor == 'postgresql':
+            estimate = self._planner_estimate(connection, sql, params)
+            if estimate is not None and estimate >= self.exact_below:
+                return estimate
+            return super().count
+
+        key = "admin_count_" + hashlib.md5(f"{queryset.db}:{sql}:{params!r}".encode()).hexdigest()
+        count = cache.get(key)
+        if count is None:
+            count = super().count
+            cache.set(key, count, timeout=self.cache_timeout)
+        return count
+
+    def _planner_estimate(self, connection, sql, params):
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+                plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            return int(plan[0]['Plan']['Plan Rows'])
+        except Exception as e:
+            logger.warning(f"Could not estimate row count: {e}")
+            return None
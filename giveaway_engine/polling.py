@@ -0,0 +1,181 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.db import close_old_connections
+
+from .models import TelegramBot
+from .utils import telegram_request
+
+logger = logging.getLogger(__name__)
+
+
+class PollingRunner:
+    """
+    Long-polls getUpdates for many bots from one asyncio loop.
+
+    Each bot has one task that fetches a batch, runs every update through the
+    same handler as the webhook, and stores the next offset on the bot before
+    fetching again, so a crash replays at most the batch in flight and never
+    skips an update. Handlers run on a bounded thread pool; when it is busy
+    the bot tasks wait for a slot instead of fetching more (backpressure) and
+    Telegram keeps the backlog.
+
+    A bot that is no longer wanted (bot_ids changed) is stopped, not
+    cancelled: its long poll in flight still runs on a thread and would
+    overlap with the next owner's. The task finishes that request, stores
+    its offset and ends; busy_bot_ids() are the bots not finished yet.
+    With a callable bot_ids it is passed busy_bot_ids() on every refresh.
+    """
+
+    def __init__(self, bot_ids=None, concurrency=8, poll_timeout=25, batch_limit=100, refresh_seconds=60, delete_webhook=False):
+        self.bot_ids = bot_ids
+        self.concurrency = concurrency
+        self.poll_timeout = poll_timeout
+        self.batch_limit = batch_limit
+        self.refresh_seconds = refresh_seconds
+        self.delete_webhook = delete_webhook
+        self.tasks = {}
+        self.stops = {}  # bot id -> asyncio.Event telling its task to finish
+        self.stopping = None
+        self.handler_slots = None
+        # Blocking HTTP long polls and ORM handlers run off the event loop.
+        # Every bot holds one long poll open, threads are only started as needed.
+        self.http_pool = ThreadPoolExecutor(max_workers=1024, thread_name_prefix='giveaway-poll')
+        self.handler_pool = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='giveaway-handler')
+        # A long poll holds its connection for poll_timeout, so each bot keeps its own
+        # instead of taking one from the shared send pool
+        self.sessions = {}
+
+    def busy_bot_ids(self):
+        return {bot_id for bot_id, task in self.tasks.items() if not task.done()}
+
+    def load_bots(self, busy_bot_ids=()):
+        bots = TelegramBot.objects.filter(is_active=True)
+        if self.bot_ids is not None:
+            bots = bots.filter(id__in=self.bot_ids(busy_bot_ids) if callable(self.bot_ids) else self.bot_ids)
+        bots = list(bots)
+        close_old_connections()
+        return bots
+
+    def fetch_updates(self, bot, offset):
+        session = self.sessions.get(bot.id)
+        if session is None:
+            session = self.sessions[bot.id] = requests.Session()
+        resp = telegram_request(
+            bot.token,
+            "getUpdates",
+            {"offset": offset, "timeout": self.poll_timeout, "limit": self.batch_limit, "allowed_updates": ["message"]},
+            timeout=self.poll_timeout + 10,
+            session=session,
+        )
+        data = resp.json()
+        if not data.get("ok"):
+            raise RuntimeError(data.get("description") or f"HTTP {resp.status_code}")
+        return data.get("result", [])
+
+    def process(self, bot, update):
+        from .views import handle_update
+        try:
+            handle_update(bot, update)
+        except Exception as e:
+            logger.exception(f"Polling handler failed for {bot.username} update {update.get('update_id')}: {e}")
+        finally:
+            close_old_connections()
+
+    def save_offset(self, bot, offset):
+        try:
+            TelegramBot.objects.filter(id=bot.id).update(polling_offset=offset)
+        finally:
+            close_old_connections()
+
+    async def run_in(self, pool, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(pool, func, *args)
+
+    async def pause(self, stop, seconds):
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    async def poll_bot(self, bot, stop):
+        if self.delete_webhook:
+            await self.run_in(self.http_pool, telegram_request, bot.token, "deleteWebhook", {"drop_pending_updates": False})
+        offset = saved_offset = bot.polling_offset
+        backoff = 1
+        try:
+            while not stop.is_set():
+                try:
+                    updates = await self.run_in(self.http_pool, self.fetch_updates, bot, offset)
+                    backoff = 1
+                except Exception as e:
+                    logger.error(f"getUpdates failed for {bot.username}: {e}")
+                    await self.pause(stop, backoff)
+                    backoff = min(backoff * 2, 60)
+                    continue
+
+                for update in updates:
+                    # Stopping: the rest is fetched again from the saved offset by whoever polls next
+                    if stop.is_set():
+                        break
+                    # Updates of one bot are handled in order; the pool bounds all bots together
+                    async with self.handler_slots:
+                        await self.run_in(self.handler_pool, self.process, bot, update)
+                    offset = update["update_id"] + 1
+                if offset != saved_offset:
+                    await self.run_in(self.http_pool, self.save_offset, bot, offset)
+                    saved_offset = offset
+        finally:
+            # Cancelled mid-batch: keep what was handled so it isn't replayed
+            # (the handler pool is drained on shutdown, so this still lands)
+            if offset != saved_offset:
+                self.handler_pool.submit(self.save_offset, bot, offset)
+
+    def sync_tasks(self, bots):
+        wanted = {bot.id: bot for bot in bots}
+        for bot_id, task in list(self.tasks.items()):
+            if task.done():
+                del self.tasks[bot_id]
+                del self.stops[bot_id]
+            elif bot_id not in wanted:
+                self.stops[bot_id].set()
+        for bot_id, bot in wanted.items():
+            # A bot still stopping is started again on a later refresh
+            if bot_id not in self.tasks:
+                self.stops[bot_id] = asyncio.Event()
+                self.tasks[bot_id] = asyncio.ensure_future(self.poll_bot(bot, self.stops[bot_id]))
+        stopping = sum(1 for bot_id in self.tasks if self.stops[bot_id].is_set())
+        logger.info(f"Polling {len(self.tasks) - stopping} bot(s), {stopping} stopping")
+
+    async def run(self):
+        self.stopping = asyncio.Event()
+        self.handler_slots = asyncio.Semaphore(self.concurrency)
+        try:
+            while not self.stopping.is_set():
+                try:
+                    bots = await self.run_in(self.http_pool, self.load_bots, self.busy_bot_ids())
+                except Exception as e:
+                    logger.error(f"Failed to load bots for polling: {e}")
+                else:
+                    self.sync_tasks(bots)
+                try:
+                    await asyncio.wait_for(self.stopping.wait(), timeout=self.refresh_seconds)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            # Let the long polls in flight return and their offsets land, so
+            # releasing the leases afterwards can't overlap with the next owner
+            for stop in self.stops.values():
+                stop.set()
+            if self.tasks:
+                _, pending = await asyncio.wait(list(self.tasks.values()), timeout=self.poll_timeout + 15)
+                for task in pending:
+                    task.cancel()
+                await asyncio.gather(*self.tasks.values(), return_exceptions=True)
+            self.http_pool.shutdown(wait=False)
+            self.handler_pool.shutdown(wait=True)
+
+    def stop(self):
+        if self.stopping is not None:
+            self.stopping.set()
@@ -0,0 +1,201 @@
+import cProfile
+import io
+import json
+import logging
+import marshal
+import pstats
+import random
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+# Python 3.12+ allows one active cProfile per process; 3.8-3.11 give garbage when they overlap
+_profiler_lock = threading.Lock()
+
+DEFAULT_CONFIG = {
+    'enabled': False,
+    'sample_rate': 0.0,          # fraction of updates to profile fully (0.0 - 1.0)
+    'slow_threshold_ms': None,   # store any update slower than this (queries + Telegram calls only)
+    'bots': [],                  # bot ids or usernames to always profile
+    'chats': [],                 # chat ids to always profile
+    'max_entries': 200,          # size of the ring buffer kept in the database
+}
+
+
+def get_profiling_config():
+    """
+    Reads GIVEAWAY_PROFILING from settings, filling in defaults.
+    """
+    config = dict(DEFAULT_CONFIG)
+    config.update(getattr(settings, 'GIVEAWAY_PROFILING', {}) or {})
+    return config
+
+
+class UpdateRecorder:
+    """Collects SQL queries and Telegram calls made while handling one update"""
+
+    def __init__(self):
+        self.queries = []
+        self.telegram_calls = []
+
+    def wrapper(self, alias):
+        """A connection.execute_wrapper recording the queries sent to one database alias"""
+        def record(execute, sql, params, many, context):
+            started = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                self.queries.append({
+                    'sql': sql,
+                    'db': alias,
+                    'duration_ms': round((time.perf_counter() - started) * 1000, 3),
+                })
+        return record
+
+
+def record_telegram_call(method, duration_ms, ok, recorder=None):
+    """
+    Called by utils.telegram_request for every Bot API call.
+    A no-op unless an update is currently being recorded on this thread,
+    or recorder is passed (calls made off the update's thread).
+    """
+    recorder = recorder or getattr(_local, 'recorder', None)
+    if recorder is not None:
+        recorder.telegram_calls.append({
+            'method': method,
+            'duration_ms': round(duration_ms, 3),
+            'ok': ok,
+        })
+
+
+def _extract_chat_id(data):
+    message = data.get('message') or {}
+    chat_id = (message.get('chat') or {}).get('id')
+    return str(chat_id) if chat_id is not None else None
+
+
+def _profile_reason(config, bot, chat_id):
+    """Decides up-front whether this update gets a full cProfile run"""
+    targets = {str(b) for b in config['bots']}
+    if str(bot.id) in targets or bot.username in targets:
+        return 'bot'
+    if chat_id and chat_id in {str(c) for c in config['chats']}:
+        return 'chat'
+    if config['sample_rate'] and random.random() < config['sample_rate']:
+        return 'sampled'
+    return None
+
+
+@contextmanager
+def profile_update(bot, data):
+    """
+    Wraps the handling of a single webhook update.
+    Updates picked by sampling or bot/chat targeting get a full cProfile run;
+    when slow_threshold_ms is set every update records its queries and
+    Telegram calls so slow ones can be stored after the fact. Only one
+    update per process is under cProfile at a time: a picked update that
+    finds the profiler busy records its queries and calls only. Inside
+    utils.deferred_sends the profile is stored once the held-back replies
+    are sent, with them recorded.
+    """
+    config = get_profiling_config()
+    if not config['enabled']:
+        yield
+        return
+
+    chat_id = _extract_chat_id(data)
+    reason = _profile_reason(config, bot, chat_id)
+    if reason is None and config['slow_threshold_ms'] is None:
+        yield
+        return
+
+    recorder = UpdateRecorder()
+    profiler = _start_profiler() if reason else None
+    _local.recorder = recorder
+    started = time.perf_counter()
+    try:
+        with ExitStack() as stack:
+            # Connections are per thread: this covers every database the update reads or writes here
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(recorder.wrapper(alias)))
+            try:
+                yield
+            finally:
+                if profiler:
+                    profiler.disable()
+                    _profiler_lock.release()
+    finally:
+        _local.recorder = None
+
+        def finish():
+            duration_ms = (time.perf_counter() - started) * 1000
+            stored_reason = reason
+            if stored_reason is None and duration_ms >= config['slow_threshold_ms']:
+                stored_reason = 'slow'
+            if stored_reason:
+                try:
+                    store_profile(bot, chat_id, stored_reason, duration_ms, recorder, profiler, config['max_entries'])
+                except Exception as e:
+                    logger.error(f"Failed to store update profile: {e}")
+
+        from .utils import current_outbox
+        outbox = current_outbox()
+        if outbox is not None:
+            outbox.recorder = recorder
+            outbox.after_sends.append(finish)
+        else:
+            finish()
+
+
+def _start_profiler():
+    """An enabled cProfile.Profile holding _profiler_lock, or None if profiling is busy"""
+    if not _profiler_lock.acquire(blocking=False):
+        return None
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError as e:
+        # Another profiling tool (a debugger, coverage) owns the hook
+        _profiler_lock.release()
+        logger.warning(f"cProfile unavailable, recording queries only: {e}")
+        return None
+    return profiler
+
+
+def store_profile(bot, chat_id, reason, duration_ms, recorder, profiler, max_entries):
+    """
+    Saves a profile and trims the table so it behaves as a ring buffer
+    holding the newest max_entries rows.
+    """
+    from .models import UpdateProfile
+
+    stats_text = ""
+    stats_data = None
+    if profiler:
+        profiler.create_stats()
+        # Before pstats: loading a profiler into Stats empties its .stats
+        stats_data = marshal.dumps(profiler.stats)
+        stream = io.StringIO()
+        pstats.Stats(profiler, stream=stream).sort_stats('cumulative').print_stats(40)
+        stats_text = stream.getvalue()
+
+    entry = UpdateProfile.objects.create(
+        bot=bot,
+        chat_id=chat_id or "",
+        reason=reason,
+        duration_ms=round(duration_ms, 3),
+        query_count=len(recorder.queries),
+        telegram_call_count=len(recorder.telegram_calls),
+        queries=json.dumps(recorder.queries),
+        telegram_calls=json.dumps(recorder.telegram_calls),
+        stats_text=stats_text,
+        stats_data=stats_data,
+    )
+    UpdateProfile.objects.filter(id__lte=entry.id - max_entries).delete()
+    return entry
@@ -0,0 +1,79 @@
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+from .models import GiveawayAttempt
+
+logger = logging.getLogger(__name__)
+
+
+def progress_key(user_id):
+    return f"user_progress_{user_id}"
+
+
+class UserProgress:
+    """
+    What one bot user has completed: approved and pending giveaway ids and
+    the highest approved sequence. Cached per TelegramUser (users are already
+    per bot) so eligibility checks need a single cache lookup.
+    """
+    __slots__ = ('approved', 'pending', 'max_completed_sequence')
+
+    def __init__(self, approved=(), pending=(), max_completed_sequence=None):
+        self.approved = frozenset(approved)
+        self.pending = frozenset(pending)
+        self.max_completed_sequence = max_completed_sequence
+
+    def has_completed(self, giveaway_id):
+        return giveaway_id in self.approved
+
+    def has_claimed(self, giveaway_id):
+        """Approved or waiting for approval"""
+        return giveaway_id in self.approved or giveaway_id in self.pending
+
+    def as_tuple(self):
+        return (tuple(self.approved), tuple(self.pending), self.max_completed_sequence)
+
+
+def build_progress(user_ids):
+    """Derives progress for many users from GiveawayAttempt in one query"""
+    rows = {user_id: ([], [], None) for user_id in user_ids}
+    # Always the primary: the result is cached and decides claims, a lagging replica could re-open one
+    attempts = GiveawayAttempt.objects.using(DEFAULT_DB_ALIAS).filter(user_id__in=user_ids, status__in=['approved', 'pending'])
+    for user_id, giveaway_id, status, sequence in attempts.values_list('user_id', 'giveaway_id', 'status', 'giveaway__sequence'):
+        approved, pending, max_sequence = rows[user_id]
+        if status == 'approved':
+            approved.append(giveaway_id)
+            if sequence is not None and (max_sequence is None or sequence > max_sequence):
+                max_sequence = sequence
+        else:
+            pending.append(giveaway_id)
+        rows[user_id] = (approved, pending, max_sequence)
+    return {user_id: UserProgress(*row) for user_id, row in rows.items()}
+
+
+def get_progress(user):
+    """Cached progress of a user, rebuilt from the database on a miss"""
+    cached = cache.get(progress_key(user.id))
+    if cached is not None:
+        return UserProgress(*cached)
+    progress = build_progress([user.id])[user.id]
+    cache.set(progress_key(user.id), progress.as_tuple(), timeout=getattr(settings, 'GIVEAWAY_PROGRESS_CACHE_SECONDS', 86400))
+    return progress
+
+
+def refresh_progress(user_ids):
+    """
+    Write-through after attempts were created, changed status or were
+    deleted. Call it after commit so the cache never holds rolled back state.
+    """
+    user_ids = set(user_ids)
+    if not user_ids:
+        return
+    timeout = getattr(settings, 'GIVEAWAY_PROGRESS_CACHE_SECONDS', 86400)
+    try:
+        cache.set_many({progress_key(user_id): progress.as_tuple() for user_id, progress in build_progress(user_ids).items()}, timeout=timeout)
+    except Exception as e:
+        logger.error(f"Failed to refresh progress of users {sorted(user_ids)}: {e}")
@@ -0,0 +1,290 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from .models import GiveawayAttempt
+from .profiling import record_telegram_call
+from .utils import telegram_api_url, telegram_request, telegram_session
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_SIZE = (320, 320)
+PART_SUFFIX = '.part'
+
+_in_flight = set()  # file_ids queued or being downloaded by this process
+_in_flight_lock = threading.Lock()
+_executor = None
+_tracked_bytes = None  # cache size as of the last scan plus this process's downloads since
+_tracked_lock = threading.Lock()
+
+
+class NotAFile(Exception):
+    """Telegram doesn't know the file_id: the proof isn't a photo"""
+
+
+def media_dir():
+    """GIVEAWAY_PROOF_MEDIA_DIR, default <MEDIA_ROOT>/giveaway_proofs"""
+    path = getattr(settings, 'GIVEAWAY_PROOF_MEDIA_DIR', None)
+    return path or os.path.join(getattr(settings, 'MEDIA_ROOT', '') or os.getcwd(), 'giveaway_proofs')
+
+
+def max_bytes():
+    return getattr(settings, 'GIVEAWAY_PROOF_MEDIA_MAX_BYTES', 512 * 1024 * 1024)
+
+
+def proof_path(file_id, thumbnail=False):
+    key = hashlib.sha256(file_id.encode()).hexdigest()[:32]
+    return os.path.join(media_dir(), key[:2], f"{key}.thumb.jpg" if thumbnail else f"{key}.jpg")
+
+
+def cached_path(file_id, thumbnail=False):
+    """
+    Path of a downloaded proof (or its thumbnail), or None. Doesn't touch
+    Telegram; a hit refreshes the file's mtime, which is what eviction
+    goes by.
+    """
+    path = proof_path(file_id, thumbnail)
+    try:
+        os.utime(path)
+    except OSError:
+        return None
+    return path
+
+
+def make_thumbnail(source, target):
+    """Needs Pillow (optional); without it admin shows the full image scaled down"""
+    try:
+        from PIL import Image
+    except ImportError:
+        return False
+    try:
+        with Image.open(source) as image:
+            image.thumbnail(THUMBNAIL_SIZE)
+            image.convert('RGB').save(target + PART_SUFFIX, 'JPEG', quality=80)
+        os.replace(target + PART_SUFFIX, target)
+        return True
+    except Exception as e:
+        logger.warning(f"Could not make a thumbnail of {source}: {e}")
+        return False
+
+
+def _download(bot_token, file_path, target):
+    url = f"{telegram_api_url()}/file/bot{bot_token}/{file_path}"
+    part = f"{target}.{os.getpid()}.{threading.get_ident()}{PART_SUFFIX}"
+    started = time.perf_counter()
+    ok = False
+    try:
+        with telegram_session().get(url, stream=True, timeout=30) as response:
+            response.raise_for_status()
+            with open(part, 'wb') as f:
+                for chunk in response.iter_content(64 * 1024):
+                    f.write(chunk)
+        # Readers never see a half-written file
+        os.replace(part, target)
+        ok = True
+    finally:
+        record_telegram_call('file', (time.perf_counter() - started) * 1000, ok)
+        if not ok and os.path.exists(part):
+            os.remove(part)
+
+
+def _fetch(bot_token, file_id):
+    """fetch_proof, raising NotAFile when getFile rejects the file_id"""
+    path = cached_path(file_id)
+    if path:
+        return path
+    try:
+        response = telegram_request(bot_token, 'getFile', {'file_id': file_id})
+        result = response.json()
+    except Exception as e:
+        logger.error(f"getFile failed for proof {file_id}: {e}")
+        return None
+    if response.status_code == 400:
+        raise NotAFile(result.get('description'))
+    file_path = (result.get('result') or {}).get('file_path') if result.get('ok') else None
+    if not file_path:
+        logger.warning(f"Telegram has no file for proof {file_id}: {result.get('description')}")
+        return None
+
+    path = proof_path(file_id)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    try:
+        _download(bot_token, file_path, path)
+    except Exception as e:
+        logger.error(f"Downloading proof {file_id} failed: {e}")
+        return None
+    thumbnail = proof_path(file_id, thumbnail=True)
+    added = os.path.getsize(path) + (os.path.getsize(thumbnail) if make_thumbnail(path, thumbnail) else 0)
+    if _track(added):
+        evict()
+    return path
+
+
+def fetch_proof(bot_token, file_id):
+    """
+    Makes sure a photo proof is in the local cache: resolves the file_id
+    with getFile, downloads the file, writes a thumbnail and, once the
+    cache grows past GIVEAWAY_PROOF_MEDIA_MAX_BYTES, evicts the least
+    recently used proofs. Returns the local path, or None when Telegram
+    won't serve the file.
+    """
+    try:
+        return _fetch(bot_token, file_id)
+    except NotAFile as e:
+        logger.warning(f"Telegram has no file for proof {file_id}: {e}")
+        return None
+
+
+def fetch_attempt_proof(attempt):
+    """
+    fetch_proof for an attempt (with giveaway__bot loaded). A proof from
+    before proof_type existed ('unknown') is classified by Telegram's
+    answer: 'photo' once it downloads, 'text' when getFile rejects it.
+    """
+    if attempt.proof_type not in ('photo', 'unknown') or not attempt.user_proof:
+        return None
+    if attempt.proof_type == 'photo':
+        return fetch_proof(attempt.giveaway.bot.token, attempt.user_proof)
+    try:
+        path = _fetch(attempt.giveaway.bot.token, attempt.user_proof)
+    except NotAFile:
+        path, proof_type = None, 'text'
+    else:
+        proof_type = 'photo' if path else None
+    if proof_type:
+        GiveawayAttempt.objects.filter(id=attempt.id, proof_type='unknown').update(proof_type=proof_type)
+        attempt.proof_type = proof_type
+    return path
+
+
+def could_be_photo(attempt):
+    """Whether an unclassified proof is worth asking Telegram about: file_ids are one word"""
+    proof = attempt.user_proof or ''
+    return attempt.proof_type == 'unknown' and bool(proof) and not any(c.isspace() for c in proof)
+
+
+def _track(added):
+    """
+    Adds a download to the tracked cache size; True when it's over the limit
+    (or not known yet) and evict() should run. Other processes' downloads
+    only show up at the next scan, so the cache can overshoot by what they
+    added since; fetch_proofs trims it exactly.
+    """
+    global _tracked_bytes
+    with _tracked_lock:
+        if _tracked_bytes is None:
+            return True
+        _tracked_bytes += added
+        return _tracked_bytes > max_bytes()
+
+
+def evict(limit=None):
+    """
+    Deletes the least recently used proofs (a photo and its thumbnail go
+    together) until the cache fits in limit bytes (default
+    GIVEAWAY_PROOF_MEDIA_MAX_BYTES), plus leftovers of interrupted
+    downloads. Scans the whole cache, so downloads only call it when the
+    tracked size is over the limit. Returns (proofs removed, bytes freed).
+    """
+    global _tracked_bytes
+    limit = max_bytes() if limit is None else limit
+    entries = {}  # key -> [newest mtime, size, paths]
+    total = 0
+    stale_before = time.time() - 3600
+    root = media_dir()
+    if not os.path.isdir(root):
+        with _tracked_lock:
+            _tracked_bytes = 0
+        return 0, 0
+    for shard in os.scandir(root):
+        if not shard.is_dir():
+            continue
+        for item in os.scandir(shard.path):
+            try:
+                stat = item.stat()
+            except OSError:
+                continue
+            if item.name.endswith(PART_SUFFIX):
+                if stat.st_mtime < stale_before:
+                    _remove([item.path])
+                continue
+            entry = entries.setdefault(item.name.split('.')[0], [0, 0, []])
+            entry[0] = max(entry[0], stat.st_mtime)
+            entry[1] += stat.st_size
+            entry[2].append(item.path)
+            total += stat.st_size
+
+    removed = freed = 0
+    for _, size, paths in sorted(entries.values()):
+        if total <= limit:
+            break
+        _remove(paths)
+        total -= size
+        freed += size
+        removed += 1
+    with _tracked_lock:
+        _tracked_bytes = total
+    if removed:
+        logger.info(f"Evicted {removed} proof(s), {freed} bytes, from {root}")
+    return removed, freed
+
+
+def _remove(paths):
+    for path in paths:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def get_proof_executor():
+    """
+    Thread pool for proof downloads (GIVEAWAY_PROOF_FETCH_WORKERS, default 2),
+    apart from the send pool so a backlog of downloads never delays replies.
+    """
+    global _executor
+    if _executor is None:
+        workers = getattr(settings, 'GIVEAWAY_PROOF_FETCH_WORKERS', 2)
+        _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='giveaway-proof')
+    return _executor
+
+
+def _fetch_job(attempt_id):
+    try:
+        attempt = GiveawayAttempt.objects.select_related('giveaway__bot').filter(id=attempt_id).first()
+        if attempt:
+            fetch_attempt_proof(attempt)
+    except Exception as e:
+        logger.error(f"Prefetching proof of attempt {attempt_id} failed: {e}")
+    finally:
+        close_old_connections()
+
+
+def schedule_proof_fetch(attempt_id, file_id):
+    """
+    Downloads an attempt's photo proof on the proof pool, once per file at a
+    time. At most GIVEAWAY_PROOF_FETCH_QUEUE (default 100) are queued; past
+    that it returns None and the next view of the proof asks again. Off
+    with GIVEAWAY_PROOF_PREFETCH = False.
+    """
+    if not getattr(settings, 'GIVEAWAY_PROOF_PREFETCH', True):
+        return None
+    with _in_flight_lock:
+        if file_id in _in_flight or len(_in_flight) >= getattr(settings, 'GIVEAWAY_PROOF_FETCH_QUEUE', 100):
+            return None
+        _in_flight.add(file_id)
+
+    def job():
+        try:
+            _fetch_job(attempt_id)
+        finally:
+            with _in_flight_lock:
+                _in_flight.discard(file_id)
+
+    return get_proof_executor().submit(job)
@@ -0,0 +1,153 @@
+import logging
+import unicodedata
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Max, Min
+from django.utils import timezone
+
+from .models import Questionnaire, QuestionAnswerStat, QuestionnaireProgress, UserAnswer
+
+logger = logging.getLogger(__name__)
+
+STRIP_CHARS = ' \t.,;:!?"\'`()[]'
+
+
+def normalize_answer(text):
+    """Groups free-text answers that only differ in case, spacing or surrounding punctuation"""
+    text = unicodedata.normalize('NFKC', text or '')
+    text = ' '.join(text.split()).casefold().strip(STRIP_CHARS)
+    return text[:255]
+
+
+def _bump_stat(question_id, normalized, sample, amount):
+    row = QuestionAnswerStat.objects.filter(question_id=question_id, normalized_answer=normalized)
+    if amount < 0:
+        row.update(count=F('count') + amount)
+        row.filter(count__lte=0).delete()
+        return
+    if row.update(count=F('count') + amount):
+        return
+    try:
+        with transaction.atomic():
+            QuestionAnswerStat.objects.create(question_id=question_id, normalized_answer=normalized, sample_answer=sample, count=amount)
+    except IntegrityError:
+        # Another process created the row first
+        row.update(count=F('count') + amount)
+
+
+def _refresh_progress(user_id, giveaway_id, at):
+    """Recounts one user's current answers for a giveaway (an indexed lookup of a few rows)"""
+    answered = UserAnswer.objects.filter(
+        user_id=user_id, question__giveaway_id=giveaway_id, superseded=False,
+    ).values('question_id').distinct().count()
+    total = Questionnaire.objects.filter(giveaway_id=giveaway_id).count()
+    progress, _ = QuestionnaireProgress.objects.get_or_create(user_id=user_id, giveaway_id=giveaway_id, defaults={'started_at': at})
+    progress.answered_count = answered
+    progress.question_count = total
+    if progress.started_at is None:
+        progress.started_at = at
+    if total and answered >= total:
+        progress.completed_at = progress.completed_at or at
+    else:
+        progress.completed_at = None
+    progress.save(update_fields=['answered_count', 'question_count', 'started_at', 'completed_at'])
+
+
+def question_asked(user, giveaway, question_count):
+    """Marks the start of a run when the first question is sent"""
+    progress, created = QuestionnaireProgress.objects.get_or_create(
+        user=user, giveaway=giveaway,
+        defaults={'started_at': timezone.now(), 'question_count': question_count},
+    )
+    if not created and progress.started_at is None:
+        QuestionnaireProgress.objects.filter(id=progress.id).update(started_at=timezone.now(), question_count=question_count)
+
+
+def record_answer(answer):
+    """Adds a newly inserted answer to the frequency table and the user's progress"""
+    giveaway_id = answer.question.giveaway_id
+    _bump_stat(answer.question_id, normalize_answer(answer.answer), answer.answer, 1)
+    _refresh_progress(answer.user_id, giveaway_id, answer.answered_at)
+
+
+def forget_answer(answer):
+    """Takes a deleted current answer back out of the statistics"""
+    _bump_stat(answer.question_id, normalize_answer(answer.answer), answer.answer, -1)
+    giveaway_id = Questionnaire.objects.filter(id=answer.question_id).values_list('giveaway_id', flat=True).first()
+    if giveaway_id:
+        _refresh_progress(answer.user_id, giveaway_id, timezone.now())
+
+
+def supersede_answers(user, giveaway):
+    """
+    Starts a retake: the user's current answers are kept as history but no
+    longer count, and the run restarts.
+    """
+    with transaction.atomic():
+        answers = UserAnswer.objects.filter(user=user, question__giveaway=giveaway, superseded=False)
+        counts = Counter(
+            (question_id, normalize_answer(text)) for question_id, text in answers.values_list('question_id', 'answer')
+        )
+        answers.update(superseded=True)
+        for (question_id, normalized), amount in counts.items():
+            _bump_stat(question_id, normalized, '', -amount)
+        QuestionnaireProgress.objects.filter(user=user, giveaway=giveaway).update(
+            answered_count=0, started_at=None, completed_at=None, retakes=F('retakes') + 1,
+        )
+
+
+def rebuild(giveaway_ids=None, chunk_size=2000):
+    """
+    Recomputes frequency tables and progress from UserAnswer, for backfills
+    and after bulk edits. Retake counts are kept.
+    Returns (stat rows, progress rows).
+    """
+    questions = Questionnaire.objects.all()
+    if giveaway_ids is not None:
+        questions = questions.filter(giveaway_id__in=giveaway_ids)
+    question_counts = dict(questions.values('giveaway_id').annotate(n=Count('id')).values_list('giveaway_id', 'n'))
+    answers = UserAnswer.objects.filter(superseded=False, question__in=questions)
+
+    stats = {}
+    for question_id, text in answers.values_list('question_id', 'answer').iterator(chunk_size=chunk_size):
+        key = (question_id, normalize_answer(text))
+        if key in stats:
+            stats[key].count += 1
+        else:
+            stats[key] = QuestionAnswerStat(question_id=question_id, normalized_answer=key[1], sample_answer=text, count=1)
+
+    progress_rows = answers.values('user_id', 'question__giveaway_id').annotate(
+        answered=Count('question_id', distinct=True), first=Min('answered_at'), last=Max('answered_at'),
+    )
+    existing = QuestionnaireProgress.objects.filter(giveaway_id__in=question_counts)
+    previous = {
+        (user_id, giveaway_id): (started_at, retakes)
+        for user_id, giveaway_id, started_at, retakes in existing.values_list('user_id', 'giveaway_id', 'started_at', 'retakes')
+    }
+    progress = []
+    for row in progress_rows.iterator(chunk_size=chunk_size):
+        key = (row['user_id'], row['question__giveaway_id'])
+        total = question_counts.get(key[1], 0)
+        started_at, retakes = previous.pop(key, (None, 0))
+        progress.append(QuestionnaireProgress(
+            user_id=key[0], giveaway_id=key[1],
+            answered_count=row['answered'], question_count=total,
+            started_at=min(filter(None, (started_at, row['first']))),
+            completed_at=row['last'] if total and row['answered'] >= total else None,
+            retakes=retakes,
+        ))
+    # Runs that were started but have no current answer yet
+    for (user_id, giveaway_id), (started_at, retakes) in previous.items():
+        progress.append(QuestionnaireProgress(
+            user_id=user_id, giveaway_id=giveaway_id, question_count=question_counts[giveaway_id],
+            started_at=started_at, retakes=retakes,
+        ))
+
+    with transaction.atomic():
+        QuestionAnswerStat.objects.filter(question__in=questions).delete()
+        QuestionAnswerStat.objects.bulk_create(stats.values(), batch_size=chunk_size)
+        existing.delete()
+        QuestionnaireProgress.objects.bulk_create(progress, batch_size=chunk_size)
+    logger.info(f"Rebuilt questionnaire statistics: {len(stats)} answer row(s), {len(progress)} progress row(s)")
+    return len(stats), len(progress)
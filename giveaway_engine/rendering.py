@@ -0,0 +1,123 @@
+import logging
+from string import Formatter
+
+logger = logging.getLogger(__name__)
+
+ALLOWED_VARIABLES = ('content', 'name')
+MAX_CACHED_RENDERERS = 4096
+
+_renderers = {}  # (template id, version) -> CompiledTemplate or None when invalid
+
+
+class TemplateError(ValueError):
+    pass
+
+
+class CompiledTemplate:
+    """
+    A message template parsed and validated once. Only the allowed
+    variables can appear, so render() is a single str.format call that
+    cannot fail on the content; a variable the caller doesn't pass renders
+    as an empty string.
+    """
+
+    def __init__(self, text):
+        self.text = text
+        self.variables = set()
+        try:
+            parsed = list(Formatter().parse(text))
+        except ValueError as e:
+            raise TemplateError(f"Malformed template: {e}")
+        for literal, field, spec, conversion in parsed:
+            if field is None:
+                continue
+            if field not in ALLOWED_VARIABLES:
+                allowed = ", ".join(f"{{{name}}}" for name in ALLOWED_VARIABLES)
+                raise TemplateError(f"Unknown variable {{{field}}}; allowed: {allowed}")
+            if conversion not in (None, 's', 'r', 'a'):
+                raise TemplateError(f"Unknown conversion !{conversion} in {{{field}}}")
+            if spec and any(brace in spec for brace in '{}'):
+                raise TemplateError(f"Nested placeholders are not allowed in {{{field}}}")
+            try:
+                format('', spec)
+            except ValueError as e:
+                raise TemplateError(f"Invalid format spec in {{{field}}}: {e}")
+            self.variables.add(field)
+        # Without variables the output never changes
+        self.static = ''.join(literal for literal, *_ in parsed) if not self.variables else None
+
+    def render(self, **values):
+        if self.static is not None:
+            return self.static
+        if not self.variables.issubset(values):
+            values = {**dict.fromkeys(self.variables, ''), **values}
+        return self.text.format(**values)
+
+
+def compile_template(text):
+    """Parses and validates template text; raises TemplateError"""
+    return CompiledTemplate(text)
+
+
+def get_renderer(template):
+    """
+    Compiled renderer of a MessageTemplate, cached by id and version.
+    Returns None for a template that doesn't compile (saved before
+    validation existed), so callers fall back to their default message.
+    """
+    key = (template.id, template.version)
+    try:
+        return _renderers[key]
+    except KeyError:
+        pass
+    try:
+        renderer = compile_template(template.content)
+    except TemplateError as e:
+        logger.error(f"Message template {template.id} v{template.version} is invalid: {e}")
+        renderer = None
+    cache_renderer(key, renderer)
+    return renderer
+
+
+def cache_renderer(key, renderer):
+    if len(_renderers) >= MAX_CACHED_RENDERERS:
+        _renderers.clear()
+    _renderers[key] = renderer
+
+
+def render(template, default=None, **values):
+    """Renders a MessageTemplate (None allowed), or returns default if there is none or it is invalid"""
+    if template is None:
+        return default
+    renderer = get_renderer(template)
+    if renderer is None:
+        return default
+    try:
+        return renderer.render(**values)
+    except (TypeError, ValueError) as e:
+        # e.g. a numeric format spec applied to a text value
+        logger.error(f"Failed to render message template {template.id}: {e}")
+        return default
+
+
+def render_many(template, values_list, default=None):
+    """
+    Renders one template (MessageTemplate, text or CompiledTemplate) for many
+    recipients, e.g. a broadcast; the template is compiled once.
+    """
+    if isinstance(template, CompiledTemplate):
+        renderer = template
+    elif isinstance(template, str):
+        renderer = compile_template(template)
+    else:
+        renderer = get_renderer(template) if template else None
+    results = []
+    for values in values_list:
+        if renderer is None:
+            results.append(default)
+            continue
+        try:
+            results.append(renderer.render(**values))
+        except (TypeError, ValueError):
+            results.append(default)
+    return results
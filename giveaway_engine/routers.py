@@ -0,0 +1,175 @@
+import functools
+import logging
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+logger = logging.getLogger(__name__)
+
+# Models written on the hot path that no handler reads back; writing them doesn't pin to the primary
+PIN_EXEMPT_MODELS = {'messagelog', 'updateprofile', 'funnelrollup', 'overloadevent', 'questionanswerstat'}
+WRITE_RE = re.compile(r'^\s*(?:INSERT\s+INTO|UPDATE|DELETE\s+FROM)\s+["`]?(\w+)', re.IGNORECASE)
+
+_state = threading.local()
+_lag_checks = {}  # alias -> (checked_at, healthy)
+
+
+def replica_aliases():
+    return list(getattr(settings, 'GIVEAWAY_READ_REPLICAS', []))
+
+
+def _replica_depth():
+    return getattr(_state, 'replica_depth', 0)
+
+
+def is_pinned():
+    return getattr(_state, 'pinned', False)
+
+
+def pin_to_primary():
+    """Send every further read of this update/request to the primary (it just wrote)"""
+    _state.pinned = True
+
+
+@functools.lru_cache(maxsize=None)
+def _exempt_tables():
+    from django.apps import apps
+    models = apps.get_app_config('giveaway_engine').get_models()
+    return frozenset(model._meta.db_table for model in models if model._meta.model_name in PIN_EXEMPT_MODELS)
+
+
+def _pin_on_write(execute, sql, params, many, context):
+    # Every write reaches the primary through here: save(), QuerySet.update()/delete(), bulk and raw SQL
+    if not is_pinned():
+        match = WRITE_RE.match(sql)
+        if match and match.group(1) not in _exempt_tables():
+            pin_to_primary()
+    return execute(sql, params, many, context)
+
+
+@contextmanager
+def read_from_replica():
+    """Allows reads inside the block to go to a replica unless pinned to the primary"""
+    _state.replica_depth = _replica_depth() + 1
+    try:
+        yield
+    finally:
+        _state.replica_depth -= 1
+
+
+@contextmanager
+def replica_scope(sticky=None):
+    """
+    Replica reads for one unit of work (an update, a report) that starts
+    unpinned. With a sticky key (e.g. bot and chat) a scope that wrote pins
+    the next scopes with the same key for GIVEAWAY_REPLICA_STICKY_SECONDS
+    (default 10), so a chat's next update can't read a replica that hasn't
+    caught up with its own writes yet.
+    """
+    replicas = replica_aliases()
+    sticky_key = f"replica_sticky_{sticky}" if sticky is not None and replicas else None
+    previous = is_pinned()
+    _state.pinned = bool(sticky_key and cache.get(sticky_key))
+    watch_writes = connections[DEFAULT_DB_ALIAS].execute_wrapper(_pin_on_write) if replicas else nullcontext()
+    try:
+        with watch_writes, read_from_replica():
+            yield
+    finally:
+        if sticky_key and is_pinned():
+            cache.set(sticky_key, 1, timeout=getattr(settings, 'GIVEAWAY_REPLICA_STICKY_SECONDS', 10))
+        _state.pinned = previous
+
+
+def replica_lag_seconds(alias):
+    """Replication lag of a PostgreSQL standby; 0 for other backends (e.g. two local SQLite files)"""
+    connection = connections[alias]
+    if connection.vendor != 'postgresql':
+        return 0.0
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT CASE WHEN pg_is_in_recovery() THEN "
+            "COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) ELSE 0 END"
+        )
+        return float(cursor.fetchone()[0])
+
+
+def healthy_replicas():
+    """Replicas whose lag is under GIVEAWAY_REPLICA_MAX_LAG_SECONDS (default 5); checked every few seconds per process"""
+    max_lag = getattr(settings, 'GIVEAWAY_REPLICA_MAX_LAG_SECONDS', 5)
+    now = time.monotonic()
+    healthy = []
+    for alias in replica_aliases():
+        checked_at, ok = _lag_checks.get(alias, (0, False))
+        if now - checked_at >= 5:
+            try:
+                ok = replica_lag_seconds(alias) <= max_lag
+            except Exception as e:
+                logger.error(f"Replica {alias} unavailable: {e}")
+                ok = False
+            _lag_checks[alias] = (now, ok)
+        if ok:
+            healthy.append(alias)
+    return healthy
+
+
+class ReplicaRouter:
+    """
+    Sends reads to a healthy replica only inside read_from_replica() /
+    replica_scope(), never once the update pinned itself to the primary by
+    writing, and never inside a transaction on the primary. Everything
+    else uses the default routing.
+
+        DATABASE_ROUTERS = ['giveaway_engine.routers.ReplicaRouter']
+        GIVEAWAY_READ_REPLICAS = ['replica']
+    """
+
+    def db_for_read(self, model, **hints):
+        if not _replica_depth():
+            return None
+        # Explicit, so related lookups on rows fetched from a replica follow the pin too
+        if is_pinned() or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        replicas = healthy_replicas()
+        return random.choice(replicas) if replicas else DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *replica_aliases()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+
+class ReplicaReadsAdminMixin:
+    """
+    Runs and renders reporting changelists against a replica; actions
+    (POST) stay on the primary. Summaries computed from the filtered
+    changelist go in add_report_context so they read from the replica too.
+    """
+
+    def changelist_view(self, request, extra_context=None):
+        if request.method != 'GET':
+            return self._report_changelist_view(request, extra_context)
+        with replica_scope():
+            response = self._report_changelist_view(request, extra_context)
+            if hasattr(response, 'render'):
+                response.render()
+        return response
+
+    def _report_changelist_view(self, request, extra_context):
+        response = super().changelist_view(request, extra_context)
+        context = getattr(response, 'context_data', None)
+        if context and context.get('cl') is not None:
+            self.add_report_context(context, context['cl'])
+        return response
+
+    def add_report_context(self, context, cl):
+        pass
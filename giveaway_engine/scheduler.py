@@ -0,0 +1,196 @@
+import heapq
+import logging
+import time
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from . import overload
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_SEQ_KEY = "follow_up_outbox_seq"
+OUTBOX_ENTRY_TIMEOUT = 3600
+LEASE_KEY = "follow_up_scheduler_lease"
+
+
+def announce_follow_up(attempt_id, due_at):
+    """
+    Publishes a newly scheduled follow-up to the cache outbox.
+    A running scheduler picks it up on its next tick; if the cache is not
+    shared (or the entry expires) the scheduler's periodic DB refresh still
+    finds it.
+    """
+    try:
+        cache.add(OUTBOX_SEQ_KEY, 0, timeout=None)
+        seq = cache.incr(OUTBOX_SEQ_KEY)
+        cache.set(f"follow_up_outbox_{seq}", (attempt_id, due_at.timestamp()), timeout=OUTBOX_ENTRY_TIMEOUT)
+    except Exception as e:
+        logger.error(f"Failed to announce follow-up for attempt {attempt_id}: {e}")
+
+
+class FollowUpScheduler:
+    """
+    Keeps a min-heap of upcoming follow-up deadlines and fires each one
+    close to its due time. Only the instance holding the cache lease fires;
+    the per-row claim in utils.claim_due_follow_ups prevents double sends
+    if two instances briefly overlap.
+
+    With a sharding.ShardCoordinator every instance fires, each only for the
+    bots in the shards it owns.
+    """
+
+    def __init__(self, worker_id, horizon_seconds=300, refresh_seconds=60, lease_seconds=30, batch_size=100, coordinator=None):
+        self.worker_id = worker_id
+        self.horizon_seconds = horizon_seconds
+        self.refresh_seconds = refresh_seconds
+        self.lease_seconds = lease_seconds
+        self.batch_size = batch_size
+        self.heap = []
+        self.scheduled = set()
+        self.outbox_seq = None
+        self.last_refresh = 0
+        self.coordinator = coordinator
+        self.bot_ids = None
+        self.last_rebalance = 0
+
+    # Lease
+    def acquire_lease(self):
+        if self.coordinator:
+            return self.refresh_shards()
+        if cache.add(LEASE_KEY, self.worker_id, timeout=self.lease_seconds):
+            return True
+        if cache.get(LEASE_KEY) == self.worker_id:
+            cache.set(LEASE_KEY, self.worker_id, timeout=self.lease_seconds)
+            return True
+        return False
+
+    def refresh_shards(self):
+        if time.monotonic() - self.last_rebalance < self.lease_seconds / 3:
+            return True
+        bot_ids = set(self.coordinator.bot_ids())
+        self.last_rebalance = time.monotonic()
+        if bot_ids != self.bot_ids:
+            # Bots moved between shards: rebuild the heap for the new set
+            self.bot_ids = bot_ids
+            self.heap, self.scheduled = [], set()
+            self.last_refresh = 0
+        return True
+
+    def release_lease(self):
+        if self.coordinator:
+            self.coordinator.release()
+            return
+        if cache.get(LEASE_KEY) == self.worker_id:
+            cache.delete(LEASE_KEY)
+
+    # Heap maintenance
+    def push(self, attempt_id, due_ts):
+        if attempt_id in self.scheduled:
+            return
+        self.scheduled.add(attempt_id)
+        heapq.heappush(self.heap, (due_ts, attempt_id))
+
+    def refresh_from_db(self):
+        """
+        Loads every unsent follow-up due before now + horizon. On startup this
+        rebuilds the heap (including anything overdue from downtime).
+        """
+        from .models import GiveawayAttempt
+        until = timezone.now() + timedelta(seconds=self.horizon_seconds)
+        rows = GiveawayAttempt.objects.filter(
+            status='approved',
+            follow_up_sent=False,
+            follow_up_due_at__lte=until,
+        )
+        if self.bot_ids is not None:
+            rows = rows.filter(giveaway__bot_id__in=self.bot_ids)
+        rows = rows.values_list('id', 'follow_up_due_at')
+        for attempt_id, due_at in rows.iterator(chunk_size=1000):
+            self.push(attempt_id, due_at.timestamp())
+        self.last_refresh = time.monotonic()
+
+    def drain_outbox(self):
+        current = cache.get(OUTBOX_SEQ_KEY) or 0
+        if self.outbox_seq is None or current < self.outbox_seq:
+            # First run or the counter was reset; the DB refresh covers the gap
+            self.outbox_seq = current
+            return
+        if current == self.outbox_seq:
+            return
+        keys = [f"follow_up_outbox_{seq}" for seq in range(self.outbox_seq + 1, current + 1)]
+        for entry in cache.get_many(keys).values():
+            attempt_id, due_ts = entry
+            self.push(attempt_id, due_ts)
+        self.outbox_seq = current
+
+    # Firing
+    def pop_due(self):
+        now_ts = time.time()
+        due_ids = []
+        while self.heap and self.heap[0][0] <= now_ts and len(due_ids) < self.batch_size:
+            _, attempt_id = heapq.heappop(self.heap)
+            self.scheduled.discard(attempt_id)
+            due_ids.append(attempt_id)
+        return due_ids
+
+    def fire(self, attempt_ids):
+        from .utils import claim_due_follow_ups, dispatch_follow_ups
+        claimed = claim_due_follow_ups(
+            self.worker_id,
+            batch_size=len(attempt_ids),
+            lease_seconds=300,
+            bot_ids=self.bot_ids,
+            attempt_ids=attempt_ids,
+        )
+        if not claimed:
+            return 0
+        sent = dispatch_follow_ups(claimed, self.worker_id)
+        logger.info(f"Follow-up scheduler sent {sent}/{len(claimed)} follow-up(s)")
+        return sent
+
+    def seconds_until_next(self, tick):
+        if not self.heap:
+            return tick
+        return max(0, min(tick, self.heap[0][0] - time.time()))
+
+    def run(self, tick=1.0, should_stop=lambda: False):
+        is_leader = False
+        try:
+            while not should_stop():
+                if not self.acquire_lease():
+                    if is_leader:
+                        logger.info("Follow-up scheduler lost its lease, standing by")
+                        self.heap, self.scheduled = [], set()
+                        is_leader = False
+                    time.sleep(tick)
+                    continue
+
+                if not is_leader:
+                    logger.info(f"Follow-up scheduler {self.worker_id} acquired lease, rebuilding heap")
+                    self.outbox_seq = None
+                    self.drain_outbox()
+                    self.refresh_from_db()
+                    is_leader = True
+
+                if time.monotonic() - self.last_refresh >= self.refresh_seconds:
+                    self.refresh_from_db()
+                self.drain_outbox()
+
+                if overload.current_level() >= overload.DEFER_SENDS:
+                    # Keep everything in the heap until the overload passes
+                    time.sleep(tick)
+                    continue
+
+                due_ids = self.pop_due()
+                while due_ids:
+                    try:
+                        self.fire(due_ids)
+                    except Exception as e:
+                        logger.error(f"Follow-up scheduler failed to fire {due_ids}: {e}")
+                    due_ids = self.pop_due()
+
+                time.sleep(self.seconds_until_next(tick))
+        finally:
+            self.release_lease()
@@ -0,0 +1,143 @@
+import logging
+import re
+
+from django.db import connections
+from django.db.models import FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Coalesce
+
+logger = logging.getLogger(__name__)
+
+# model label -> (text column, FTS5 shadow table on SQLite)
+SEARCHABLE = {
+    'giveaway_engine.messagelog': ('content', 'giveaway_engine_messagelog_fts'),
+    'giveaway_engine.useranswer': ('answer', 'giveaway_engine_useranswer_fts'),
+}
+
+
+def sqlite_sync_triggers(table, column, fts_table):
+    """
+    The triggers keeping an external-content FTS5 table in sync with its
+    base table, as (name, CREATE statement). SQLite drops them whenever a
+    migration rebuilds the base table, so such migrations recreate them.
+    """
+    return [
+        (f"{fts_table}_ai",
+         f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ai AFTER INSERT ON {table} BEGIN "
+         f"INSERT INTO {fts_table}(rowid, {column}) VALUES (new.id, new.{column}); END"),
+        (f"{fts_table}_ad",
+         f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ad AFTER DELETE ON {table} BEGIN "
+         f"INSERT INTO {fts_table}({fts_table}, rowid, {column}) VALUES ('delete', old.id, old.{column}); END"),
+        (f"{fts_table}_au",
+         f"CREATE TRIGGER IF NOT EXISTS {fts_table}_au AFTER UPDATE OF {column} ON {table} BEGIN "
+         f"INSERT INTO {fts_table}({fts_table}, rowid, {column}) VALUES ('delete', old.id, old.{column}); "
+         f"INSERT INTO {fts_table}(rowid, {column}) VALUES (new.id, new.{column}); END"),
+    ]
+
+
+def restore_sqlite_sync(schema_editor, table, column, fts_table):
+    """For migrations: recreates the sync triggers of an existing FTS5 table and rebuilds its index"""
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite' or not _sqlite_table_exists(connection, fts_table):
+        return
+    for _, statement in sqlite_sync_triggers(table, column, fts_table):
+        schema_editor.execute(statement)
+    schema_editor.execute(f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild')")
+
+
+def _fts5_query(term):
+    """Quotes every word so user input can't inject FTS5 syntax; the last word matches as a prefix"""
+    words = re.findall(r"\w+", term)
+    if not words:
+        return None
+    quoted = ['"' + word.replace('"', '""') + '"' for word in words]
+    quoted[-1] += '*'
+    return " ".join(quoted)
+
+
+def _sqlite_table_exists(connection, table):
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [table])
+        return cursor.fetchone() is not None
+
+
+def _sqlite_search_ready(connection, model):
+    """The FTS5 table and all of its sync triggers exist; without a trigger the index goes stale"""
+    column, fts_table = SEARCHABLE[model._meta.label_lower]
+    expected = {fts_table} | {name for name, _ in sqlite_sync_triggers(model._meta.db_table, column, fts_table)}
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT name FROM sqlite_master WHERE name IN ({', '.join(['%s'] * len(expected))})", sorted(expected),
+        )
+        found = {row[0] for row in cursor.fetchall()}
+    if fts_table in found and found != expected:
+        logger.warning(
+            f"Full-text index {fts_table} is missing its sync triggers {sorted(expected - found)}; "
+            f"searching {model._meta.label} with LIKE until a migration restores them"
+        )
+    return found == expected
+
+
+def is_search_available(model, using='default'):
+    if model._meta.label_lower not in SEARCHABLE:
+        return False
+    connection = connections[using]
+    if connection.vendor == 'postgresql':
+        return True
+    if connection.vendor == 'sqlite':
+        return _sqlite_search_ready(connection, model)
+    return False
+
+
+def search_vector(model):
+    """Must stay the expression of the GIN index on PostgreSQL (migration 0029)"""
+    from django.contrib.postgres.search import SearchVector
+    column, _ = SEARCHABLE[model._meta.label_lower]
+    return SearchVector(column, config='simple')
+
+
+def _related_filter(queryset, term, related_fields):
+    # Each related lookup is a subquery on the related table, not a join scanned for every row
+    related = Q()
+    for field in related_fields:
+        relation, lookup = field.split('__', 1)
+        related_model = queryset.model._meta.get_field(relation).related_model
+        related |= Q(**{f"{relation}__in": related_model.objects.filter(**{f"{lookup}__icontains": term}).values('pk')})
+    return related
+
+
+def full_text_search(queryset, term, related_fields=()):
+    """
+    Filters queryset to rows whose text matches term, or whose
+    related_fields (e.g. 'user__username') contain it, and annotates
+    search_rank (higher is better; rows matched only through a related
+    field rank last). Returns None when no full-text index is available so
+    callers can fall back to icontains.
+    """
+    model = queryset.model
+    using = queryset.db
+    if not term.strip() or not is_search_available(model, using):
+        return None
+    related = _related_filter(queryset, term, related_fields)
+
+    if connections[using].vendor == 'postgresql':
+        from django.contrib.postgres.search import SearchQuery, SearchRank
+        query = SearchQuery(term, config='simple')
+        vector = search_vector(model)
+        return queryset.alias(search_vector=vector).filter(Q(search_vector=query) | related).annotate(
+            search_rank=SearchRank(vector, query),
+        )
+
+    match = _fts5_query(term)
+    if match is None:
+        return queryset.filter(related) if related else queryset.none()
+    _, fts_table = SEARCHABLE[model._meta.label_lower]
+    matching = Q(id__in=RawSQL(f"SELECT rowid FROM {fts_table} WHERE {fts_table} MATCH %s", [match]))
+    # bm25() is best when lowest; rows matched through related_fields have no FTS row
+    rank = RawSQL(
+        f'SELECT -bm25({fts_table}) FROM {fts_table} WHERE {fts_table} MATCH %s AND rowid = "{model._meta.db_table}"."id"',
+        [match],
+    )
+    return queryset.filter(matching | related).annotate(
+        search_rank=Coalesce(rank, Value(0.0), output_field=FloatField()),
+    )
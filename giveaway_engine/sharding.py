@@ -0,0 +1,122 @@
+import bisect
+import hashlib
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import ShardLease, ShardWorker, TelegramBot
+
+logger = logging.getLogger(__name__)
+
+
+def _hash(value):
+    return int(hashlib.md5(str(value).encode()).hexdigest()[:16], 16)
+
+
+def shard_count():
+    return getattr(settings, 'GIVEAWAY_SHARD_COUNT', 64)
+
+
+def shard_for_bot(bot_id, shards=None):
+    """Fixed bot -> shard mapping; the shard count must be the same on every worker"""
+    return _hash(f"bot:{bot_id}") % (shards or shard_count())
+
+
+class HashRing:
+    """Consistent hash ring: adding or removing a node only moves the keys next to it"""
+
+    def __init__(self, nodes, replicas=100):
+        self.ring = sorted((_hash(f"{node}#{i}"), node) for node in nodes for i in range(replicas))
+        self.points = [point for point, _ in self.ring]
+
+    def get(self, key):
+        if not self.ring:
+            return None
+        index = bisect.bisect(self.points, _hash(key)) % len(self.ring)
+        return self.ring[index][1]
+
+
+class ShardCoordinator:
+    """
+    Splits bots between the live workers of a group.
+
+    Every worker heartbeats into ShardWorker and places the live workers on a
+    hash ring; the shards that land on it are the ones it wants. Ownership
+    is a ShardLease row, so a shard changes hands only after the previous
+    owner released it or its lease ran out (the owner died). A worker keeps
+    renewing a shard it no longer wants while the caller still has bots of
+    it running (busy_bot_ids), so the next owner can't start before they
+    stopped. Call rebalance() more often than lease_seconds.
+    """
+
+    def __init__(self, group, worker_id, lease_seconds=30, shards=None):
+        self.group = group
+        self.worker_id = worker_id
+        self.lease_seconds = lease_seconds
+        self.shards = shards or shard_count()
+        self.owned = set()
+        self.wanted = set()
+
+    def heartbeat(self):
+        now = timezone.now()
+        ShardWorker.objects.update_or_create(group=self.group, worker_id=self.worker_id, defaults={'heartbeat_at': now})
+        ShardWorker.objects.filter(group=self.group, heartbeat_at__lt=now - timedelta(seconds=self.lease_seconds * 3)).delete()
+
+    def live_workers(self):
+        since = timezone.now() - timedelta(seconds=self.lease_seconds)
+        return sorted(ShardWorker.objects.filter(group=self.group, heartbeat_at__gte=since).values_list('worker_id', flat=True))
+
+    def wanted_shards(self, workers):
+        ring = HashRing(workers)
+        return {shard for shard in range(self.shards) if ring.get(f"shard:{shard}") == self.worker_id}
+
+    def rebalance(self, busy_bot_ids=()):
+        """
+        Renews, takes and releases leases; returns the set of shards this
+        worker owns. Shards of busy_bot_ids that it still owns are held on
+        to even when they moved to another worker.
+        """
+        self.heartbeat()
+        wanted = self.wanted_shards(self.live_workers())
+        held = {shard_for_bot(bot_id, self.shards) for bot_id in busy_bot_ids} & self.owned
+        keep = wanted | held
+        now = timezone.now()
+        expires_at = now + timedelta(seconds=self.lease_seconds)
+        leases = ShardLease.objects.filter(group=self.group)
+
+        leases.filter(owner=self.worker_id).exclude(shard__in=keep).delete()
+        leases.filter(Q(shard__in=keep, owner=self.worker_id) | Q(shard__in=wanted, expires_at__lt=now)).update(owner=self.worker_id, expires_at=expires_at)
+        missing = wanted - set(leases.filter(shard__in=wanted).values_list('shard', flat=True))
+        if missing:
+            ShardLease.objects.bulk_create(
+                [ShardLease(group=self.group, shard=shard, owner=self.worker_id, expires_at=expires_at) for shard in missing],
+                ignore_conflicts=True,
+            )
+
+        owned = set(leases.filter(owner=self.worker_id, expires_at__gt=now).values_list('shard', flat=True))
+        if owned != self.owned:
+            logger.info(f"Shard group {self.group}: {self.worker_id} owns {len(owned)}/{self.shards} shard(s), wants {len(wanted)}")
+        self.owned = owned
+        self.wanted = wanted
+        return owned
+
+    def bot_ids(self, busy_bot_ids=()):
+        """
+        Rebalances and returns the ids of the active bots in the owned shards
+        this worker should run; bots of held shards are left out so the caller
+        winds them down.
+        """
+        shards = self.rebalance(busy_bot_ids) & self.wanted
+        return [
+            bot_id for bot_id in TelegramBot.objects.filter(is_active=True).values_list('id', flat=True)
+            if shard_for_bot(bot_id, self.shards) in shards
+        ]
+
+    def release(self):
+        """Gives up every lease at once; only call it once nothing of them is running any more"""
+        ShardLease.objects.filter(group=self.group, owner=self.worker_id).delete()
+        ShardWorker.objects.filter(group=self.group, worker_id=self.worker_id).delete()
+        self.owned = set()
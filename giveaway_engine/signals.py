@@ -0,0 +1,54 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .bot_table import bot_table_changed
+from .models import GiveawayAttempt, TelegramBot, UserAnswer
+from .progress import refresh_progress
+from .proof_media import schedule_proof_fetch
+from .questionnaire import forget_answer, record_answer
+from .scheduler import announce_follow_up
+
+
+@receiver(post_save, sender=GiveawayAttempt)
+def announce_scheduled_follow_up(sender, instance, **kwargs):
+    """Tell a running follow-up scheduler about newly scheduled follow-ups"""
+    if instance.follow_up_due_at and not instance.follow_up_sent:
+        attempt_id, due_at = instance.id, instance.follow_up_due_at
+        transaction.on_commit(lambda: announce_follow_up(attempt_id, due_at))
+
+
+@receiver(post_save, sender=GiveawayAttempt)
+def prefetch_photo_proof(sender, instance, created, **kwargs):
+    """Download photo proofs while they wait for review, so admin pages never call Telegram"""
+    if created and instance.proof_type == 'photo' and instance.user_proof:
+        attempt_id, file_id = instance.id, instance.user_proof
+        transaction.on_commit(lambda: schedule_proof_fetch(attempt_id, file_id))
+
+
+@receiver(post_save, sender=GiveawayAttempt)
+@receiver(post_delete, sender=GiveawayAttempt)
+def refresh_user_progress(sender, instance, **kwargs):
+    """Keep the cached progress of the attempt's user in step (admin edits included)"""
+    user_id = instance.user_id
+    transaction.on_commit(lambda: refresh_progress([user_id]))
+
+
+@receiver(post_save, sender=TelegramBot)
+@receiver(post_delete, sender=TelegramBot)
+def reload_bot_table(sender, **kwargs):
+    """Token, is_active or the flood limits may have changed; every process reloads once it's committed"""
+    transaction.on_commit(bot_table_changed)
+
+
+@receiver(post_save, sender=UserAnswer)
+def count_new_answer(sender, instance, created, **kwargs):
+    """Maintain the questionnaire statistics incrementally"""
+    if created and not instance.superseded:
+        transaction.on_commit(lambda: record_answer(instance))
+
+
+@receiver(post_delete, sender=UserAnswer)
+def uncount_deleted_answer(sender, instance, **kwargs):
+    if not instance.superseded:
+        transaction.on_commit(lambda: forget_answer(instance))
@@ -0,0 +1,126 @@
+import json
+import threading
+from collections import Counter
+
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import RequestFactory, TestCase, override_settings
+
+from giveaway_engine import metrics, rendering
+from giveaway_engine.bot_table import invalidate_bot_table, load_bot_table
+from giveaway_engine.views import TelegramWebhookView
+
+from .stub_api import StubBotAPI
+
+# Everything that would make counts depend on timing or deployment
+QUIET_SETTINGS = {
+    'CACHES': {'default': {'BACKEND': 'giveaway_engine.tests.base.CountingCache', 'LOCATION': 'giveaway-tests'}},
+    'GIVEAWAY_OVERLOAD': {'enabled': False},
+    'GIVEAWAY_PROFILING': {'enabled': False},
+    'GIVEAWAY_READ_REPLICAS': [],
+    'GIVEAWAY_METRICS_FLUSH_SECONDS': 10 ** 9,
+    'GIVEAWAY_SYNC_BOT_PROFILE_IN_BACKGROUND': False,
+    'GIVEAWAY_PROOF_PREFETCH': False,
+}
+
+CACHE_OPERATIONS = (
+    'add', 'get', 'set', 'touch', 'delete', 'has_key', 'incr', 'decr',
+    'get_many', 'set_many', 'delete_many', 'get_or_set', 'clear',
+)
+
+cache_operations = Counter()
+_nesting = threading.local()
+
+
+def _counted(name):
+    def method(self, *args, **kwargs):
+        depth = getattr(_nesting, 'depth', 0)
+        # get_many() is get() per key underneath: count what the caller asked for
+        if not depth:
+            cache_operations[name] += 1
+        _nesting.depth = depth + 1
+        try:
+            return getattr(LocMemCache, name)(self, *args, **kwargs)
+        finally:
+            _nesting.depth = depth
+    method.__name__ = name
+    return method
+
+
+class CountingCache(LocMemCache):
+    """Local-memory cache that counts every operation made through the cache API"""
+
+
+for _name in CACHE_OPERATIONS:
+    setattr(CountingCache, _name, _counted(_name))
+
+
+def make_update(chat_id, message, update_id):
+    """message is text, {'contact': phone}, {'photo': file_id} or {'text': ..., 'first_name': ...}"""
+    if not isinstance(message, dict):
+        message = {'text': message}
+    body = {
+        'message_id': update_id, 'date': 0,
+        'chat': {'id': chat_id, 'type': 'private'},
+        'from': {'id': chat_id, 'first_name': message.get('first_name', 'Tester')},
+    }
+    if 'contact' in message:
+        body['contact'] = {'phone_number': message['contact'], 'user_id': chat_id}
+    elif 'photo' in message:
+        body['photo'] = [{'file_id': message['photo'], 'file_unique_id': message['photo'][-16:], 'width': 1280, 'height': 960}]
+    else:
+        body['text'] = message['text']
+    return {'update_id': update_id, 'message': body}
+
+
+@override_settings(**QUIET_SETTINGS)
+class WebhookTestCase(TestCase):
+    """
+    Runs updates through the webhook view with the Bot API pointed at a
+    StubBotAPI (self.stub), the cache counting its operations and the
+    on-commit work of each update run right after it, as in production.
+    """
+    chat_id = 7_000_001
+
+    @classmethod
+    def setUpClass(cls):
+        cls.stub = StubBotAPI().start()
+        cls.addClassCleanup(cls.stub.stop)
+        api_url = override_settings(GIVEAWAY_TELEGRAM_API_URL=cls.stub.url)
+        api_url.enable()
+        cls.addClassCleanup(api_url.disable)
+        super().setUpClass()
+
+    def setUp(self):
+        cache.clear()
+        # Compiled templates are keyed by id, which rolled back tests hand out again
+        rendering._renderers.clear()
+        invalidate_bot_table()
+        self.update_id = 0
+        self.stub.blocked_chats.clear()
+
+    def tearDown(self):
+        # Counters of this test's bots go into this test's transaction
+        metrics.flush()
+        invalidate_bot_table()
+
+    def send(self, bot, message, chat_id=None):
+        self.update_id += 1
+        data = make_update(chat_id or self.chat_id, message, self.update_id)
+        request = RequestFactory().post('/webhook/', json.dumps(data), content_type='application/json')
+        with self.captureOnCommitCallbacks(execute=True):
+            response = TelegramWebhookView.as_view()(request, token=bot.token)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def assertUpdateCosts(self, bot, message, queries, cache_ops, telegram_calls):
+        """Sends one update and checks its exact number of queries, cache operations and Bot API calls"""
+        load_bot_table()
+        metrics.flush()
+        calls_before = len(self.stub.calls)
+        cache_operations.clear()
+        with self.assertNumQueries(queries):
+            self.send(bot, message)
+        counted = dict(cache_operations)
+        self.assertEqual(sum(counted.values()), cache_ops, f"Cache operations: {counted}")
+        self.assertEqual(len(self.stub.calls) - calls_before, telegram_calls, f"Bot API calls: {self.stub.calls[calls_before:]}")
@@ -0,0 +1,160 @@
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PATH_RE = re.compile(r"^/bot(?P<token>[^/]+)/(?P<method>\w+)$")
+FILE_RE = re.compile(r"^/file/bot(?P<token>[^/]+)/(?P<path>.+)$")
+
+
+class StubBotAPI:
+    """
+    Minimal in-process stand-in for the Telegram Bot API, for tests,
+    benchmarks and local polling runs. Point GIVEAWAY_TELEGRAM_API_URL at
+    .url to use it.
+
+    getUpdates serves updates queued with enqueue_update (honouring offset
+    and long-poll timeout), sendMessage is recorded in .calls and answers
+    403 for chats in .blocked_chats, getFile and /file/ downloads serve the
+    bytes registered with add_file, every other method answers
+    {"ok": true}. latency adds an artificial delay to each call to mimic a
+    real network round trip.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0):
+        self.latency = latency
+        self.lock = threading.Condition()
+        self.updates = {}       # token -> [update, ...]
+        self.next_update_id = {}
+        self.calls = []         # (token, method, payload)
+        self.webhooks = {}
+        self.blocked_chats = set()  # str chat ids that "blocked the bot"
+        self.files = {}         # file_id -> bytes
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length) if length else b''
+                self.respond(json.loads(body) if body else {})
+
+            def do_GET(self):
+                match = FILE_RE.match(self.path.split('?')[0])
+                if match:
+                    self.send_file(match.group('token'), match.group('path'))
+                else:
+                    self.respond({})
+
+            def send_file(self, token, path):
+                if api.latency:
+                    time.sleep(api.latency)
+                with api.lock:
+                    api.calls.append((token, 'file', {'file_path': path}))
+                data = api.files.get(path.rsplit('/', 1)[-1].rsplit('.', 1)[0])
+                self.send_response(200 if data is not None else 404)
+                self.send_header('Content-Type', 'application/octet-stream')
+                self.send_header('Content-Length', str(len(data or b'')))
+                self.end_headers()
+                self.wfile.write(data or b'')
+
+            def respond(self, payload):
+                match = PATH_RE.match(self.path.split('?')[0])
+                if not match:
+                    status, result = 404, {"ok": False, "error_code": 404, "description": "Not Found"}
+                else:
+                    status, result = api.handle(match.group('token'), match.group('method'), payload)
+                data = json.dumps(result).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def enqueue_update(self, token, message):
+        """Queues a message update for getUpdates and returns its update_id"""
+        with self.lock:
+            update_id = self.next_update_id.get(token, 1)
+            self.next_update_id[token] = update_id + 1
+            self.updates.setdefault(token, []).append({"update_id": update_id, "message": message})
+            self.lock.notify_all()
+        return update_id
+
+    def add_file(self, file_id, data):
+        """Makes bytes downloadable through getFile; file_id must be URL safe"""
+        self.files[file_id] = data
+
+    def sent_messages(self, token=None):
+        return [payload for call_token, method, payload in self.calls
+                if method == 'sendMessage' and (token is None or call_token == token)]
+
+    def handle(self, token, method, payload):
+        if self.latency:
+            time.sleep(self.latency)
+        with self.lock:
+            self.calls.append((token, method, payload))
+
+        if method == 'getUpdates':
+            return 200, {"ok": True, "result": self.get_updates(token, payload)}
+        if method == 'sendMessage' and str(payload.get('chat_id')) in self.blocked_chats:
+            return 403, {"ok": False, "error_code": 403, "description": "Forbidden: bot was blocked by the user"}
+        if method == 'sendMessage':
+            return 200, {"ok": True, "result": {"message_id": len(self.calls), "chat": {"id": payload.get('chat_id')}, "text": payload.get('text')}}
+        if method == 'getFile':
+            file_id = payload.get('file_id')
+            if file_id not in self.files:
+                return 400, {"ok": False, "error_code": 400, "description": "Bad Request: invalid file_id"}
+            result = {"file_id": file_id, "file_unique_id": file_id[:16], "file_size": len(self.files[file_id]), "file_path": f"photos/{file_id}.jpg"}
+            return 200, {"ok": True, "result": result}
+        if method == 'setWebhook':
+            self.webhooks[token] = payload
+            return 200, {"ok": True, "result": True}
+        if method == 'deleteWebhook':
+            self.webhooks.pop(token, None)
+            return 200, {"ok": True, "result": True}
+        if method == 'getWebhookInfo':
+            info = dict(self.webhooks.get(token, {"url": ""}), pending_update_count=len(self.updates.get(token, [])))
+            return 200, {"ok": True, "result": info}
+        if method.startswith('get'):
+            return 200, {"ok": True, "result": {}}
+        return 200, {"ok": True, "result": True}
+
+    def get_updates(self, token, payload):
+        offset = payload.get('offset') or 0
+        limit = payload.get('limit') or 100
+        deadline = time.monotonic() + min(payload.get('timeout') or 0, 5)
+        with self.lock:
+            while True:
+                queue = self.updates.get(token, [])
+                # Like Telegram: requesting an offset confirms every earlier update
+                queue[:] = [update for update in queue if update['update_id'] >= offset]
+                if queue or time.monotonic() >= deadline:
+                    return queue[:limit]
+                self.lock.wait(timeout=deadline - time.monotonic())
@@ -0,0 +1,74 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from giveaway_engine.models import (
+    Giveaway, GiveawayAttempt, MessageLog, Questionnaire, TelegramBot, TelegramUser, UserAnswer,
+)
+
+from .base import QUIET_SETTINGS
+
+
+@override_settings(ROOT_URLCONF='giveaway_engine.tests.urls', **QUIET_SETTINGS)
+class LargeChangelistQueryTests(TestCase):
+    """
+    Changelists of the large tables run a fixed number of queries per page,
+    however many rows there are: no per-row lookups and no repeated COUNT(*).
+    """
+    # model -> queries for a page: session, user, filter choices, the (cached) count, the page
+    budgets = {
+        MessageLog: 5,
+        GiveawayAttempt: 5,
+        TelegramUser: 5,
+        UserAnswer: 5,
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        cls.bot = TelegramBot.objects.create(name='Admin', username='admin_bot', token='admin-test-token')
+        cls.giveaway = Giveaway.objects.create(
+            bot=cls.bot, title='Giveaway', description='', sequence=1,
+            giveaway_type='standard', requirement_type='questionnaire', static_content='Link',
+        )
+        cls.question = Questionnaire.objects.create(giveaway=cls.giveaway, text='Question?', order=1)
+        cls.add_rows(10)
+
+    @classmethod
+    def add_rows(cls, count):
+        start = TelegramUser.objects.count()
+        for n in range(start, start + count):
+            user = TelegramUser.objects.create(bot=cls.bot, chat_id=str(8_000_000 + n), first_name=f"User {n}")
+            GiveawayAttempt.objects.create(user=user, giveaway=cls.giveaway, status='pending', user_proof=f"proof {n}")
+            MessageLog.objects.create(bot=cls.bot, user=user, direction='inbound', content=f"message {n}")
+            UserAnswer.objects.create(user=user, question=cls.question, answer=f"answer {n}")
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.admin)
+
+    def changelist_url(self, model):
+        return f"/admin/{model._meta.app_label}/{model._meta.model_name}/"
+
+    def assertPageQueries(self, model, url):
+        with self.assertNumQueries(self.budgets[model]):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_changelist_pages_have_a_fixed_query_budget(self):
+        for model in self.budgets:
+            with self.subTest(model._meta.model_name):
+                self.assertPageQueries(model, self.changelist_url(model))
+                self.add_rows(30)
+                cache.clear()
+                self.assertPageQueries(model, self.changelist_url(model))
+
+    def test_keyset_next_page_has_the_same_budget(self):
+        self.add_rows(120)
+        for model in self.budgets:
+            with self.subTest(model._meta.model_name):
+                response = self.assertPageQueries(model, self.changelist_url(model))
+                next_url = response.context_data.get('keyset_next_url')
+                self.assertTrue(next_url)
+                self.assertPageQueries(model, self.changelist_url(model) + next_url)
@@ -0,0 +1,99 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.test import override_settings
+
+from giveaway_engine import metrics
+from giveaway_engine.approvals import approve_attempts
+from giveaway_engine.models import (
+    FunnelRollup, Giveaway, GiveawayAttempt, GiveawayItem, MessageTemplate, TelegramBot, TelegramUser,
+)
+
+from .base import WebhookTestCase
+
+
+class ApprovalCounterTests(WebhookTestCase):
+    """Funnel counters of approvals only count what was committed"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.bot = TelegramBot.objects.create(name='Approvals', username='approvals_bot', token='approvals-test-token')
+        cls.giveaway = Giveaway.objects.create(
+            bot=cls.bot, title='Giveaway', description='', sequence=1,
+            giveaway_type='unique', requirement_type='manual_approval', static_content='',
+        )
+        GiveawayItem.objects.create(giveaway=cls.giveaway, content='CODE-1')
+        cls.attempts = [
+            GiveawayAttempt.objects.create(
+                user=TelegramUser.objects.create(bot=cls.bot, chat_id=str(9_100_000 + n), first_name='Tester'),
+                giveaway=cls.giveaway, status='pending', user_proof='proof',
+            )
+            for n in range(2)
+        ]
+
+    def setUp(self):
+        super().setUp()
+        metrics.flush()
+
+    def counted(self):
+        metrics.flush()
+        rollup = FunnelRollup.objects.filter(giveaway=self.giveaway).first()
+        return (rollup.approvals, rollup.out_of_stock) if rollup else (0, 0)
+
+    def test_counted_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            approve_attempts([attempt.id for attempt in self.attempts])
+        self.assertEqual(self.counted(), (0, 0))
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self.counted(), (1, 1))
+
+    def test_rolled_back_approval_is_not_counted(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                approve_attempts([attempt.id for attempt in self.attempts])
+                transaction.set_rollback(True)
+        self.assertEqual(self.counted(), (0, 0))
+
+
+@override_settings(ROOT_URLCONF='giveaway_engine.tests.urls')
+class AdminApprovalCounterTests(WebhookTestCase):
+    """Approving a unique giveaway with no codes left in the admin counts as out of stock only"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        cls.bot = TelegramBot.objects.create(name='Stock', username='stock_bot', token='stock-test-token')
+        cls.template = MessageTemplate.objects.create(bot=cls.bot, name='Branded', content='Your code: {content}')
+
+    def setUp(self):
+        super().setUp()
+        metrics.flush()
+        self.client.force_login(self.admin)
+
+    def approve_without_stock(self, template=None):
+        giveaway = Giveaway.objects.create(
+            bot=self.bot, title='Sold out', description='', sequence=1, approval_template=template,
+            giveaway_type='unique', requirement_type='manual_approval', static_content='',
+        )
+        attempt = GiveawayAttempt.objects.create(
+            user=TelegramUser.objects.create(bot=self.bot, chat_id='9200001', first_name='Tester'),
+            giveaway=giveaway, status='pending', user_proof='proof',
+        )
+        calls_before = len(self.stub.calls)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f'/admin/giveaway_engine/giveawayattempt/{attempt.pk}/change/', {
+                'status': 'approved', 'admin_notes': '', 'follow_up_claimed_by': '',
+            })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(len(self.stub.calls), calls_before)
+        attempt.refresh_from_db()
+        self.assertEqual(attempt.status, 'approved')
+        metrics.flush()
+        rollup = FunnelRollup.objects.get(giveaway=giveaway)
+        self.assertEqual((rollup.approvals, rollup.out_of_stock), (0, 1))
+
+    def test_out_of_stock(self):
+        self.approve_without_stock()
+
+    def test_out_of_stock_with_template(self):
+        self.approve_without_stock(self.template)
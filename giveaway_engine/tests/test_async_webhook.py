@@ -0,0 +1,67 @@
+import json
+
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.test import RequestFactory, TransactionTestCase, override_settings
+
+from giveaway_engine.async_views import telegram_webhook_async
+from giveaway_engine.bot_table import invalidate_bot_table
+from giveaway_engine.models import Giveaway, TelegramBot, TelegramUser, UpdateProfile
+
+from .base import QUIET_SETTINGS, make_update
+from .stub_api import StubBotAPI
+
+
+@override_settings(**QUIET_SETTINGS)
+class AsyncWebhookTests(TransactionTestCase):
+    """
+    The async webhook sends the replies after the handler thread is done:
+    they must still stop at a blocked chat and show up in update profiles.
+    Transactional, since the handler pool's threads use their own connections.
+    """
+    chat_id = 7_100_001
+
+    @classmethod
+    def setUpClass(cls):
+        cls.stub = StubBotAPI().start()
+        cls.addClassCleanup(cls.stub.stop)
+        api_url = override_settings(GIVEAWAY_TELEGRAM_API_URL=cls.stub.url)
+        api_url.enable()
+        cls.addClassCleanup(api_url.disable)
+        super().setUpClass()
+
+    def setUp(self):
+        cache.clear()
+        invalidate_bot_table()
+        self.addCleanup(invalidate_bot_table)
+        self.stub.blocked_chats.clear()
+        self.update_id = 0
+        self.bot = TelegramBot.objects.create(name='Async', username='async_bot', token='async-test-token')
+        Giveaway.objects.create(
+            bot=self.bot, title='Phone giveaway', description='', sequence=1,
+            giveaway_type='standard', requirement_type='phone_number', static_content='Link',
+        )
+
+    def send(self, message):
+        self.update_id += 1
+        data = make_update(self.chat_id, message, self.update_id)
+        request = RequestFactory().post('/webhook/', json.dumps(data), content_type='application/json')
+        calls_before = len(self.stub.calls)
+        response = async_to_sync(telegram_webhook_async)(request, token=self.bot.token)
+        self.assertEqual(response.status_code, 200)
+        return [method for _, method, _ in self.stub.calls[calls_before:]]
+
+    def test_replies_stop_at_a_blocked_chat(self):
+        self.send('/start')
+        self.send('1')
+        self.stub.blocked_chats.add(str(self.chat_id))
+        # Sharing the contact answers twice; the second reply is not attempted after the 403
+        self.assertEqual(self.send({'contact': '+15550100'}), ['sendMessage'])
+        self.assertTrue(TelegramUser.objects.get(bot=self.bot, chat_id=str(self.chat_id)).is_blocked)
+
+    def test_profile_records_the_async_replies(self):
+        with override_settings(GIVEAWAY_PROFILING={'enabled': True, 'chats': [self.chat_id]}):
+            self.send('/start')
+        profile = UpdateProfile.objects.get()
+        self.assertEqual(profile.telegram_call_count, 1)
+        self.assertEqual([call['method'] for call in json.loads(profile.telegram_calls)], ['sendMessage'])
@@ -0,0 +1,37 @@
+from django.core.cache import cache
+
+from giveaway_engine import bot_table
+from giveaway_engine.bot_table import get_bot, load_bot_table
+from giveaway_engine.models import TelegramBot
+
+from .base import WebhookTestCase
+
+
+class BotTableTests(WebhookTestCase):
+    """The in-process routing table follows bot changes made by any process (saves sync to the stub)"""
+
+    def setUp(self):
+        super().setUp()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.bot = TelegramBot.objects.create(name='Table', username='table_bot', token='table-test-token')
+
+    def test_saved_bot_is_reloaded(self):
+        self.assertEqual(get_bot(self.bot.token).flood_user_limit, None)
+        self.bot.flood_user_limit = 5
+        with self.captureOnCommitCallbacks(execute=True):
+            self.bot.save()
+        self.assertEqual(get_bot(self.bot.token).flood_user_limit, 5)
+
+    def test_change_in_another_process_is_seen(self):
+        load_bot_table()
+        self.assertIsNotNone(get_bot(self.bot.token))
+        # Another process deactivates the bot: its signal only reaches this one through the cache
+        TelegramBot.objects.filter(id=self.bot.id).update(is_active=False)
+        cache.set(bot_table.VERSION_KEY, 1)
+        self.assertIsNone(get_bot(self.bot.token))
+
+    def test_uncommitted_save_changes_nothing(self):
+        load_bot_table()
+        with self.captureOnCommitCallbacks(execute=False):
+            self.bot.save()
+        self.assertTrue(bot_table.is_fresh())
@@ -0,0 +1,103 @@
+from giveaway_engine.models import Giveaway, GiveawayItem, Questionnaire, TelegramBot, TelegramUser
+
+from .base import WebhookTestCase
+
+
+class FlowBudgetTests(WebhookTestCase):
+    """
+    Exact database queries, cache operations and Bot API calls of the last
+    update of each conversation flow. A change in either direction fails;
+    when it is intended, change the numbers together with the code. Query
+    counts include the SAVEPOINT/RELEASE pair of every atomic block, since
+    a TestCase runs inside a transaction.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        # One giveaway per claim path; the flows send their sequence numbers
+        cls.bot = TelegramBot.objects.create(name='Budget', username='budget_bot', token='flow-budget-token')
+        giveaways = {}
+        for sequence, giveaway_type, requirement in (
+            (1, 'unique', 'manual_approval'),
+            (2, 'standard', 'none'),
+            (3, 'unique', 'none'),
+            (4, 'unique', 'none'),
+            (5, 'standard', 'questionnaire'),
+            (6, 'standard', 'phone_number'),
+        ):
+            giveaways[sequence] = Giveaway.objects.create(
+                bot=cls.bot, title=f"Giveaway {sequence}", description='', sequence=sequence,
+                giveaway_type=giveaway_type, requirement_type=requirement, static_content=f"Link {sequence}",
+            )
+        # Stock for one unique claim; giveaway 4 stays out of stock
+        GiveawayItem.objects.create(giveaway=giveaways[3], content='CODE-1')
+        Questionnaire.objects.create(giveaway=giveaways[5], text='First question?', order=1)
+        Questionnaire.objects.create(giveaway=giveaways[5], text='Second question?', order=2)
+
+    def run_flow(self, *messages):
+        for message in messages:
+            self.send(self.bot, message)
+
+    def test_start(self):
+        self.assertUpdateCosts(self.bot, '/start', queries=8, cache_ops=2, telegram_calls=1)
+
+    def test_start_with_flood_limit(self):
+        # The per-chat flood limit is opt-in; it costs cache operations only
+        TelegramBot.objects.filter(id=self.bot.id).update(flood_user_limit=20)
+        self.bot.refresh_from_db()
+        self.assertUpdateCosts(self.bot, '/start', queries=8, cache_ops=5, telegram_calls=1)
+
+    def test_profile_change(self):
+        self.run_flow('/start')
+        self.assertUpdateCosts(self.bot, {'text': '/start', 'first_name': 'Renamed'}, queries=6, cache_ops=2, telegram_calls=1)
+
+    def test_numeric_claim(self):
+        self.run_flow('/start')
+        self.assertUpdateCosts(self.bot, '2', queries=7, cache_ops=4, telegram_calls=1)
+
+    def test_claim_command(self):
+        self.run_flow('/start')
+        self.assertUpdateCosts(self.bot, '/claim_2', queries=7, cache_ops=4, telegram_calls=1)
+
+    def test_unique_claim(self):
+        self.run_flow('/start')
+        self.assertUpdateCosts(self.bot, '3', queries=9, cache_ops=4, telegram_calls=1)
+
+    def test_out_of_stock(self):
+        self.run_flow('/start')
+        self.assertUpdateCosts(self.bot, '4', queries=6, cache_ops=3, telegram_calls=1)
+
+    def test_questionnaire_step(self):
+        self.run_flow('/start', '5')
+        self.assertUpdateCosts(self.bot, 'first answer', queries=18, cache_ops=7, telegram_calls=1)
+
+    def test_questionnaire_finish(self):
+        self.run_flow('/start', '5', 'first answer')
+        self.assertUpdateCosts(self.bot, 'second answer', queries=20, cache_ops=6, telegram_calls=1)
+
+    def test_proof_with_intent(self):
+        self.run_flow('/start', '1')
+        self.assertUpdateCosts(self.bot, 'my proof', queries=6, cache_ops=4, telegram_calls=1)
+
+    def test_photo_proof(self):
+        self.run_flow('/start', '1')
+        self.assertUpdateCosts(self.bot, {'photo': 'AgACAgQAAxkBAAIBudgetPhoto'}, queries=5, cache_ops=4, telegram_calls=1)
+
+    def test_proof_without_intent(self):
+        self.run_flow('/start')
+        self.assertUpdateCosts(self.bot, 'my proof', queries=7, cache_ops=6, telegram_calls=1)
+
+    def test_contact_share(self):
+        self.run_flow('/start', '6')
+        self.assertUpdateCosts(self.bot, {'contact': '+15550100'}, queries=7, cache_ops=4, telegram_calls=2)
+
+    def test_blocked_user_returns(self):
+        self.run_flow('/start')
+        TelegramUser.objects.filter(bot=self.bot, chat_id=str(self.chat_id)).update(is_blocked=True)
+        self.assertUpdateCosts(self.bot, '/start', queries=6, cache_ops=2, telegram_calls=1)
+
+    def test_user_blocked_bot(self):
+        self.run_flow('/start')
+        self.stub.blocked_chats.add(str(self.chat_id))
+        self.assertUpdateCosts(self.bot, '/start', queries=5, cache_ops=2, telegram_calls=1)
+        self.assertTrue(TelegramUser.objects.get(bot=self.bot, chat_id=str(self.chat_id)).is_blocked)
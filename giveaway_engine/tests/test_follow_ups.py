@@ -0,0 +1,69 @@
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+
+from giveaway_engine.models import Giveaway, GiveawayAttempt, TelegramBot, TelegramUser
+from giveaway_engine.utils import claim_due_follow_ups
+
+from .base import QUIET_SETTINGS
+
+
+@override_settings(**QUIET_SETTINGS)
+class FollowUpScheduleTests(TestCase):
+    """follow_up_due_at stays in step with the giveaway's follow-up settings"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.bot = TelegramBot.objects.create(name='Follow', username='follow_bot', token='follow-test-token')
+        cls.giveaway = Giveaway.objects.create(
+            bot=cls.bot, title='Giveaway', description='', sequence=1, giveaway_type='standard',
+            requirement_type='none', static_content='Link', follow_up_text='Thanks!', follow_up_delay_seconds=60,
+        )
+        cls.users = [TelegramUser.objects.create(bot=cls.bot, chat_id=str(9_400_000 + n), first_name='Tester') for n in range(3)]
+
+    def setUp(self):
+        self.attempts = [GiveawayAttempt.objects.create(user=user, giveaway=self.giveaway, status='approved') for user in self.users]
+
+    def due_delays(self):
+        return {
+            attempt.id: attempt.follow_up_due_at and (attempt.follow_up_due_at - attempt.created_at).total_seconds()
+            for attempt in GiveawayAttempt.objects.filter(giveaway=self.giveaway)
+        }
+
+    def test_delay_change_reschedules_pending_follow_ups(self):
+        GiveawayAttempt.objects.filter(id=self.attempts[0].id).update(follow_up_sent=True, follow_up_due_at=None)
+        giveaway = Giveaway.objects.get(id=self.giveaway.id)
+        giveaway.follow_up_delay_seconds = 3600
+        # The giveaway's own UPDATE plus one for all of its attempts
+        with self.assertNumQueries(2):
+            giveaway.save()
+        self.assertEqual(self.due_delays(), {self.attempts[0].id: None, self.attempts[1].id: 3600, self.attempts[2].id: 3600})
+
+    def test_removed_text_unschedules(self):
+        giveaway = Giveaway.objects.get(id=self.giveaway.id)
+        giveaway.follow_up_text = ''
+        giveaway.save()
+        self.assertEqual(set(self.due_delays().values()), {None})
+
+    def test_unrelated_change_touches_no_attempts(self):
+        giveaway = Giveaway.objects.get(id=self.giveaway.id)
+        giveaway.title = 'Renamed'
+        with self.assertNumQueries(1):
+            giveaway.save()
+
+    def test_blocked_users_are_not_claimed(self):
+        GiveawayAttempt.objects.update(follow_up_due_at=self.attempts[0].created_at - timedelta(seconds=1))
+        TelegramUser.objects.filter(id=self.users[1].id).update(is_blocked=True)
+        claimed = claim_due_follow_ups('worker', batch_size=10)
+        self.assertEqual(sorted(claimed), [self.attempts[0].id, self.attempts[2].id])
+
+    def test_attempt_save_reads_only_the_follow_up_settings(self):
+        attempt = GiveawayAttempt.objects.get(id=self.attempts[0].id)
+        attempt.status = 'pending'
+        attempt.save()
+        attempt.status = 'approved'
+        with self.assertNumQueries(2) as queries:
+            attempt.save()
+        self.assertIn('"follow_up_delay_seconds"', queries.captured_queries[0]['sql'])
+        self.assertNotIn('"description"', queries.captured_queries[0]['sql'])
+        self.assertEqual(self.due_delays()[attempt.id], 60)
@@ -0,0 +1,51 @@
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.test import override_settings
+
+from giveaway_engine.models import MessageTemplate, TelegramBot, TelegramUser
+from giveaway_engine.rendering import render
+
+from .base import WebhookTestCase
+
+
+@override_settings(ROOT_URLCONF='giveaway_engine.tests.urls')
+class MessageTemplateValidationTests(WebhookTestCase):
+    """Template text is validated by forms and clean(), not by save()"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.bot = TelegramBot.objects.create(name='Templates', username='templates_bot', token='templates-test-token')
+        cls.user = TelegramUser.objects.create(bot=cls.bot, chat_id='9200001', first_name='Tester')
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+
+    def test_clean_reports_the_content_field(self):
+        template = MessageTemplate(bot=self.bot, name='Broken', content='Hi {nmae}')
+        with self.assertRaises(ValidationError) as raised:
+            template.full_clean()
+        self.assertIn('content', raised.exception.message_dict)
+
+    def test_invalid_template_saved_without_clean_renders_the_default(self):
+        template = MessageTemplate.objects.create(bot=self.bot, name='Broken', content='Hi {')
+        self.assertEqual(render(template, default='fallback', name='Tester'), 'fallback')
+
+    def test_bulk_message_form_shows_brace_errors(self):
+        self.client.force_login(self.admin)
+        calls_before = len(self.stub.calls)
+        response = self.client.post('/admin/giveaway_engine/telegramuser/', {
+            'action': 'send_bulk_message_action', '_selected_action': [self.user.pk],
+            'apply': 'yes', 'message_text': 'Hello {name',
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Malformed template')
+        self.assertContains(response, 'Hello {name</textarea>')
+        self.assertEqual(len(self.stub.calls), calls_before)
+
+    def test_bulk_message_is_sent(self):
+        self.client.force_login(self.admin)
+        calls_before = len(self.stub.calls)
+        response = self.client.post('/admin/giveaway_engine/telegramuser/', {
+            'action': 'send_bulk_message_action', '_selected_action': [self.user.pk],
+            'apply': 'yes', 'message_text': 'Hello {name}, {{braces}}',
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual([payload['text'] for *_, payload in self.stub.calls[calls_before:]], ['Hello Tester, {braces}'])
@@ -0,0 +1,70 @@
+import tempfile
+import threading
+from unittest import mock
+
+from django.test import override_settings
+
+from giveaway_engine import proof_media
+from giveaway_engine.models import Giveaway, GiveawayAttempt, TelegramBot, TelegramUser
+
+from .base import WebhookTestCase
+
+
+class ProofMediaTests(WebhookTestCase):
+    """The local photo proof cache, fetched from the stub Bot API"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.bot = TelegramBot.objects.create(name='Proofs', username='proofs_bot', token='proofs-test-token')
+        cls.giveaway = Giveaway.objects.create(
+            bot=cls.bot, title='Giveaway', description='', sequence=1,
+            giveaway_type='standard', requirement_type='manual_approval', static_content='Link',
+        )
+        cls.user = TelegramUser.objects.create(bot=cls.bot, chat_id='9300001', first_name='Tester')
+
+    def setUp(self):
+        super().setUp()
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        settings = override_settings(GIVEAWAY_PROOF_MEDIA_DIR=media.name, GIVEAWAY_PROOF_MEDIA_MAX_BYTES=2500)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        proof_media._tracked_bytes = None
+        self.addCleanup(setattr, proof_media, '_tracked_bytes', None)
+        for n in range(4):
+            self.stub.add_file(f"AgACphoto{n}", b'x' * 1000)
+
+    def attempt(self, proof, proof_type):
+        return GiveawayAttempt.objects.select_related('giveaway__bot').get(id=GiveawayAttempt.objects.create(
+            user=self.user, giveaway=self.giveaway, status='pending', user_proof=proof, proof_type=proof_type,
+        ).id)
+
+    def test_eviction_runs_only_over_the_limit(self):
+        with mock.patch.object(proof_media, 'evict', wraps=proof_media.evict) as evict:
+            for n in range(2):
+                self.assertTrue(proof_media.fetch_proof(self.bot.token, f"AgACphoto{n}"))
+            # The first download scans the cache once; the second fits in the tracked size
+            self.assertEqual(evict.call_count, 1)
+            proof_media.fetch_proof(self.bot.token, 'AgACphoto2')
+            self.assertEqual(evict.call_count, 2)
+        self.assertIsNone(proof_media.cached_path('AgACphoto0'))
+        self.assertTrue(proof_media.cached_path('AgACphoto2'))
+
+    def test_unknown_proofs_are_classified_by_telegram(self):
+        photo = self.attempt('AgACphoto3', 'unknown')
+        text = self.attempt('my-proof', 'unknown')
+        self.assertTrue(proof_media.fetch_attempt_proof(photo))
+        self.assertIsNone(proof_media.fetch_attempt_proof(text))
+        self.assertEqual(GiveawayAttempt.objects.get(id=photo.id).proof_type, 'photo')
+        self.assertEqual(GiveawayAttempt.objects.get(id=text.id).proof_type, 'text')
+        self.assertFalse(proof_media.could_be_photo(self.attempt('two words', 'unknown')))
+
+    def test_fetches_run_on_their_own_bounded_pool(self):
+        threads = []
+        with override_settings(GIVEAWAY_PROOF_PREFETCH=True), \
+                mock.patch.object(proof_media, '_fetch_job', lambda attempt_id: threads.append(threading.current_thread().name)):
+            proof_media.schedule_proof_fetch(1, 'AgACphoto1').result(timeout=10)
+            with override_settings(GIVEAWAY_PROOF_FETCH_QUEUE=0):
+                self.assertIsNone(proof_media.schedule_proof_fetch(2, 'AgACphoto2'))
+        self.assertEqual(len(threads), 1)
+        self.assertTrue(threads[0].startswith('giveaway-proof'))
@@ -0,0 +1,52 @@
+import re
+import unittest
+
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+
+from giveaway_engine.models import GiveawayAttempt, GiveawayItem, MessageLog, UserAnswer
+
+
+def hot_queries():
+    """
+    The lookups on the webhook, admin and worker hot paths, with placeholder ids.
+    Each entry: (name, table that must not be fully scanned, queryset)
+    """
+    now = timezone.now()
+    return [
+        ("attempt retake/prerequisite check", GiveawayAttempt._meta.db_table,
+            GiveawayAttempt.objects.filter(user_id=1, giveaway_id=1, status__in=['approved', 'pending'])),
+        ("next free unique item", GiveawayItem._meta.db_table,
+            GiveawayItem.objects.filter(giveaway_id=1, is_used=False).order_by('id')[:1]),
+        ("user message history", MessageLog._meta.db_table,
+            MessageLog.objects.filter(user_id=1).order_by('-timestamp')[:20]),
+        ("bot message log time range", MessageLog._meta.db_table,
+            MessageLog.objects.filter(bot_id=1, timestamp__lt=now).order_by('timestamp')[:1000]),
+        ("user answers for a question", UserAnswer._meta.db_table,
+            UserAnswer.objects.filter(user_id=1, question_id=1)),
+        ("due follow-ups", GiveawayAttempt._meta.db_table,
+            GiveawayAttempt.objects.filter(status='approved', follow_up_sent=False, follow_up_due_at__lte=now, user__is_blocked=False).order_by('follow_up_due_at')[:100]),
+    ]
+
+
+def is_full_scan(vendor, plan, table):
+    if vendor == 'sqlite':
+        # "SCAN <table>" without an index; SEARCH lines are index lookups
+        return re.search(rf"\bSCAN {re.escape(table)}(?! USING (COVERING )?INDEX)\b", plan) is not None
+    return re.search(rf"Seq Scan on {re.escape(table)}\b", plan) is not None
+
+
+@unittest.skipUnless(connection.vendor in ('sqlite', 'postgresql'), "plan checks need SQLite or PostgreSQL")
+class QueryPlanTests(TestCase):
+    """No hot lookup may need a full table scan (EXPLAIN after migrating)"""
+
+    def test_hot_queries_use_indexes(self):
+        if connection.vendor == 'postgresql':
+            # Small test tables always favour a Seq Scan; make the planner show whether an index is usable
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+        for name, table, queryset in hot_queries():
+            with self.subTest(name):
+                plan = queryset.explain()
+                self.assertFalse(is_full_scan(connection.vendor, plan, table), f"{name} needs a full scan:\n{plan}")
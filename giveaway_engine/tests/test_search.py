@@ -0,0 +1,83 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, override_settings
+
+from giveaway_engine.models import Giveaway, MessageLog, Questionnaire, TelegramBot, TelegramUser, UserAnswer
+from giveaway_engine.search import full_text_search, is_search_available
+
+from .base import QUIET_SETTINGS
+
+
+@override_settings(ROOT_URLCONF='giveaway_engine.tests.urls', **QUIET_SETTINGS)
+class FullTextSearchTests(TestCase):
+    """Admin search of the message log through the full-text index"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.bot = TelegramBot.objects.create(name='Search', username='search_bot', token='search-test-token')
+        cls.user = TelegramUser.objects.create(bot=cls.bot, chat_id='9000001', username='alice', first_name='Alice')
+        cls.other = TelegramUser.objects.create(bot=cls.bot, chat_id='9000002', username='promo_fan', first_name='Bob')
+        MessageLog.objects.bulk_create(
+            MessageLog(bot=cls.bot, user=cls.user, direction='inbound', content=f"promo code please {n}")
+            for n in range(1200)
+        )
+        cls.best = MessageLog.objects.create(bot=cls.bot, user=cls.user, direction='inbound', content='promo promo promo')
+        cls.by_username = MessageLog.objects.create(bot=cls.bot, user=cls.other, direction='inbound', content='hello')
+        MessageLog.objects.create(bot=cls.bot, user=cls.user, direction='inbound', content='unrelated')
+
+    def setUp(self):
+        if not is_search_available(MessageLog):
+            self.skipTest('No full-text index on this database')
+
+    def test_every_match_is_found(self):
+        results = full_text_search(MessageLog.objects.all(), 'promo')
+        self.assertEqual(results.count(), 1201)
+        self.assertEqual(results.order_by('-search_rank', '-pk')[0], self.best)
+
+    def test_related_fields_match_alongside_the_text(self):
+        results = full_text_search(MessageLog.objects.all(), 'promo', ['user__username'])
+        self.assertEqual(results.count(), 1202)
+        self.assertIn(self.by_username, results)
+        self.assertEqual(results.order_by('-search_rank', '-pk')[0], self.best)
+
+    def test_admin_search_keeps_usernames(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+        response = self.client.get('/admin/giveaway_engine/messagelog/', {'q': 'promo'})
+        self.assertEqual(response.status_code, 200)
+        results = list(response.context_data['cl'].result_list)
+        self.assertEqual(results[0], self.best)
+        self.assertEqual(response.context_data['cl'].result_count, 1202)
+
+        response = self.client.get('/admin/giveaway_engine/messagelog/', {'q': '@promo_fan'})
+        self.assertEqual(list(response.context_data['cl'].result_list), [self.by_username])
+
+
+@override_settings(**QUIET_SETTINGS)
+class AnswerSearchTests(TestCase):
+    """Answers saved after migrating are indexed, whatever migrations rebuilt the table"""
+
+    def test_new_answer_is_found(self):
+        if not is_search_available(UserAnswer):
+            self.skipTest('No full-text index on this database')
+        bot = TelegramBot.objects.create(name='Answers', username='answers_bot', token='answers-test-token')
+        giveaway = Giveaway.objects.create(
+            bot=bot, title='Giveaway', description='', sequence=1,
+            giveaway_type='standard', requirement_type='questionnaire', static_content='Link',
+        )
+        question = Questionnaire.objects.create(giveaway=giveaway, text='Favourite dessert?', order=1)
+        user = TelegramUser.objects.create(bot=bot, chat_id='9500001', first_name='Tester')
+        answer = UserAnswer.objects.create(user=user, question=question, answer='banana split')
+        UserAnswer.objects.create(user=user, question=question, answer='apple pie')
+        self.assertEqual(list(full_text_search(UserAnswer.objects.all(), 'banana')), [answer])
+        answer.answer = 'cherry tart'
+        answer.save()
+        self.assertEqual(full_text_search(UserAnswer.objects.all(), 'banana').count(), 0)
+
+    def test_missing_trigger_falls_back_to_like(self):
+        if connection.vendor != 'sqlite' or not is_search_available(UserAnswer):
+            self.skipTest('Needs the SQLite full-text index')
+        with connection.cursor() as cursor:
+            cursor.execute("DROP TRIGGER giveaway_engine_useranswer_fts_ai")
+        with self.assertLogs('giveaway_engine.search', 'WARNING'):
+            self.assertFalse(is_search_available(UserAnswer))
+        self.assertIsNone(full_text_search(UserAnswer.objects.all(), 'banana'))
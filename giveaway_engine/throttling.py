@@ -0,0 +1,65 @@
+import logging
+import time
+
+from django.core.cache import cache
+
+from . import metrics
+from .utils import get_send_executor, send_telegram_message
+
+logger = logging.getLogger(__name__)
+
+
+def _update_chat_id(data):
+    for key in ('message', 'edited_message', 'callback_query'):
+        message = data.get(key)
+        if message:
+            chat = message.get('chat') or (message.get('message') or {}).get('chat') or {}
+            return chat.get('id') or (message.get('from') or {}).get('id')
+    return None
+
+
+def sliding_window_hit(scope, window_seconds, now=None):
+    """
+    Counts one event for scope and returns the number of events in the last
+    window_seconds. Sliding window counter: the current fixed window plus
+    the previous one weighted by how much of it still overlaps.
+    """
+    now = time.time() if now is None else now
+    index, offset = divmod(now, window_seconds)
+    current_key = f"flood_{scope}_{int(index)}"
+    previous_key = f"flood_{scope}_{int(index) - 1}"
+    cache.add(current_key, 0, timeout=window_seconds * 2)
+    try:
+        current = cache.incr(current_key)
+    except ValueError:
+        # Expired between add and incr
+        cache.set(current_key, 1, timeout=window_seconds * 2)
+        current = 1
+    previous = cache.get(previous_key) or 0
+    return current + previous * (1 - offset / window_seconds)
+
+
+def throttle_update(bot, data):
+    """
+    Returns True when the update should be dropped because its chat or the
+    whole bot is over its flood limit. Dropped updates cost only cache
+    operations: no database work and at most one "slow down" reply per
+    chat and window, sent from the background pool.
+    """
+    window = bot.flood_window_seconds or 60
+    chat_id = _update_chat_id(data)
+    try:
+        if bot.flood_user_limit and chat_id is not None:
+            if sliding_window_hit(f"{bot.id}_{chat_id}", window) > bot.flood_user_limit:
+                metrics.incr('throttled', bot.id)
+                if bot.flood_warning_text and cache.add(f"flood_warned_{bot.id}_{chat_id}", 1, timeout=window):
+                    get_send_executor().submit(send_telegram_message, bot.token, chat_id, bot.flood_warning_text)
+                return True
+        if bot.flood_bot_limit:
+            if sliding_window_hit(f"{bot.id}", window) > bot.flood_bot_limit:
+                metrics.incr('throttled', bot.id)
+                return True
+    except Exception as e:
+        # A cache outage must not take the bot down with it
+        logger.error(f"Flood control failed for bot {bot.username}: {e}")
+    return False
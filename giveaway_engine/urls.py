@@ -1,6 +1,7 @@
 from django.urls import path
-from .views import TelegramWebhookView
+from .views import TelegramWebhookView, BulkApproveAttemptsView
 
 urlpatterns = [
     path('webhook/<str:token>/', TelegramWebhookView.as_view(), name='telegram_webhook'),
+    path('attempts/bulk-approve/', BulkApproveAttemptsView.as_view(), name='bulk_approve_attempts'),
 ]
@@ -1,14 +1,92 @@
 import requests
 import logging
+import threading
+import time
+from contextlib import contextmanager
+from django.conf import settings
+from django.db import close_old_connections
 from django.urls import reverse
+from . import metrics
+from .models import GiveawayAttempt, MessageLog, TelegramBot
+from .profiling import record_telegram_call
 
 logger = logging.getLogger(__name__)
 
+def telegram_api_url():
+    """
+    Base URL of the Bot API (GIVEAWAY_TELEGRAM_API_URL), e.g. a local stub in tests.
+    """
+    return getattr(settings, 'GIVEAWAY_TELEGRAM_API_URL', "https://api.telegram.org").rstrip('/')
+
+_session = None
+
+def telegram_session():
+    """
+    Process-wide requests session for Bot API calls, so sends reuse open
+    connections instead of a new TCP/TLS handshake each
+    (up to GIVEAWAY_HTTP_POOL_SIZE kept open, default 32).
+    """
+    global _session
+    if _session is None:
+        size = getattr(settings, 'GIVEAWAY_HTTP_POOL_SIZE', 32)
+        session = requests.Session()
+        session.mount('https://', requests.adapters.HTTPAdapter(pool_maxsize=size))
+        session.mount('http://', requests.adapters.HTTPAdapter(pool_maxsize=size))
+        _session = session
+    return _session
+
+def telegram_request(bot_token, method, payload=None, timeout=10, session=None):
+    """
+    POSTs to a Bot API method and returns the raw response.
+    Every outbound Telegram call goes through here so it can be timed.
+    """
+    url = f"{telegram_api_url()}/bot{bot_token}/{method}"
+    started = time.perf_counter()
+    ok = False
+    try:
+        response = (session or telegram_session()).post(url, json=payload or {}, timeout=timeout)
+        ok = response.ok
+        return response
+    finally:
+        record_telegram_call(method, (time.perf_counter() - started) * 1000, ok)
+
+_outbox = threading.local()
+
+class Outbox(list):
+    """
+    Messages held back by deferred_sends, as (bot_token, payload, bot, user).
+    recorder is the profiling recorder of the update when it is being
+    recorded, for the sends to be recorded into, and after_sends the work
+    to run once they are out (storing that profile).
+    """
+    def __init__(self):
+        super().__init__()
+        self.recorder = None
+        self.after_sends = []
+
+def current_outbox():
+    """The Outbox of the deferred_sends block running on this thread, or None"""
+    return getattr(_outbox, 'sends', None)
+
+@contextmanager
+def deferred_sends():
+    """
+    Collects the messages send_telegram_message would send on this thread
+    instead of sending them. Yields an Outbox for the caller to send
+    afterwards, in order (the async webhook does so without holding a
+    thread), then to run its after_sends.
+    """
+    previous = getattr(_outbox, 'sends', None)
+    _outbox.sends = Outbox()
+    try:
+        yield _outbox.sends
+    finally:
+        _outbox.sends = previous
+
 def send_telegram_message(bot_token, chat_id, text, reply_markup=None, bot=None, user=None):
     """
     Sends a message to a Telegram user and logs it if bot/user provided.
     """
-    url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
     payload = {
         "chat_id": chat_id,
         "text": text,
@@ -20,14 +98,17 @@ def send_telegram_message(bot_token, chat_id, text, reply_markup=None, bot=None,
 
     if reply_markup:
         payload['reply_markup'] = reply_markup
+    outbox = getattr(_outbox, 'sends', None)
+    if outbox is not None:
+        outbox.append((bot_token, payload, bot, user))
+        return None
     try:
-        response = requests.post(url, json=payload, timeout=10)
+        response = telegram_request(bot_token, "sendMessage", payload)
         response.raise_for_status()
         result = response.json()
         
         # Log outbound message
         if bot and user:
-            from .models import MessageLog
             MessageLog.objects.create(
                 user=user,
                 bot=bot,
@@ -41,6 +122,7 @@ def send_telegram_message(bot_token, chat_id, text, reply_markup=None, bot=None,
             if user:
                 user.is_blocked = True
                 user.save()
+                metrics.incr('blocked', user.bot_id)
                 logger.warning(f"User {user.chat_id} blocked the bot. marked as blocked.")
             return None
             
@@ -54,65 +136,188 @@ def send_telegram_message(bot_token, chat_id, text, reply_markup=None, bot=None,
         logger.error(error_msg)
         return None
 
+_send_executor = None
+
+def get_send_executor():
+    """
+    Shared thread pool for Telegram calls that shouldn't block the request
+    (size: GIVEAWAY_SEND_CONCURRENCY, default 8).
+    """
+    global _send_executor
+    if _send_executor is None:
+        from concurrent.futures import ThreadPoolExecutor
+        workers = getattr(settings, 'GIVEAWAY_SEND_CONCURRENCY', 8)
+        _send_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='giveaway-send')
+    return _send_executor
+
+def _send_job(bot, user, text, reply_markup):
+    try:
+        return send_telegram_message(bot.token, user.chat_id, text, reply_markup=reply_markup, bot=bot, user=user)
+    finally:
+        close_old_connections()
+
+def send_messages_in_background(jobs):
+    """
+    Queues (bot, user, text, reply_markup) jobs on the send pool and returns
+    their futures. Each job logs to MessageLog like a normal send.
+    """
+    executor = get_send_executor()
+    return [executor.submit(_send_job, bot, user, text, reply_markup) for bot, user, text, reply_markup in jobs]
+
+# (get method, result key, set method, model field)
+PROFILE_FIELDS = (
+    ("getMyName", "name", "setMyName", "name"),
+    ("getMyDescription", "description", "setMyDescription", "description"),
+    ("getMyShortDescription", "short_description", "setMyShortDescription", "short_description"),
+)
+
+def _call_tg(token, method, data=None):
+    try:
+        resp = telegram_request(token, method, data)
+        return resp.json()
+    except Exception as e:
+        logger.error(f"Error calling {method}: {e}")
+        return {"ok": False}
+
+def _call_tg_concurrently(token, calls):
+    """
+    Runs [(method, data), ...] in parallel and returns the responses in order.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    if not calls:
+        return []
+    with ThreadPoolExecutor(max_workers=len(calls)) as pool:
+        return list(pool.map(lambda call: _call_tg(token, *call), calls))
+
 def update_bot_info(bot_instance):
     """
     Checks if bot name/description/short_description match Telegram values.
-    Updates them if different.
+    Updates them if different. The get and set calls are issued concurrently.
+    Returns True when every call succeeded.
     """
     token = bot_instance.token
-    base_url = f"https://api.telegram.org/bot{token}"
-    
-    # helper for basic requests
-    def call_tg(method, data=None):
-        try:
-            resp = requests.post(f"{base_url}/{method}", json=data or {}, timeout=10)
-            return resp.json()
-        except Exception as e:
-            logger.error(f"Error calling {method}: {e}")
-            return {"ok": False}
-
-    # 1. Name
-    # Note: setMyName affects the bot's name in chats.
-    current_name_resp = call_tg("getMyName")
-    if current_name_resp.get("ok"):
-        current_name = current_name_resp.get("result", {}).get("name", "")
-        # If DB name is set and different from TG
-        if bot_instance.name and bot_instance.name != current_name:
-            call_tg("setMyName", {"name": bot_instance.name})
-            logger.info(f"Updated Bot Name to: {bot_instance.name}")
-
-    # 2. Description (What can this bot do?)
-    current_desc_resp = call_tg("getMyDescription")
-    if current_desc_resp.get("ok"):
-        current_desc = current_desc_resp.get("result", {}).get("description", "")
-        db_desc = bot_instance.description or ""
+    current = _call_tg_concurrently(token, [(get_method, None) for get_method, _, _, _ in PROFILE_FIELDS])
+
+    updates = []
+    ok = True
+    for (get_method, key, set_method, field), resp in zip(PROFILE_FIELDS, current):
+        if not resp.get("ok"):
+            ok = False
+            continue
+        remote_value = (resp.get("result", {}).get(key) or "").strip()
+        db_value = (getattr(bot_instance, field) or "").strip()
+        # An empty DB name means "leave Telegram's name alone"
+        if field == 'name' and not db_value:
+            continue
         # Telegram might treat empty string and None similarly, strip to be safe
-        if db_desc.strip() != current_desc.strip():
-             call_tg("setMyDescription", {"description": db_desc})
-             logger.info(f"Updated Bot Description")
-
-    # 3. Short Description (Chat list / profile)
-    current_short_resp = call_tg("getMyShortDescription")
-    if current_short_resp.get("ok"):
-        current_short = current_short_resp.get("result", {}).get("short_description", "")
-        db_short = bot_instance.short_description or ""
-        if db_short.strip() != current_short.strip():
-             call_tg("setMyShortDescription", {"short_description": db_short})
-             logger.info(f"Updated Bot Short Description")
+        if db_value != remote_value:
+            updates.append((set_method, {key: db_value}))
+
+    for (set_method, payload), resp in zip(updates, _call_tg_concurrently(token, updates)):
+        if resp.get("ok"):
+            logger.info(f"{set_method} updated for {bot_instance.username}")
+        else:
+            ok = False
+            logger.error(f"{set_method} failed for {bot_instance.username}: {resp.get('description')}")
+    return ok
+
+def webhook_url_for(bot_instance):
+    domain = bot_instance.webhook_domain.rstrip('/')
+    webhook_path = reverse('telegram_webhook', kwargs={'token': bot_instance.token})
+    return f"{domain}{webhook_path}"
+
+def webhook_options():
+    """
+    Webhook settings shared by every bot
+    (GIVEAWAY_WEBHOOK_ALLOWED_UPDATES, GIVEAWAY_WEBHOOK_MAX_CONNECTIONS).
+    """
+    return {
+        "allowed_updates": list(getattr(settings, 'GIVEAWAY_WEBHOOK_ALLOWED_UPDATES', ["message"])),
+        "max_connections": getattr(settings, 'GIVEAWAY_WEBHOOK_MAX_CONNECTIONS', 40),
+    }
+
+def desired_bot_state(bot_instance):
+    """
+    What Telegram should report for this bot. Webhook keys are only present
+    when the bot has a webhook_domain.
+    """
+    state = {
+        "name": (bot_instance.name or "").strip(),
+        "description": (bot_instance.description or "").strip(),
+        "short_description": (bot_instance.short_description or "").strip(),
+    }
+    if not state["name"]:
+        # An empty DB name means "leave Telegram's name alone"
+        del state["name"]
+    if bot_instance.webhook_domain:
+        state["url"] = webhook_url_for(bot_instance)
+        state.update(webhook_options())
+    return state
+
+def fetch_bot_state(bot_instance):
+    """
+    Reads the profile and webhook state Telegram reports, with the four get
+    calls issued concurrently. Raises RuntimeError if any call fails.
+    """
+    calls = [(get_method, None) for get_method, _, _, _ in PROFILE_FIELDS] + [("getWebhookInfo", None)]
+    responses = _call_tg_concurrently(bot_instance.token, calls)
+    failed = [method for (method, _), resp in zip(calls, responses) if not resp.get("ok")]
+    if failed:
+        raise RuntimeError(f"{', '.join(failed)} failed")
+
+    state = {}
+    for (_, key, _, _), resp in zip(PROFILE_FIELDS, responses):
+        state[key] = (resp.get("result", {}).get(key) or "").strip()
+    webhook = responses[-1].get("result", {})
+    state["url"] = webhook.get("url", "")
+    state["allowed_updates"] = webhook.get("allowed_updates")
+    state["max_connections"] = webhook.get("max_connections")
+    return state
+
+def diff_bot_state(desired, remote):
+    """
+    Returns the Bot API calls needed to turn remote into desired:
+    [(method, payload, [changed keys]), ...]
+    """
+    calls = []
+    for _, key, set_method, _ in PROFILE_FIELDS:
+        if key in desired and desired[key] != remote.get(key):
+            calls.append((set_method, {key: desired[key]}, [key]))
+    webhook_keys = [key for key in ("url", "allowed_updates", "max_connections") if key in desired and desired[key] != remote.get(key)]
+    if webhook_keys:
+        payload = {key: desired[key] for key in ("url", "allowed_updates", "max_connections")}
+        calls.append(("setWebhook", payload, webhook_keys))
+    return calls
+
+class RateLimiter:
+    """
+    Thread-safe limiter allowing at most `rate` calls per second across threads.
+    """
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0
+        self.lock = threading.Lock()
+        self.next_slot = 0.0
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
 
 def set_webhook(bot_instance):
     """
     Registers the webhook URL with Telegram based on the bot's webhook_domain.
     """
-    domain = bot_instance.webhook_domain.rstrip('/')
-    webhook_path = reverse('telegram_webhook', kwargs={'token': bot_instance.token})
-    webhook_url = f"{domain}{webhook_path}"
+    webhook_url = webhook_url_for(bot_instance)
     
-    url = f"https://api.telegram.org/bot{bot_instance.token}/setWebhook"
-    payload = {"url": webhook_url}
+    payload = dict(webhook_options(), url=webhook_url)
     
     try:
-        resp = requests.post(url, json=payload, timeout=10)
+        resp = telegram_request(bot_instance.token, "setWebhook", payload)
         result = resp.json()
         if result.get("ok"):
             logger.info(f"Successfully set webhook for {bot_instance.username}: {webhook_url}")
@@ -123,14 +328,66 @@ def set_webhook(bot_instance):
         logger.error(f"Error setting webhook: {e}")
         return {"ok": False}
 
+def bot_profile_fingerprint(bot_instance):
+    """
+    Hash of everything the Telegram-side profile and webhook depend on.
+    """
+    import hashlib
+    import json
+    state = [getattr(bot_instance, field) for field in bot_instance.SYNCED_FIELDS]
+    return hashlib.sha256(json.dumps(state).encode()).hexdigest()
+
+def sync_bot_profile(bot_instance, force=False):
+    """
+    Pushes name/descriptions and the webhook to Telegram.
+    The fingerprint of the last successful sync is cached, so syncing an
+    unchanged bot makes no API calls at all.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    from django.core.cache import cache
+
+    cache_key = f"bot_profile_synced_{bot_instance.id}"
+    fingerprint = bot_profile_fingerprint(bot_instance)
+    if not force and cache.get(cache_key) == fingerprint:
+        return True
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        profile_future = pool.submit(update_bot_info, bot_instance)
+        webhook_future = pool.submit(set_webhook, bot_instance) if bot_instance.webhook_domain else None
+        ok = profile_future.result()
+        if webhook_future is not None:
+            ok = webhook_future.result().get("ok", False) and ok
+
+    if ok:
+        cache.set(cache_key, fingerprint, timeout=None)
+    return ok
+
+def _sync_bot_job(bot_id):
+    try:
+        bot = TelegramBot.objects.filter(id=bot_id).first()
+        if bot:
+            sync_bot_profile(bot)
+    except Exception as e:
+        logger.error(f"Failed to update bot info on Telegram: {e}")
+    finally:
+        close_old_connections()
+
+def schedule_bot_sync(bot_id):
+    """
+    Syncs a bot with Telegram on the background pool
+    (or inline when GIVEAWAY_SYNC_BOT_PROFILE_IN_BACKGROUND is False).
+    """
+    if getattr(settings, 'GIVEAWAY_SYNC_BOT_PROFILE_IN_BACKGROUND', True):
+        return get_send_executor().submit(_sync_bot_job, bot_id)
+    _sync_bot_job(bot_id)
+
 def process_follow_up(attempt_id):
     """
     Checks if an attempt needs a follow-up and sends it.
     Can be called by Celery, a thread, or a cron job.
     """
-    from .models import GiveawayAttempt
     try:
-        attempt = GiveawayAttempt.objects.get(id=attempt_id)
+        attempt = GiveawayAttempt.objects.select_related('giveaway__bot', 'user').get(id=attempt_id)
         
         # Security/State Checks
         if attempt.status != 'approved':
@@ -142,18 +399,8 @@ def process_follow_up(attempt_id):
         if not attempt.giveaway.follow_up_text:
             return False
 
-        # Send the message
-        success = send_telegram_message(
-            attempt.giveaway.bot.token,
-            attempt.user.chat_id,
-            attempt.giveaway.follow_up_text,
-            bot=attempt.giveaway.bot,
-            user=attempt.user
-        )
-
-        if success:
-            attempt.follow_up_sent = True
-            attempt.save()
+        if send_follow_up(attempt):
+            GiveawayAttempt.objects.filter(id=attempt.id).update(follow_up_sent=True, follow_up_due_at=None)
             logger.info(f"Follow-up sent for attempt {attempt_id}")
             return True
             
@@ -164,27 +411,122 @@ def process_follow_up(attempt_id):
     
     return False
 
-def process_all_pending_follow_ups():
+def send_follow_up(attempt):
     """
-    Finds and processes all giveaway attempts that need a follow-up.
-    Useful for task queues or cron jobs.
+    Sends the follow-up text for an attempt loaded with giveaway__bot and user.
+    """
+    giveaway = attempt.giveaway
+    return send_telegram_message(
+        giveaway.bot.token,
+        attempt.user.chat_id,
+        giveaway.follow_up_text,
+        bot=giveaway.bot,
+        user=attempt.user
+    )
+
+def follow_up_worker_id():
+    import os
+    import socket
+    import uuid
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+def claim_due_follow_ups(worker_id, batch_size=100, lease_seconds=300, bot_ids=None, attempt_ids=None):
+    """
+    Leases up to batch_size due follow-ups to worker_id and returns their ids.
+    Uses SELECT ... FOR UPDATE SKIP LOCKED where the database supports it so
+    several workers can claim disjoint batches; the lease columns make the
+    claim safe on other backends and let crashed workers' rows expire.
     """
-    from .models import GiveawayAttempt
+    from django.db import connection, transaction
+    from django.db.models import Q
     from django.utils import timezone
     from datetime import timedelta
-    
-    pending = GiveawayAttempt.objects.filter(
+
+    now = timezone.now()
+    unleased = Q(follow_up_claimed_until__isnull=True) | Q(follow_up_claimed_until__lt=now)
+    due = GiveawayAttempt.objects.filter(
         status='approved',
         follow_up_sent=False,
-        giveaway__follow_up_text__isnull=False
-    ).exclude(giveaway__follow_up_text='').exclude(user__is_blocked=True)
+        follow_up_due_at__lte=now,
+        user__is_blocked=False,
+    ).filter(unleased)
+    if bot_ids is not None:
+        due = due.filter(giveaway__bot_id__in=bot_ids)
+    if attempt_ids is not None:
+        due = due.filter(id__in=attempt_ids)
 
+    with transaction.atomic():
+        candidates = due.order_by('follow_up_due_at')
+        if connection.features.has_select_for_update_skip_locked:
+            # Lock only the attempts; the blocked-user filter joins telegramuser
+            candidates = candidates.select_for_update(
+                skip_locked=True, **({'of': ('self',)} if connection.features.has_select_for_update_of else {})
+            )
+        ids = list(candidates.values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return []
+        GiveawayAttempt.objects.filter(id__in=ids).filter(unleased).update(
+            follow_up_claimed_by=worker_id,
+            follow_up_claimed_until=now + timedelta(seconds=lease_seconds),
+        )
+    return list(GiveawayAttempt.objects.filter(id__in=ids, follow_up_claimed_by=worker_id).values_list('id', flat=True))
+
+def dispatch_follow_ups(attempt_ids, worker_id):
+    """
+    Sends follow-ups for attempts leased to worker_id and marks them in bulk.
+    Failed sends keep their lease and are retried once it expires.
+    """
+
+    attempts = GiveawayAttempt.objects.filter(
+        id__in=attempt_ids,
+        follow_up_claimed_by=worker_id,
+    ).select_related('giveaway__bot', 'user')
+
+    sent_ids = []
+    skipped_ids = []
+    blocked_ids = []
+    for attempt in attempts.iterator(chunk_size=len(attempt_ids) or 1):
+        if not attempt.giveaway.follow_up_text:
+            skipped_ids.append(attempt.id)
+            continue
+        if attempt.user.is_blocked:
+            # Blocked since the claim; stays scheduled in case the user comes back
+            blocked_ids.append(attempt.id)
+            continue
+        try:
+            if send_follow_up(attempt):
+                sent_ids.append(attempt.id)
+        except Exception as e:
+            logger.error(f"Error processing follow-up for {attempt.id}: {e}")
+
+    if sent_ids:
+        GiveawayAttempt.objects.filter(id__in=sent_ids).update(
+            follow_up_sent=True, follow_up_due_at=None, follow_up_claimed_until=None
+        )
+    if skipped_ids:
+        # Follow-up text removed: unschedule
+        GiveawayAttempt.objects.filter(id__in=skipped_ids).update(
+            follow_up_due_at=None, follow_up_claimed_until=None
+        )
+    if blocked_ids:
+        GiveawayAttempt.objects.filter(id__in=blocked_ids).update(follow_up_claimed_until=None)
+    return len(sent_ids)
+
+def process_all_pending_follow_ups(batch_size=100, lease_seconds=300, bot_ids=None):
+    """
+    Finds and processes all giveaway attempts that need a follow-up.
+    Useful for task queues or cron jobs; safe to run from several workers at once.
+    Stops early while the overload controller defers non-critical sends.
+    """
+    from . import overload
+    worker_id = follow_up_worker_id()
     count = 0
-    for attempt in pending:
-        # Check if enough time has passed based on the giveaway's specific delay
-        delay_seconds = attempt.giveaway.follow_up_delay_seconds
-        if timezone.now() > attempt.created_at + timedelta(seconds=delay_seconds):
-            if process_follow_up(attempt.id):
-                count += 1
+    while True:
+        if overload.current_level() >= overload.DEFER_SENDS:
+            logger.warning("Deferring follow-ups while overloaded")
+            break
+        attempt_ids = claim_due_follow_ups(worker_id, batch_size=batch_size, lease_seconds=lease_seconds, bot_ids=bot_ids)
+        if not attempt_ids:
+            break
+        count += dispatch_follow_ups(attempt_ids, worker_id)
     return count
-
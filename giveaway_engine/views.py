@@ -1,15 +1,43 @@
 import logging
 import re
+import time
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from django.shortcuts import get_object_or_404
+from rest_framework.permissions import IsAdminUser
+from django.http import Http404
 from django.core.cache import cache
-from .models import TelegramBot, TelegramUser, Giveaway, GiveawayItem, GiveawayAttempt, NewsUpdate
+from .models import TelegramUser, Giveaway, GiveawayItem, GiveawayAttempt, NewsUpdate, MessageLog, Questionnaire, UserAnswer
+from .approvals import approve_attempts
+from .bot_table import get_bot
 from .utils import send_telegram_message
+from .profiling import profile_update
+from .progress import get_progress
+from .rendering import render
+from .questionnaire import question_asked, supersede_answers
+from .throttling import throttle_update
+from .routers import replica_scope
+from . import metrics, overload
 
 logger = logging.getLogger(__name__)
 
+def handle_update(bot, data):
+    """
+    Entry point shared by every ingress (webhook, polling) for one Telegram update.
+    """
+    if throttle_update(bot, data):
+        return
+    started = time.monotonic()
+    chat_id = (data.get('message') or {}).get('chat', {}).get('id')
+    try:
+        if overload.reject_if_busy(bot, data):
+            return
+        with profile_update(bot, data), replica_scope(sticky=f"{bot.id}_{chat_id}" if chat_id else None):
+            TelegramWebhookView().process_update(bot, data)
+    finally:
+        # Rejected updates are measured too, so the level can come back down
+        overload.controller.observe((time.monotonic() - started) * 1000, overload.update_lag(data))
+
 class TelegramWebhookView(APIView):
     """
     Main webhook handler for Telegram updates.
@@ -18,13 +46,22 @@ class TelegramWebhookView(APIView):
 
     def post(self, request, token):
         # Identify the bot by token
-        bot = get_object_or_404(TelegramBot, token=token, is_active=True)
+        bot = get_bot(token)
+        if bot is None:
+            raise Http404
         
-        data = request.data
+        handle_update(bot, request.data)
+
+        return Response(status=status.HTTP_200_OK)
+
+    def process_update(self, bot, data):
+        """
+        Runs a single Telegram update through the conversation logic.
+        """
         message = data.get('message', {})
         
         if not message:
-            return Response(status=status.HTTP_200_OK)
+            return
 
         chat_data = message.get('chat', {})
         chat_id = str(chat_data.get('id'))
@@ -46,6 +83,9 @@ class TelegramWebhookView(APIView):
                 'first_name': first_name
             }
         )
+        if created:
+            metrics.incr('new_users', bot.id)
+
         # Update user details if changed
         if not created:
             if user.username != username or user.first_name != first_name:
@@ -53,10 +93,6 @@ class TelegramWebhookView(APIView):
                 user.first_name = first_name
                 user.save()
         
-                user.save()
- 
-                user.save()
-        
         # Auto-Unblock if user interacts
         if user.is_blocked:
             user.is_blocked = False
@@ -74,11 +110,10 @@ class TelegramWebhookView(APIView):
                 user.save()
                 self.handle_contact_update(bot, user, chat_id)
                 # Return immediately after handling contact to avoid double processing
-                return Response(status=status.HTTP_200_OK)
+                return
 
-        # 2. Log Inbound Message
-        if text:
-            from .models import MessageLog
+        # 2. Log Inbound Message (skipped while overloaded)
+        if text and overload.current_level() < overload.SKIP_INBOUND_LOGS:
             MessageLog.objects.create(
                 user=user,
                 bot=bot,
@@ -104,47 +139,61 @@ class TelegramWebhookView(APIView):
             # Unknown command or interaction
             pass
 
-        return Response(status=status.HTTP_200_OK)
-
     def find_target_giveaway(self, bot, user):
         """
         Identify the next logical giveaway (by sequence) that the user hasn't successfully completed.
         """
+        progress = get_progress(user)
         active_giveaways = Giveaway.objects.filter(bot=bot, is_active=True).order_by('sequence')
         for g in active_giveaways:
             # Check if already has approved/pending attempt
-            if GiveawayAttempt.objects.filter(user=user, giveaway=g, status__in=['approved', 'pending']).exists():
+            if progress.has_claimed(g.id):
                 continue
             
             # This is the next logical target (prereqs will be checked by handle_claim/handle_proof)
             return g
         return None
 
+    def start_catalog(self, bot, cached=False):
+        """
+        Active giveaways (title, sequence) and the latest news (title, body) shown by /start.
+        Every fresh read refreshes the cached copy used while overloaded.
+        """
+        cache_key = f"start_catalog_{bot.id}"
+        if cached:
+            catalog = cache.get(cache_key)
+            if catalog is not None:
+                return catalog
+        giveaways = list(Giveaway.objects.filter(bot=bot, is_active=True, sequence__isnull=False).values_list('title', 'sequence'))
+        news = NewsUpdate.objects.filter(bot=bot).order_by('-sent_at').values_list('title', 'body').first()
+        catalog = (giveaways, news)
+        cache.set(cache_key, catalog, timeout=300)
+        return catalog
+
     def handle_start(self, bot, user, chat_id, name):
-        # Fetch Active Giveaways with a sequence
-        giveaways = Giveaway.objects.filter(bot=bot, is_active=True, sequence__isnull=False)
-        logger.info(f"Bot {bot.username} handling /start for user {name}. Found {giveaways.count()} active giveaways.")
-        
-        # Fetch Latest News
-        news = NewsUpdate.objects.filter(bot=bot).order_by('-sent_at').first()
+        metrics.incr('starts', bot.id)
+        level = overload.current_level()
+        # Fetch Active Giveaways with a sequence, and the Latest News
+        giveaways, news = self.start_catalog(bot, cached=level >= overload.CACHED_START)
+        logger.info(f"Bot {bot.username} handling /start for user {name}. Found {len(giveaways)} active giveaways.")
         
         # Build Message
         msg = f"👋 Welcome {name}!\n\n"
         
-        if news:
-            msg += f"📰 Latest News: {news.title}\n{news.body}\n\n"
+        if news and level < overload.DEFER_SENDS:
+            msg += f"📰 Latest News: {news[0]}\n{news[1]}\n\n"
             
-        if giveaways.exists():
+        if giveaways:
             msg += f"{bot.start_message_header}\n\n"
-            for g in giveaways:
-                msg += f"{g.title} - Reply {g.sequence}\n\n"
+            for title, sequence in giveaways:
+                msg += f"{title} - Reply {sequence}\n\n"
         else:
             logger.warning(f"No active giveaways found for bot {bot.username}")
             msg += "No active giveaways at the moment."
             
         send_telegram_message(bot.token, chat_id, msg, bot=bot, user=user)
 
-    def handle_claim(self, bot, user, chat_id, text):
+    def handle_claim(self, bot, user, chat_id, text, count_claim=True):
         parts = text.split()
         giveaway_seq = None
         user_proof = ""
@@ -164,6 +213,12 @@ class TelegramWebhookView(APIView):
             send_telegram_message(bot.token, chat_id, "Giveaway not found or inactive.", bot=bot, user=user)
             return
 
+        if count_claim:
+            metrics.incr('claims_started', bot.id, giveaway.id)
+
+        # One progress lookup answers both the prerequisite and the retake check
+        progress = get_progress(user)
+
         # Prerequisite check
         if giveaway.pre_giveaway:
             # Must have approved attempts for all active giveaways with sequence <= giveaway.pre_giveaway
@@ -172,25 +227,20 @@ class TelegramWebhookView(APIView):
             missing_sequences = []
             
             for pr in prereqs:
-                if not GiveawayAttempt.objects.filter(user=user, giveaway=pr, status='approved').exists():
+                if not progress.has_completed(pr.id):
                     missing_titles.append(f"[{pr.title}]")
                     missing_sequences.append(str(pr.sequence))
             
             if missing_sequences:
-                if giveaway.failure_template:
-                    msg = giveaway.failure_template.content.format(
-                        name=user.first_name or "Friend"
-                    )
-                else:
-                    seq_str = " and ".join([", ".join(missing_sequences[:-1]), missing_sequences[-1]] if len(missing_sequences) > 1 else missing_sequences)
-                    msg = f"⚠️ Please start with {seq_str} first!"
+                seq_str = " and ".join([", ".join(missing_sequences[:-1]), missing_sequences[-1]] if len(missing_sequences) > 1 else missing_sequences)
+                msg = render(giveaway.failure_template, default=f"⚠️ Please start with {seq_str} first!", name=user.first_name or "Friend")
                 
                 send_telegram_message(bot.token, chat_id, msg, reply_markup={"remove_keyboard": True}, bot=bot, user=user)
                 return
 
         # Check for Retake Logic
         # If user has already claimed (approved/pending), check if retake is allowed.
-        if GiveawayAttempt.objects.filter(user=user, giveaway=giveaway, status__in=['approved', 'pending']).exists():
+        if progress.has_claimed(giveaway.id):
             if not giveaway.allow_retake:
                 send_telegram_message(bot.token, chat_id, "✅ You have already claimed this giveaway.", reply_markup={"remove_keyboard": True}, bot=bot, user=user)
                 return
@@ -199,16 +249,15 @@ class TelegramWebhookView(APIView):
             # Check for Race Condition vs Genuine Retake
             is_answering = cache.get(f"user_is_answering_{chat_id}")
             if not is_answering:
-                 from .models import UserAnswer # Ensure import
-                 last_answer = UserAnswer.objects.filter(user=user, question__giveaway=giveaway).order_by('-answered_at').first()
+                 last_answer = UserAnswer.objects.filter(user=user, question__giveaway=giveaway, superseded=False).order_by('-answered_at').first()
                  
                  from django.utils import timezone
                  from datetime import timedelta
                  # If last answer was OLD (> 15s), assume User wants to RETAKE.
                  # If last answer was NEW (< 15s), assume User just finished usage and this is a race/retry -> Fall through to Fulfill.
                  if last_answer and (timezone.now() - last_answer.answered_at > timedelta(seconds=15)):
-                     # AUTO RESET for RETAKE
-                     UserAnswer.objects.filter(user=user, question__giveaway=giveaway).delete()
+                     # AUTO RESET for RETAKE (old answers are kept as superseded history)
+                     supersede_answers(user, giveaway)
                      cache.delete(f"current_q_{chat_id}")
                      cache.delete(f"user_is_answering_{chat_id}")
                      # Flow continues -> new UserAnswer count = 0 -> Question 1 asked.
@@ -222,10 +271,7 @@ class TelegramWebhookView(APIView):
                 cache_key = f"claim_intent_{chat_id}"
                 cache.set(cache_key, giveaway.id, timeout=600)
                 
-                if giveaway.prompt_template:
-                    msg = giveaway.prompt_template.content.format(name=user.first_name or "Friend")
-                else:
-                    msg = "Please send your proof (screenshot/text) now."
+                msg = render(giveaway.prompt_template, default="Please send your proof (screenshot/text) now.", name=user.first_name or "Friend")
                 send_telegram_message(bot.token, chat_id, msg, bot=bot, user=user)
                 return
             else:
@@ -236,10 +282,8 @@ class TelegramWebhookView(APIView):
                     status='pending',
                     user_proof=user_proof
                 )
-                if giveaway.success_template:
-                    msg = giveaway.success_template.content.format(name=user.first_name or "Friend")
-                else:
-                    msg = "Proof received! An admin will verify shortly."
+                metrics.incr('proofs_submitted', bot.id, giveaway.id)
+                msg = render(giveaway.success_template, default="Proof received! An admin will verify shortly.", name=user.first_name or "Friend")
                 send_telegram_message(bot.token, chat_id, msg, bot=bot, user=user)
                 return
 
@@ -254,14 +298,14 @@ class TelegramWebhookView(APIView):
                  return
 
              # Find first unanswered user question
-             from .models import UserAnswer # Import here to avoid circular
              
              # Get all answer texts for this user + giveaway
              # We can't filter UserAnswer by giveaway directly easily unless we join through Question.
-             answered_q_ids = UserAnswer.objects.filter(
+             answered_q_ids = set(UserAnswer.objects.filter(
                  user=user, 
-                 question__giveaway=giveaway
-             ).values_list('question_id', flat=True)
+                 question__giveaway=giveaway,
+                 superseded=False
+             ).values_list('question_id', flat=True))
 
              next_q = None
              for q in questions:
@@ -277,6 +321,8 @@ class TelegramWebhookView(APIView):
                  cache.set(f"current_q_{chat_id}", next_q.id, timeout=3600)
                  # NEW: Set flag that we are actively answering
                  cache.set(f"user_is_answering_{chat_id}", True, timeout=3600)
+                 if not answered_q_ids:
+                     question_asked(user, giveaway, len(questions))
                  
                  send_telegram_message(bot.token, chat_id, f"📝 Question: {next_q.text}", bot=bot, user=user)
                  return
@@ -295,12 +341,9 @@ class TelegramWebhookView(APIView):
                  cache.delete(f"user_is_answering_{chat_id}") # Clear flag if exists
                  
                  # Check for success template
-                 if giveaway.success_template:
-                     try:
-                        msg = giveaway.success_template.content.format(name=user.first_name or "Friend")
-                        send_telegram_message(bot.token, chat_id, msg, bot=bot, user=user)
-                     except Exception as e:
-                        logger.error(f"Error sending success template: {e}")
+                 msg = render(giveaway.success_template, name=user.first_name or "Friend")
+                 if msg:
+                     send_telegram_message(bot.token, chat_id, msg, bot=bot, user=user)
 
                  self.fulfill_giveaway(bot, user, chat_id, giveaway)
                  return
@@ -344,6 +387,7 @@ class TelegramWebhookView(APIView):
                 giveaway=giveaway,
                 status='approved'
              )
+             metrics.incr('approvals', bot.id, giveaway.id)
 
         # Scenario C (Manual Proof)
         elif giveaway.requirement_type == 'manual_approval':
@@ -361,17 +405,12 @@ class TelegramWebhookView(APIView):
                     item.claimed_by = user
                     item.save()
                     
-                    msg = f"✅ Verified! Here is your code:\n{item.content}"
-                    
-                    # Check for template
-                    if giveaway.approval_template:
-                        try:
-                            msg = giveaway.approval_template.content.format(
-                                content=item.content,
-                                name=user.first_name or "Friend"
-                            )
-                        except:
-                            pass
+                    msg = render(
+                        giveaway.approval_template,
+                        default=f"✅ Verified! Here is your code:\n{item.content}",
+                        content=item.content,
+                        name=user.first_name or "Friend"
+                    )
 
                     send_telegram_message(bot.token, chat_id, msg, reply_markup={"remove_keyboard": True}, bot=bot, user=user)
                     
@@ -380,7 +419,9 @@ class TelegramWebhookView(APIView):
                         giveaway=giveaway,
                         status='approved'
                     )
+                    metrics.incr('approvals', bot.id, giveaway.id)
                  else:
+                     metrics.incr('out_of_stock', bot.id, giveaway.id)
                      send_telegram_message(bot.token, chat_id, "⚠️ Sorry, we are out of stock right now!", reply_markup={"remove_keyboard": True}, bot=bot, user=user)
 
         else:
@@ -427,18 +468,16 @@ class TelegramWebhookView(APIView):
 
         # Prerequisite check (Crucial for auto-detection safety)
         if giveaway.pre_giveaway:
+            progress = get_progress(user)
             prereqs = Giveaway.objects.filter(bot=bot, is_active=True, sequence__lte=giveaway.pre_giveaway)
             missing = []
             for pr in prereqs:
-                if not GiveawayAttempt.objects.filter(user=user, giveaway=pr, status='approved').exists():
+                if not progress.has_completed(pr.id):
                     missing.append(str(pr.sequence))
             
             if missing:
-                if giveaway.failure_template:
-                    msg = giveaway.failure_template.content.format(name=user.first_name or "Friend")
-                else:
-                    seq_str = " and ".join([", ".join(missing[:-1]), missing[-1]] if len(missing) > 1 else missing)
-                    msg = f"⚠️ Please start with {seq_str} first!"
+                seq_str = " and ".join([", ".join(missing[:-1]), missing[-1]] if len(missing) > 1 else missing)
+                msg = render(giveaway.failure_template, default=f"⚠️ Please start with {seq_str} first!", name=user.first_name or "Friend")
                 send_telegram_message(bot.token, chat_id, msg, bot=bot, user=user)
                 return
 
@@ -452,7 +491,6 @@ class TelegramWebhookView(APIView):
              # We are expecting an answer
              current_q_id = cache.get(f"current_q_{chat_id}")
              if current_q_id and 'text' in message:
-                 from .models import Questionnaire, UserAnswer
                  try:
                      question = Questionnaire.objects.get(id=current_q_id)
                      # Save Answer
@@ -461,17 +499,20 @@ class TelegramWebhookView(APIView):
                          question=question,
                          answer=message['text']
                      )
+                     metrics.incr('questions_answered', bot.id, giveaway.id)
                      # Loop back to check for next question
-                     self.handle_claim(bot, user, chat_id, str(giveaway.sequence))
+                     self.handle_claim(bot, user, chat_id, str(giveaway.sequence), count_claim=False)
                      return 
                  except Questionnaire.DoesNotExist:
                      pass
         
         # Extract Proof (Manual Approval)
         proof = ""
+        proof_type = 'text'
         if 'photo' in message:
             # Get the largest photo file_id
             proof = message['photo'][-1]['file_id']
+            proof_type = 'photo'
         elif 'text' in message:
             proof = message['text']
             
@@ -481,14 +522,27 @@ class TelegramWebhookView(APIView):
                 user=user,
                 giveaway=giveaway,
                 status='pending',
-                user_proof=proof
+                user_proof=proof,
+                proof_type=proof_type,
             )
+            metrics.incr('proofs_submitted', bot.id, giveaway.id)
             
             # Clear cache
             cache.delete(cache_key)
             
-            if giveaway.success_template:
-                msg = giveaway.success_template.content.format(name=user.first_name or "Friend")
-            else:
-                msg = "Proof received! An admin will verify shortly."
+            msg = render(giveaway.success_template, default="Proof received! An admin will verify shortly.", name=user.first_name or "Friend")
             send_telegram_message(bot.token, chat_id, msg, bot=bot, user=user)
+
+
+class BulkApproveAttemptsView(APIView):
+    """
+    Approves pending attempts in bulk.
+    POST {"attempt_ids": [1, 2, 3]} -> {"results": [{"id": 1, "status": "approved", "content": "..."}, ...]}
+    """
+    permission_classes = [IsAdminUser]
+
+    def post(self, request):
+        attempt_ids = request.data.get('attempt_ids')
+        if not isinstance(attempt_ids, list) or not all(str(pk).isdigit() for pk in attempt_ids):
+            return Response({"detail": "attempt_ids must be a list of ids."}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"results": approve_attempts(attempt_ids)})
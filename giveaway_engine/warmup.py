@@ -0,0 +1,71 @@
+import logging
+import time
+
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+def _import_handlers():
+    from django.urls import get_resolver
+    from . import async_views, views  # noqa: F401
+    # Django imports the URLconf on the first request
+    get_resolver().url_patterns
+    try:
+        import httpx  # noqa: F401
+    except ImportError:
+        pass
+
+
+def _load_bots():
+    from .bot_table import load_bot_table
+    load_bot_table()
+
+
+def _compile_templates():
+    from .models import MessageTemplate
+    from .rendering import get_renderer
+    for template in MessageTemplate.objects.filter(bot__is_active=True):
+        get_renderer(template)
+
+
+def _open_http():
+    from .utils import telegram_api_url, telegram_session
+    # Any response will do: the point is an open, pooled connection to the Bot API host
+    telegram_session().head(telegram_api_url(), timeout=5)
+
+
+STEPS = (
+    ('imports', _import_handlers),
+    ('bots', _load_bots),
+    ('templates', _compile_templates),
+    ('http', _open_http),
+)
+
+
+def warm_up():
+    """
+    Does what a fresh worker would otherwise do while serving its first
+    updates: imports the handler path and the URLconf, loads the bot
+    routing table, compiles the message templates and opens a pooled Bot
+    API connection. Call it in the worker process, once Django is set up
+    (see post_worker_init). A failing step is logged and skipped. Returns
+    {step: milliseconds}.
+    """
+    timings = {}
+    for name, step in STEPS:
+        started = time.perf_counter()
+        try:
+            step()
+        except Exception as e:
+            logger.warning(f"Warm-up step {name} failed: {e}")
+        timings[name] = round((time.perf_counter() - started) * 1000, 1)
+    # The database work ran on this thread; requests open their own connections
+    connections.close_all()
+    logger.info(f"Warm-up done: {', '.join(f'{name} {ms}ms' for name, ms in timings.items())}")
+    return timings
+
+
+def post_worker_init(worker):
+    """gunicorn server hook: warms each worker up once it has loaded the application"""
+    warm_up()
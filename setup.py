@@ -10,6 +10,10 @@ setup(
         'djangorestframework',
         'requests',
     ],
+    extras_require={
+        'async': ['httpx'],
+        'thumbnails': ['Pillow'],
+    },
     classifiers=[
         'Framework :: Django',
         'Programming Language :: Python :: 3',